@@ -0,0 +1,141 @@
+# ======================================================
+# IDSO — GERADOR DE PLANILHA SINTÉTICA (BENCHMARK)
+# Mesmas colunas da planilha real (RENAME): N aeroportos × Y anos × 12
+# meses × os 7 indicadores de ORDEM_INDICADORES, com vários lançamentos
+# por chave até chegar ao número de linhas pedido. Os aeroportos com
+# metas cadastradas vêm primeiro, para a avaliação de metas ter trabalho.
+#
+#   python bench/gen_workbook.py --linhas 100k --saida base_100k.xlsx
+#   python bench/gen_workbook.py --linhas 1M --aeroportos 60 --anos 6 --saida base_1m.xlsx
+# ======================================================
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idso_core import (  # noqa: E402
+    RENAME, MESES_MAP, ORDEM_INDICADORES, METAS_POR_ANO, ULTIMO_ANO_METAS,
+    EXCEL_MAX_ROWS, write_xlsx_stream,
+)
+
+COLUNAS = list(RENAME)
+NOMES_MES = {}
+for nome, num in MESES_MAP.items():
+    NOMES_MES.setdefault(num, nome)     # "MARÇO" antes de "MARCO"
+
+LANCAMENTOS_POR_CHAVE = 3               # alvo quando o número de aeroportos é automático
+ULTIMO_MES = 8                          # último ano vai até agosto...
+ATRASOS = [0, 0, 0, 0, 0, 0, 1, 1, 2, 3]  # ...menos alguns aeroportos atrasados (meses)
+USUARIOS = ["ana.souza", "bruno.lima", "carla.reis", "diego.alves", "elisa.rocha", "fabio.nunes"]
+
+def parse_linhas(txt: str) -> int:
+    """'10k', '2.5M', '1000000' → inteiro."""
+    txt = str(txt).strip().lower().replace("_", "")
+    mult = {"k": 1_000, "m": 1_000_000}.get(txt[-1:], 1)
+    return int(float(txt[:-1] if mult > 1 else txt) * mult)
+
+def airport_codes(n: int) -> list:
+    """Aeroportos com metas primeiro; o resto são códigos ICAO fictícios (S + 3 letras)."""
+    reais = sorted({a for metas in METAS_POR_ANO.values() for a in metas})
+    codigos = reais[:n]
+    letras = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    for trio in itertools.product(letras, repeat=3):
+        if len(codigos) >= n:
+            break
+        cod = "S" + "".join(trio)
+        if cod not in reais:
+            codigos.append(cod)
+    return codigos
+
+def synthetic_raw(linhas: int, aeroportos: int = None, anos: int = 5, seed: int = 42) -> pd.DataFrame:
+    """
+    Planilha crua (colunas originais) com exatamente `linhas` linhas.
+    aeroportos None → escolhido para ~LANCAMENTOS_POR_CHAVE lançamentos por chave.
+    O último ano vai até ULTIMO_MES, com alguns aeroportos atrasados (pendências).
+    """
+    rng = np.random.default_rng(seed)
+    n_ind = len(ORDEM_INDICADORES)
+    if aeroportos is None:
+        aeroportos = max(4, -(-linhas // (anos * 12 * n_ind * LANCAMENTOS_POR_CHAVE)))
+    aeros = np.array(airport_codes(aeroportos), dtype=object)
+    anos_lista = np.arange(ULTIMO_ANO_METAS - anos + 1, ULTIMO_ANO_METAS + 1)
+
+    # períodos lançados: aeroporto × ano × mês, cortando o fim do último ano
+    g_aero, g_ano, g_mes = (a.ravel() for a in np.meshgrid(
+        np.arange(len(aeros)), anos_lista, np.arange(1, 13), indexing="ij",
+    ))
+    corte = ULTIMO_MES - rng.choice(ATRASOS, size=len(aeros))
+    valido = (g_ano < anos_lista[-1]) | (g_mes <= corte[g_aero])
+    g_aero, g_ano, g_mes = g_aero[valido], g_ano[valido], g_mes[valido]
+
+    # chave = período × indicador; os lançamentos repetem a grade
+    n_chaves = len(g_aero) * n_ind
+    idx = np.arange(linhas) % n_chaves
+    i_ind = idx % n_ind
+    i_per = idx // n_ind
+    i_aero = g_aero[i_per]
+    ano = g_ano[i_per]
+    mes = g_mes[i_per]
+
+    # movimentação: uma por aeroporto/mês (porte do aeroporto × sazonalidade)
+    porte = rng.integers(150, 4_000, size=len(aeros))
+    sazonal = 1 + 0.15 * np.sin((mes - 1) / 12 * 2 * np.pi)
+    mov = (porte[i_aero] * sazonal).astype(int)
+
+    # eventos: raros (Poisson), mais frequentes em Colisão com Aves / RELPREV
+    taxa = np.array([0.2, 0.1, 0.4, 0.6, 1.5, 0.05, 1.2])[i_ind]
+    eventos = rng.poisson(taxa * mov / 1_000)
+
+    dia = rng.integers(1, 28, size=linhas)
+    criado = pd.to_datetime({"year": ano + (mes == 12), "month": mes % 12 + 1, "day": dia})
+
+    return pd.DataFrame({
+        "AEROPORTO": aeros[i_aero],
+        "ANO": ano,
+        "MÊS": pd.Series(mes).map(NOMES_MES).to_numpy(),
+        "Nº DE EVENTOS": eventos,
+        "MOVIMENTAÇÃO (P + D)": mov,
+        "OrdemMes": mes,
+        "OrdemAno": ano,
+        "Indicador": np.array(ORDEM_INDICADORES, dtype=object)[i_ind],
+        "Criado": criado,
+        "Criado por": np.array(USUARIOS, dtype=object)[rng.integers(0, len(USUARIOS), size=linhas)],
+    })[COLUNAS]
+
+def write_workbook(raw: pd.DataFrame, fh) -> dict:
+    """Grava a planilha (uma aba) com o writer em streaming do núcleo."""
+    if len(raw) > EXCEL_MAX_ROWS - 1:
+        raise ValueError(f"{len(raw):,} linhas não cabem em uma aba do Excel ({EXCEL_MAX_ROWS - 1:,})")
+    return write_xlsx_stream({"Sheet1": raw}, fh)
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Gera uma planilha IDSO sintética para benchmark.")
+    ap.add_argument("--linhas", default="10k", help="número de linhas (aceita 10k, 1M...)")
+    ap.add_argument("--aeroportos", type=int, default=None, help="quantidade de aeroportos (padrão: automático)")
+    ap.add_argument("--anos", type=int, default=5, help="quantidade de anos até o último ano de metas")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--saida", required=True, help="arquivo .xlsx de destino")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    t0 = time.perf_counter()
+    raw = synthetic_raw(parse_linhas(args.linhas), args.aeroportos, args.anos, args.seed)
+    t_gen = time.perf_counter() - t0
+    with open(args.saida, "wb") as fh:
+        stats = write_workbook(raw, fh)
+    print(
+        f"{len(raw):,} linhas • {raw['AEROPORTO'].nunique()} aeroportos • {args.anos} anos "
+        f"→ {args.saida} ({os.path.getsize(args.saida) / 1024 / 1024:,.1f} MB; "
+        f"geração {t_gen:.2f} s, XLSX {stats['seconds']:.2f} s)"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
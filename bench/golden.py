@@ -0,0 +1,366 @@
+# ======================================================
+# IDSO — EQUIVALÊNCIA DE SAÍDAS (REFERÊNCIA × CANDIDATA)
+# Antes de aceitar uma implementação mais rápida: roda a referência (uma
+# revisão do git, por padrão HEAD) e a candidata (a árvore de trabalho)
+# sobre as mesmas bases e compara TODA tabela derivada — base preparada,
+# KPIs, monthly, banners YoY, rank_df nos dois modos, pendências
+# (calc_pending_by_airport) e listas de status das metas, em vários
+# recortes de filtro. Cada implementação roda em um subprocesso com o
+# próprio idso_core/idso_views no sys.path (sem misturar módulos).
+#
+#   python bench/golden.py --linhas 10k 100k
+#   python bench/golden.py --ref v1.4 --planilha base_real.xlsx
+#   python bench/golden.py --ref HEAD~3 --cand /caminho/outra_arvore --estrito
+#   python bench/golden.py --ref <revisão anterior ao idso_core>   (app monolítico)
+# ======================================================
+import argparse
+import ast
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+RESULTADOS_DIR = os.path.join(BENCH_DIR, "resultados")
+
+# módulos que formam a "implementação" comparada
+MODULOS = ["idso_core.py", "idso_views.py"]
+MODOS_RANK = {"rank_eventos": "Indicador por Eventos", "rank_indice": "Indicador por Índice"}
+
+# ======================================================
+# DERIVAÇÃO (roda DENTRO do subprocesso de cada implementação)
+# ======================================================
+def scenarios(opcoes) -> dict:
+    """Recortes de filtro aplicados às duas implementações (a partir das opções da base)."""
+    aero_base, ano_base, ind_base, mes_base = opcoes
+    return {
+        "todos": (aero_base, ano_base, ind_base, mes_base),
+        "ultimo_ano": (aero_base, ano_base[:1], ind_base, mes_base),
+        "dois_aeroportos": (aero_base[:2], ano_base, ind_base, mes_base),
+        "um_indicador": (aero_base, ano_base, ind_base[:1], mes_base),
+        "trimestre": (aero_base, ano_base[:2], ind_base, mes_base[:3]),
+        "vazio": (["—"], ano_base, ind_base, mes_base),   # lista vazia = sem filtro; aqui nada casa
+    }
+
+def reference_dates(core, df) -> list:
+    """Datas de corte das pendências: antes, no dia e depois do vencimento (dia 10) do mês seguinte ao último lançado, e 3 meses depois."""
+    base = df.dropna(subset=["ano", "ordem_mes"])
+    if base.empty:
+        return [date.today()]
+    ano, mes = core.int_to_period(int((base["ano"].astype(int) * 100 + base["ordem_mes"].astype(int)).max()))
+    ano, mes = core.add_months(ano, mes, 1)
+    ano3, mes3 = core.add_months(ano, mes, 3)
+    return [date(ano, mes, 5), date(ano, mes, 10), date(ano, mes, 19), date(ano3, mes3, 19)]
+
+def derive_tables(raw_or_bytes) -> dict:
+    """Todas as saídas comparadas, com a API do idso_core/idso_views que estiver no sys.path."""
+    import idso_core as core
+    try:
+        import idso_views as views
+    except ImportError:
+        views = None
+
+    out = {}
+
+    def guarda(nome, fn):
+        # uma função ausente (revisão antiga) ou que quebre vira um marcador, não aborta
+        try:
+            out[nome] = fn()
+        except Exception as e:
+            out[nome] = {"__erro__": f"{type(e).__name__}: {e}"}
+
+    if isinstance(raw_or_bytes, bytes):
+        raw, _ = core.read_workbook(raw_or_bytes)
+    else:
+        raw = raw_or_bytes
+    df = core.prepare_idso(raw)
+    out["prepare_idso"] = df
+    opcoes = core.filter_options(df)
+    out["filter_options"] = [list(o) for o in opcoes]
+
+    for nome, filtros in scenarios(opcoes).items():
+        df_f = core.apply_filters(df, *filtros)
+        p = f"{nome}/"
+        guarda(p + "apply_filters", lambda: df_f)
+        guarda(p + "kpi_values", lambda: pd.Series(core.kpi_values(df_f)))
+        guarda(p + "monthly", lambda: core.agg_monthly(df_f))
+        guarda(p + "eventos_mes", lambda: core.agg_eventos_mes(df_f))
+        guarda(p + "indicador", lambda: core.agg_indicador(df_f))
+        guarda(p + "ano", lambda: core.agg_ano(df_f))
+        for chave, modo in MODOS_RANK.items():
+            guarda(p + chave, lambda: core.agg_rank(df_f, modo))
+        if views is not None:
+            guarda(p + "banner_mov_yoy", lambda: views.stat_banner_mov_years(df_f))
+            guarda(p + "banner_eventos_yoy", lambda: views.stat_banner_years(df_f))
+
+    for hoje in reference_dates(core, df):
+        guarda(f"pendencias/{hoje.isoformat()}", lambda: core.calc_pending_by_airport(df, hoje))
+
+    anos_metas = [a for a in opcoes[1] if a >= core.ANO_BASE_METAS] if hasattr(core, "ANO_BASE_METAS") else []
+    for ano in anos_metas:
+        metas = core.metas_vigentes(ano)
+        def status(ano=ano, metas=metas):
+            atingiram, nao_atingiram = core.status_metas(df, ano, metas)
+            return {"atingiram": atingiram, "nao_atingiram": pd.DataFrame(nao_atingiram)}
+        guarda(f"metas/{ano}/status", status)
+        guarda(f"metas/{ano}/tabela_todos", lambda: core.metas_tabela(df, "Todos", ano))
+    return out
+
+def _derive_main(impl: str, entrada: str, saida: str) -> int:
+    # modo interno: só o diretório da implementação no caminho de import
+    sys.path.insert(0, impl)
+    with open(entrada, "rb") as fh:
+        dado = fh.read() if entrada.endswith(".xlsx") else pickle.load(fh)
+    t0 = time.perf_counter()
+    tabelas = derive_tables(dado)
+    segundos = time.perf_counter() - t0
+    with open(saida, "wb") as fh:
+        pickle.dump({"tabelas": tabelas, "s": segundos}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    return 0
+
+# ======================================================
+# REFERÊNCIA MONOLÍTICA (revisões sem idso_core.py)
+# ======================================================
+# Antes do idso_core, tudo morava em idso_app_final_unico.py: parte em funções,
+# parte em código solto entre os widgets. Para comparar com os números que
+# aquele código produzia, monta-se um idso_core a partir do arquivo SEM
+# executar o topo do Streamlit: funções e constantes do módulo que não usam
+# `st`, mais os blocos de cálculo soltos copiados literalmente (do primeiro
+# ao último comando indicados) para dentro de funções com a API atual.
+APP_MONOLITO = "idso_app_final_unico.py"
+
+# api: (parâmetros, comando inicial, comando final, retorno)
+BLOCOS_MONOLITO = {
+    "filter_options": ("df", "aero_base = ", "mes_base = ", "aero_base, ano_base, ind_base, mes_base"),
+    "kpi_values": ("df_f", "total_rows = ", "aero_ativos = ",
+                   '{"aeroportos": aero_ativos, "indicadores": indicadores_ativos, "eventos": total_eventos, "mov": total_mov}'),
+    "agg_monthly": ("df_f", "total_rows = ", "monthly = ", "monthly"),
+    "agg_eventos_mes": ("df_f", "ser = ", "ser['mes_abrev'] = ", "ser"),
+    "agg_indicador": ("df_f", "ind_sum = ", "ind_sum['label_color'] = ", "ind_sum"),
+    "agg_ano": ("df_f", "byy = ", "byy['ano'] = ", "byy"),
+    "agg_rank": ("df_f, modo_rank", "if modo_rank == 'Indicador por Eventos':",
+                 "if modo_rank == 'Indicador por Eventos':", "rank_df"),
+}
+BANNERS = ("stat_banner_mov_years", "stat_banner_years")
+
+def _usa_streamlit(no) -> bool:
+    return any(isinstance(n, ast.Name) and n.id in ("st", "px") for n in ast.walk(no))
+
+def _blocos(corpo):
+    # listas de comandos fora de funções (topo, with/if/for/try), na ordem do arquivo
+    yield corpo
+    for no in corpo:
+        if isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        for campo in ("body", "orelse", "finalbody"):
+            filho = getattr(no, campo, None)
+            if filho:
+                yield from _blocos(filho)
+        for h in getattr(no, "handlers", []):
+            yield from _blocos(h.body)
+
+def _trecho(arvore, inicio: str, fim: str) -> list:
+    for corpo in _blocos(arvore.body):
+        fontes = [ast.unparse(no) for no in corpo]
+        for i, fonte in enumerate(fontes):
+            if fonte.startswith(inicio):
+                j = next(k for k in range(i, len(fontes)) if fontes[k].startswith(fim))
+                return [no for no in corpo[i:j + 1] if not _usa_streamlit(no)]
+    raise ValueError(f"bloco não encontrado no monólito: {inicio!r}")
+
+def monolith_modules(fonte: str) -> dict:
+    """{nome do arquivo: código} de um idso_core/idso_views montados a partir do app monolítico."""
+    arvore = ast.parse(fonte)
+    partes = []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            nomes = [a.name for a in no.names] + [getattr(no, "module", None) or ""]
+            if not any(n.split(".")[0] in ("streamlit", "plotly") for n in nomes):
+                partes.append(ast.unparse(no))
+        elif isinstance(no, ast.FunctionDef) and not no.decorator_list and not _usa_streamlit(no):
+            partes.append(ast.unparse(no))
+        elif (isinstance(no, ast.Assign) and not _usa_streamlit(no)
+              and all(isinstance(t, ast.Name) and t.id.isupper() for t in no.targets)):
+            partes.append(ast.unparse(no))
+    # leitura: o monólito lia com pd.read_excel dentro de uma função com st.cache_data
+    partes.append("def read_workbook(file_bytes):\n    return pd.read_excel(BytesIO(file_bytes)), None")
+    for api, (params, inicio, fim, retorno) in BLOCOS_MONOLITO.items():
+        corpo = "\n".join(ast.unparse(no) for no in _trecho(arvore, inicio, fim))
+        partes.append(f"def {api}({params}):\n" + textwrap.indent(f"{corpo}\nreturn {retorno}", "    "))
+    return {
+        "idso_core.py": "import pandas as pd\nfrom io import BytesIO\n\n" + "\n\n".join(partes) + "\n",
+        "idso_views.py": f"from idso_core import {', '.join(BANNERS)}\n",
+    }
+
+# ======================================================
+# IMPLEMENTAÇÕES + EXECUÇÃO
+# ======================================================
+def checkout_ref(ref: str, destino: str) -> str:
+    """
+    Extrai os módulos da revisão `ref` (ou usa o diretório, se for um) em
+    `destino`. Revisão anterior ao idso_core: monta os módulos a partir do
+    app monolítico (monolith_modules).
+    """
+    if os.path.isdir(ref):
+        return os.path.abspath(ref)
+    os.makedirs(destino, exist_ok=True)
+    if _git_show(ref, "idso_core.py") is None:
+        fonte = _git_show(ref, APP_MONOLITO)
+        if fonte is None:
+            raise SystemExit(f"{ref}: nem idso_core.py nem {APP_MONOLITO} encontrados")
+        for nome, codigo in monolith_modules(fonte.decode("utf-8")).items():
+            with open(os.path.join(destino, nome), "w", encoding="utf-8") as fh:
+                fh.write(codigo)
+        return destino
+    for nome in MODULOS:
+        conteudo = _git_show(ref, nome)
+        if conteudo is not None:
+            with open(os.path.join(destino, nome), "wb") as fh:
+                fh.write(conteudo)
+    return destino
+
+def _git_show(ref: str, nome: str):
+    r = subprocess.run(["git", "show", f"{ref}:{nome}"], cwd=APP_DIR, capture_output=True)
+    return r.stdout if r.returncode == 0 else None
+
+def run_impl(impl: str, entrada: str, tmp: str, rotulo: str) -> dict:
+    saida = os.path.join(tmp, f"{rotulo}.pkl")
+    subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--derivar", impl, entrada, saida],
+        check=True, cwd=tmp,
+    )
+    with open(saida, "rb") as fh:
+        return pickle.load(fh)
+
+# ======================================================
+# COMPARAÇÃO
+# ======================================================
+def diff_value(a, b, estrito: bool, rtol: float):
+    """None se equivalentes; senão um texto curto com a primeira diferença."""
+    erro_a = isinstance(a, dict) and "__erro__" in a
+    erro_b = isinstance(b, dict) and "__erro__" in b
+    if erro_a or erro_b:
+        # só compara marcador com marcador (== entre dict e DataFrame/Series quebraria)
+        if erro_a and erro_b and a["__erro__"] == b["__erro__"]:
+            return None
+        return f"erro: ref={a['__erro__'] if erro_a else 'ok'} • cand={b['__erro__'] if erro_b else 'ok'}"
+    if type(a) is not type(b):
+        return f"tipo: {type(a).__name__} × {type(b).__name__}"
+    try:
+        if isinstance(a, pd.DataFrame):
+            pd.testing.assert_frame_equal(
+                a, b, check_dtype=estrito, check_index_type=estrito, check_column_type=estrito,
+                check_categorical=estrito, check_exact=False, rtol=rtol,
+            )
+        elif isinstance(a, pd.Series):
+            pd.testing.assert_series_equal(a, b, check_dtype=estrito, check_exact=False, rtol=rtol)
+        elif isinstance(a, (tuple, list)):
+            if len(a) != len(b):
+                return f"tamanho: {len(a)} × {len(b)}"
+            for i, (x, y) in enumerate(zip(a, b)):
+                d = diff_value(x, y, estrito, rtol)
+                if d:
+                    return f"[{i}] {d}"
+        elif isinstance(a, dict):
+            if set(a) != set(b):
+                return f"chaves: {sorted(set(a) ^ set(b))}"
+            for k in a:
+                d = diff_value(a[k], b[k], estrito, rtol)
+                if d:
+                    return f"[{k}] {d}"
+        elif a != b:
+            return f"{str(a)[:200]!r} × {str(b)[:200]!r}"
+    except AssertionError as e:
+        return " ".join(str(e).split())[:600]
+    return None
+
+def compare_tables(ref: dict, cand: dict, estrito: bool, rtol: float) -> list:
+    resultado = []
+    for nome in sorted(set(ref) | set(cand)):
+        if nome not in ref or nome not in cand:
+            lado = "referência" if nome not in ref else "candidata"
+            resultado.append({"tabela": nome, "ok": False, "diferenca": f"ausente na {lado}"})
+            continue
+        d = diff_value(ref[nome], cand[nome], estrito, rtol)
+        resultado.append({"tabela": nome, "ok": d is None, "diferenca": d})
+    return resultado
+
+# ======================================================
+# CLI
+# ======================================================
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Compara as saídas derivadas de duas implementações do núcleo IDSO.")
+    ap.add_argument("--ref", default="HEAD", help="revisão do git (ou diretório) da referência")
+    ap.add_argument("--cand", default=APP_DIR, help="diretório da implementação candidata (padrão: árvore de trabalho)")
+    ap.add_argument("--linhas", nargs="*", default=["10k"], help="bases sintéticas (10k, 1M...)")
+    ap.add_argument("--planilha", action="append", default=[], help="planilha real (pode repetir)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--estrito", action="store_true", help="exige dtypes/índices idênticos (padrão: só valores)")
+    ap.add_argument("--rtol", type=float, default=1e-9, help="tolerância relativa para floats")
+    ap.add_argument("--saida", default=None, help="JSON do relatório (padrão: bench/resultados/golden_<data>.json)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--derivar"]:
+        return _derive_main(*argv[1:4])
+    args = _parse_args(argv)
+
+    sys.path.insert(0, BENCH_DIR)
+    from gen_workbook import synthetic_raw, parse_linhas
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ref": args.ref, "cand": args.cand, "estrito": args.estrito, "rtol": args.rtol,
+        "bases": [],
+    }
+    falhas = 0
+    with tempfile.TemporaryDirectory(prefix="idso_golden_") as tmp:
+        ref_dir = checkout_ref(args.ref, os.path.join(tmp, "ref"))
+        cand_dir = os.path.abspath(args.cand)
+
+        entradas = []
+        for tamanho in args.linhas:
+            caminho = os.path.join(tmp, f"raw_{tamanho}.pkl")
+            with open(caminho, "wb") as fh:
+                pickle.dump(synthetic_raw(parse_linhas(tamanho), seed=args.seed), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            entradas.append((f"sintética {tamanho}", caminho))
+        for planilha in args.planilha:
+            entradas.append((os.path.basename(planilha), os.path.abspath(planilha)))
+
+        for rotulo, entrada in entradas:
+            print(f"▶ {rotulo}", flush=True)
+            ref = run_impl(ref_dir, entrada, tmp, "ref")
+            cand = run_impl(cand_dir, entrada, tmp, "cand")
+            tabelas = compare_tables(ref["tabelas"], cand["tabelas"], args.estrito, args.rtol)
+            ruins = [t for t in tabelas if not t["ok"]]
+            falhas += len(ruins)
+            for t in ruins:
+                print(f"   ❌ {t['tabela']}: {t['diferenca']}")
+            ganho = ref["s"] / cand["s"] if cand["s"] else float("inf")
+            print(
+                f"   {len(tabelas) - len(ruins)}/{len(tabelas)} tabela(s) iguais • "
+                f"referência {ref['s']:.2f} s • candidata {cand['s']:.2f} s ({ganho:.2f}×)"
+            )
+            relatorio["bases"].append({
+                "base": rotulo, "ref_s": round(ref["s"], 3), "cand_s": round(cand["s"], 3),
+                "tabelas": tabelas,
+            })
+
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"golden_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as fh:
+        json.dump(relatorio, fh, ensure_ascii=False, indent=2)
+    print(f"\n{'✅ saídas equivalentes' if not falhas else f'❌ {falhas} diferença(s)'} → {saida}")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
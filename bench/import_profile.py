@@ -0,0 +1,170 @@
+# ======================================================
+# IDSO — PERFIL DE IMPORTAÇÃO / PARTIDA A FRIO
+# Cada medição roda num processo novo (python -X importtime), como a
+# primeira sessão de um servidor recém-iniciado:
+#   • inicial: primeiro rerun sem arquivo (a tela só com o upload)
+#   • upload:  primeiro rerun com a planilha (leitura, gráficos, abas)
+# Reporta o tempo do rerun, o tempo gasto importando módulos durante ele
+# (os maiores, por tempo acumulado) e quais dependências pesadas foram
+# carregadas — plotly.express, openpyxl, matplotlib, fpdf — e grava JSON.
+#
+#   python bench/import_profile.py
+#   python bench/import_profile.py --planilha base.xlsx --repeticoes 5 --top 25
+# ======================================================
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(APP_DIR, "idso_app_final_unico.py")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from run_bench import RESULTADOS_DIR, environment, workbook_bytes  # noqa: E402
+from gen_workbook import parse_linhas  # noqa: E402
+
+# dependências que a tela inicial não deveria precisar
+PESADOS = ("plotly.express", "openpyxl", "matplotlib", "fpdf", "scipy", "seaborn")
+
+INICIO, FIM = "@@idso-inicio", "@@idso-fim"
+
+# processo filho: o AppTest (e o próprio Streamlit) já importados antes
+# da marca; o que aparece depois dela é o que o script do painel puxou
+FILHO = """
+import io, sys, time
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+planilha = {planilha!r}
+if planilha:
+    class Upload(io.BytesIO):
+        name = "IDSO_perfil.xlsx"
+    with open(planilha, "rb") as fh:
+        dados = fh.read()
+    st.file_uploader = lambda *a, **k: Upload(dados)
+
+at = AppTest.from_file({app!r}, default_timeout={timeout})
+sys.stderr.write("{inicio}\\n"); sys.stderr.flush()
+t0 = time.perf_counter()
+at.run()
+dt = time.perf_counter() - t0
+sys.stderr.write("{fim} %r %d\\n" % (dt, len(at.exception)))
+"""
+
+_LINHA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# ======================================================
+# MEDIÇÃO
+# ======================================================
+def parse_importtime(stderr: str) -> dict:
+    """Imports entre as marcas do filho: [(módulo, self_ms, acumulado_ms, nível)], tempo e erros."""
+    imports, dentro, tempo, erros = [], False, None, None
+    for linha in stderr.splitlines():
+        if linha.startswith(INICIO):
+            dentro = True
+        elif linha.startswith(FIM):
+            _, tempo, erros = linha.split()
+            dentro = False
+        elif dentro:
+            m = _LINHA.match(linha)
+            if m:
+                imports.append((m.group(4), int(m.group(1)) / 1000, int(m.group(2)) / 1000, len(m.group(3)) // 2))
+    return {"imports": imports, "tempo_s": float(tempo) if tempo else None, "erros": int(erros) if erros else None}
+
+def run_cold(planilha, timeout) -> dict:
+    codigo = FILHO.format(planilha=planilha, app=APP_PATH, timeout=timeout, inicio=INICIO, fim=FIM)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=APP_DIR, capture_output=True, text=True, timeout=timeout + 60,
+    )
+    medida = parse_importtime(proc.stderr)
+    if medida["tempo_s"] is None:
+        raise RuntimeError(f"o processo filho falhou:\n{proc.stderr[-2000:]}")
+    return medida
+
+def summarize(medidas: list, top: int) -> dict:
+    """Mediana das repetições; a lista de módulos vem da repetição mediana."""
+    medidas = sorted(medidas, key=lambda m: m["tempo_s"])
+    mediana = medidas[len(medidas) // 2]
+    raiz = [(nome, acum) for nome, _, acum, nivel in mediana["imports"] if nivel == 0]
+    carregados = {nome for nome, *_ in mediana["imports"]}
+    return {
+        "tempo_s": round(statistics.median(m["tempo_s"] for m in medidas), 3),
+        "tempo_min_s": round(medidas[0]["tempo_s"], 3),
+        "imports_ms": round(sum(acum for _, acum in raiz), 1),
+        "modulos_importados": len(mediana["imports"]),
+        "maiores": [{"modulo": n, "acumulado_ms": round(a, 1)} for n, a in sorted(raiz, key=lambda x: -x[1])[:top]],
+        "pesados": {p: p in carregados for p in PESADOS},
+        "erros": max(m["erros"] or 0 for m in medidas),
+    }
+
+# ======================================================
+# EXECUÇÃO
+# ======================================================
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Perfil de importação e partida a frio do painel IDSO.")
+    fonte = ap.add_mutually_exclusive_group()
+    fonte.add_argument("--planilha", help="planilha IDSO usada no cenário com upload")
+    fonte.add_argument("--linhas", default="10k", help="sem --planilha: gera uma base sintética desse tamanho")
+    ap.add_argument("--repeticoes", type=int, default=3, help="processos novos por cenário (vale a mediana)")
+    ap.add_argument("--top", type=int, default=15, help="módulos listados por cenário")
+    ap.add_argument("--sem-upload", action="store_true", help="mede só a tela inicial")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--timeout", type=float, default=300, help="limite por rerun (s)")
+    ap.add_argument("--saida", default=None, help="JSON de resultados (padrão: bench/resultados/imports_<data>.json)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    cenarios = {"inicial": None}
+    tmp = None
+    if not args.sem_upload:
+        if args.planilha:
+            cenarios["upload"] = os.path.abspath(args.planilha)
+        else:
+            tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+            tmp.write(workbook_bytes(parse_linhas(args.linhas), None, 5, args.seed))
+            tmp.close()
+            cenarios["upload"] = tmp.name
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": environment(),
+        "parametros": {
+            "fonte": args.planilha and os.path.basename(args.planilha) or f"sintética {args.linhas}",
+            "repeticoes": args.repeticoes,
+        },
+        "cenarios": {},
+    }
+    try:
+        for nome, planilha in cenarios.items():
+            print(f"▶ {nome}: {args.repeticoes} processo(s) novo(s)", flush=True)
+            medidas = [run_cold(planilha, args.timeout) for _ in range(args.repeticoes)]
+            r = relatorio["cenarios"][nome] = summarize(medidas, args.top)
+            carregados = ", ".join(p for p, sim in r["pesados"].items() if sim) or "nenhuma"
+            print(
+                f"   rerun {r['tempo_s']:.2f} s (mín {r['tempo_min_s']:.2f}) • importando {r['imports_ms']:,.0f} ms"
+                f" em {r['modulos_importados']} módulo(s) • pesadas: {carregados}"
+            )
+            for m in r["maiores"]:
+                print(f"     {m['acumulado_ms']:>8.1f} ms  {m['modulo']}")
+    finally:
+        if tmp is not None:
+            os.unlink(tmp.name)
+
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"imports_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as fh:
+        json.dump(relatorio, fh, ensure_ascii=False, indent=2)
+    print(f"Resultados → {saida}")
+    return 1 if any(r["erros"] for r in relatorio["cenarios"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
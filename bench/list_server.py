@@ -0,0 +1,137 @@
+# ======================================================
+# IDSO — SERVIDOR LOCAL DA API DE LISTA (TESTE DA SINCRONIZAÇÃO)
+# Serve as linhas de uma planilha (real ou sintética) com o contrato que
+# idso_sync espera: $filter=Criado ge '<ISO>', $orderby=Criado, $top e
+# paginação por @odata.nextLink. Para simular lançamentos chegando, só as
+# linhas mais antigas começam visíveis; POST /liberar?n=500 libera as
+# próximas n (em ordem de Criado).
+#
+#   python bench/list_server.py --linhas 100k --visiveis 0.9
+#   IDSO_SYNC_URL=http://127.0.0.1:8765/itens streamlit run idso_app_final_unico.py
+#   curl -X POST 'http://127.0.0.1:8765/liberar?n=1000'
+# ======================================================
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+
+from gen_workbook import synthetic_raw, parse_linhas  # noqa: E402
+
+def _utc(valor) -> pd.Timestamp:
+    ts = pd.Timestamp(valor)
+    return ts if ts.tz is None else ts.tz_convert("UTC").tz_localize(None)
+
+class ListaIDSO:
+    """Itens em ordem de Criado; `visiveis` controla quantos a API enxerga."""
+
+    def __init__(self, raw: pd.DataFrame, fracao_visivel: float = 1.0):
+        raw = raw.sort_values("Criado", kind="stable").reset_index(drop=True)
+        self.criado = pd.to_datetime(raw["Criado"]).to_numpy()
+        # como as listas reais: datas em UTC com "Z" (o cliente tem de lidar com o fuso)
+        raw = raw.assign(Criado=pd.to_datetime(raw["Criado"]).dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"))
+        self.itens = json.loads(raw.to_json(orient="records", date_format="iso", force_ascii=False))
+        self.visiveis = int(len(self.itens) * fracao_visivel)
+        self.lock = threading.Lock()
+        self.requisicoes = 0
+
+    def liberar(self, n: int) -> int:
+        with self.lock:
+            self.visiveis = min(len(self.itens), self.visiveis + n)
+            return self.visiveis
+
+    def pagina(self, desde, inicio: int, tamanho: int):
+        """(itens da página, próximo início ou None) entre os visíveis com Criado >= desde."""
+        with self.lock:
+            self.requisicoes += 1
+            fim = self.visiveis
+        primeiro = 0 if desde is None else int(self.criado[:fim].searchsorted(_utc(desde).to_datetime64()))
+        ini = max(primeiro, inicio)
+        prox = ini + tamanho
+        return self.itens[ini:min(prox, fim)], (prox if prox < fim else None)
+
+def make_handler(lista: ListaIDSO):
+    class _Handler(BaseHTTPRequestHandler):
+        def _json(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/itens":
+                self._json(404, {"erro": "use /itens"})
+                return
+            q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            desde = None
+            if "$filter" in q:
+                # único filtro aceito: Criado ge '<ISO>'
+                campo, op, valor = q["$filter"].split(" ", 2)
+                if campo != "Criado" or op != "ge":
+                    self._json(400, {"erro": f"filtro não suportado: {q['$filter']}"})
+                    return
+                desde = valor.strip("'")
+            tamanho = int(q.get("$top", 500))
+            itens, prox = lista.pagina(desde, int(q.get("$skiptoken", 0)), tamanho)
+            corpo = {"value": itens}
+            if prox is not None:
+                q["$skiptoken"] = prox
+                corpo["@odata.nextLink"] = f"http://{self.headers['Host']}/itens?{urlencode(q)}"
+            self._json(200, corpo)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/liberar":
+                self._json(404, {"erro": "use /liberar?n=<linhas>"})
+                return
+            n = int(parse_qs(url.query).get("n", ["100"])[-1])
+            self._json(200, {"visiveis": lista.liberar(n), "total": len(lista.itens)})
+
+        def log_message(self, *args):
+            pass
+
+    return _Handler
+
+def serve(lista: ListaIDSO, porta: int = 8765, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Sobe o servidor numa thread daemon (uso em testes) e devolve-o."""
+    servidor = ThreadingHTTPServer((host, porta), make_handler(lista))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="API de lista IDSO local (paginada, com filtro por Criado).")
+    fonte = ap.add_mutually_exclusive_group()
+    fonte.add_argument("--planilha", help="planilha IDSO cujas linhas a API serve")
+    fonte.add_argument("--linhas", default="10k", help="sem --planilha: base sintética desse tamanho")
+    ap.add_argument("--visiveis", type=float, default=1.0, help="fração inicial visível (as mais antigas)")
+    ap.add_argument("--porta", type=int, default=8765)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--seed", type=int, default=42)
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    raw = pd.read_excel(args.planilha) if args.planilha else synthetic_raw(parse_linhas(args.linhas), seed=args.seed)
+    lista = ListaIDSO(raw, args.visiveis)
+    servidor = ThreadingHTTPServer((args.host, args.porta), make_handler(lista))
+    print(f"▶ http://{args.host}:{args.porta}/itens • {lista.visiveis:,}/{len(lista.itens):,} itens visíveis", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
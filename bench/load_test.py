@@ -0,0 +1,258 @@
+# ======================================================
+# IDSO — TESTE DE CARGA (RERUNS CONCORRENTES)
+# Simula N analistas usando o painel ao mesmo tempo, sem navegador:
+# cada sessão é um AppTest do script real, todas no MESMO processo (como
+# no servidor: caches st.cache_* compartilhados, um GIL). Cada sessão faz
+# o upload e depois uma sequência de ações — filtros (ano_sel, aero_sel,
+# ind_sel, volta a "Todos") e interações nas abas (ranking, comparativo,
+# metas, exportação). Abas do Streamlit trocam no navegador, sem rerun;
+# por isso a "troca de aba" é a interação com os widgets de cada aba.
+#
+# Mede a latência de cada rerun (p50/p95/p99, geral e por ação), o RSS
+# do processo (base, pico) e a memória estimada por sessão; grava JSON.
+#
+#   python bench/load_test.py --planilha base.xlsx --sessoes 20 --passos 15
+#   python bench/load_test.py --linhas 100k --sessoes 40 --pensar 0.5
+# ======================================================
+import argparse
+import io
+import json
+import os
+import pickle
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(APP_DIR, "idso_app_final_unico.py")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from idso_core import read_workbook, prepare_idso, filter_options  # noqa: E402
+from idso_memory import process_rss_mb  # noqa: E402
+from run_bench import RESULTADOS_DIR, environment, workbook_bytes  # noqa: E402
+from gen_workbook import parse_linhas  # noqa: E402
+
+# ações e pesos (filtros dominam, como no uso real perto do dia 10)
+ACOES = {
+    "ano": 3, "aero": 3, "ind": 2, "todos": 1,
+    "ranking": 1, "comparativo": 1, "metas": 1, "exportar": 1,
+}
+
+# ======================================================
+# MEMÓRIA DO PROCESSO
+# ======================================================
+class RssSampler(threading.Thread):
+    """Amostra o RSS em segundo plano e guarda o pico."""
+
+    def __init__(self, intervalo=0.1):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = process_rss_mb()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, process_rss_mb())
+
+    def stop(self):
+        self._parar.set()
+        self.join()
+        self.pico = max(self.pico, process_rss_mb())
+
+def session_state_bytes(at) -> int:
+    # tamanho serializado do session_state (o que o servidor guarda por sessão)
+    total = 0
+    for _, v in at.session_state.items():
+        try:
+            total += len(pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            pass
+    return total
+
+# ======================================================
+# SESSÃO SIMULADA
+# ======================================================
+class Upload(io.BytesIO):
+    name = "IDSO_carga.xlsx"
+
+def _radio(at, trecho):
+    for r in at.radio:
+        if trecho in (r.label or ""):
+            return r
+    return None
+
+def run_action(at, acao, rng, opcoes):
+    """Aplica a ação no AppTest (cada set_value/click já dispara o rerun)."""
+    anos, aeros, inds = opcoes
+    if acao == "ano":
+        at.multiselect(key="ano_sel").set_value([rng.choice(anos)]).run()
+    elif acao == "aero":
+        at.multiselect(key="aero_sel").set_value(sorted(rng.sample(aeros, min(len(aeros), rng.randint(1, 3))))).run()
+    elif acao == "ind":
+        at.multiselect(key="ind_sel").set_value(sorted(rng.sample(inds, min(len(inds), rng.randint(1, 2))))).run()
+    elif acao == "todos":
+        at.multiselect(key="ano_sel").set_value(["Todos"]).run()
+    elif acao == "ranking":
+        r = _radio(at, "Ranking")
+        (r.set_value([o for o in r.options if o != r.value][0]) if r else at).run()
+    elif acao == "comparativo":
+        r = _radio(at, "Comparação")
+        (r.set_value([o for o in r.options if o != r.value][0]) if r else at).run()
+    elif acao == "metas":
+        r = _radio(at, "somente às Metas")
+        (r.set_value(rng.choice(r.options)) if r else at).run()
+    elif acao == "exportar":
+        botoes = [b for b in at.button if b.key == "btn_gerar_exports"]
+        (botoes[0].click() if botoes else at).run()
+
+def run_session(n, args, opcoes, barreira) -> dict:
+    rng = random.Random(args.seed * 1000 + n)
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    reruns, erros = [], []
+
+    def medir(acao, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+            if at.exception:
+                exc = at.exception[0]
+                erros.append({"acao": acao, "erro": str(exc.value)[:300], "pilha": list(exc.stack_trace)[-6:]})
+        except Exception as e:
+            erros.append({"acao": acao, "erro": repr(e)[:300]})
+        reruns.append({"acao": acao, "s": time.perf_counter() - t0})
+
+    barreira.wait()                           # todas as sessões começam juntas
+    medir("upload", at.run)
+    acoes, pesos = list(ACOES), list(ACOES.values())
+    for _ in range(args.passos):
+        if args.pensar:
+            time.sleep(rng.uniform(0, 2 * args.pensar))
+        acao = rng.choices(acoes, pesos)[0]
+        medir(acao, lambda: run_action(at, acao, rng, opcoes))
+
+    return {"sessao": n, "reruns": reruns, "erros": erros, "state_bytes": session_state_bytes(at), "_at": at}
+
+# ======================================================
+# RELATÓRIO
+# ======================================================
+def percentis(valores) -> dict:
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+    if len(ordenados) >= 2:
+        q = statistics.quantiles(ordenados, n=100, method="inclusive")
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = ordenados[0]
+    return {
+        "n": len(ordenados),
+        "p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+        "max": round(ordenados[-1], 3), "media": round(statistics.fmean(ordenados), 3),
+    }
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Teste de carga do painel IDSO (sessões simuladas concorrentes).")
+    fonte = ap.add_mutually_exclusive_group()
+    fonte.add_argument("--planilha", help="planilha IDSO usada no upload")
+    fonte.add_argument("--linhas", default="10k", help="sem --planilha: gera uma base sintética desse tamanho")
+    ap.add_argument("--sessoes", type=int, default=10, help="sessões simultâneas")
+    ap.add_argument("--passos", type=int, default=10, help="ações por sessão depois do upload")
+    ap.add_argument("--pensar", type=float, default=0.0, help="pausa média entre ações (s)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--timeout", type=float, default=300, help="limite por rerun (s)")
+    ap.add_argument("--saida", default=None, help="JSON de resultados (padrão: bench/resultados/carga_<data>.json)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.planilha:
+        with open(args.planilha, "rb") as fh:
+            dados = fh.read()
+        fonte = os.path.basename(args.planilha)
+    else:
+        dados = workbook_bytes(parse_linhas(args.linhas), None, 5, args.seed)
+        fonte = f"sintética {args.linhas}"
+
+    # o upload do navegador vira um arquivo em memória para todas as sessões
+    st.file_uploader = lambda *a, **k: Upload(dados)
+
+    raw, _ = read_workbook(dados)
+    aeros, anos, inds, _ = filter_options(prepare_idso(raw))
+    opcoes = (anos, aeros, inds)
+    raw = None
+
+    os.chdir(APP_DIR)
+    rss_base = process_rss_mb()
+    sampler = RssSampler()
+    sampler.start()
+    barreira = threading.Barrier(args.sessoes)
+
+    print(f"▶ {args.sessoes} sessão(ões) × {args.passos} ação(ões) • base {fonte}", flush=True)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessoes) as pool:
+        sessoes = list(pool.map(lambda n: run_session(n, args, opcoes, barreira), range(args.sessoes)))
+    duracao = time.perf_counter() - t0
+    rss_fim = process_rss_mb()
+    sampler.stop()
+
+    todos = [r["s"] for s in sessoes for r in s["reruns"]]
+    por_acao = {}
+    for s in sessoes:
+        for r in s["reruns"]:
+            por_acao.setdefault(r["acao"], []).append(r["s"])
+    erros = [dict(e, sessao=s["sessao"]) for s in sessoes for e in s["erros"]]
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": environment(),
+        "parametros": {
+            "fonte": fonte, "sessoes": args.sessoes, "passos": args.passos,
+            "pensar": args.pensar, "seed": args.seed,
+        },
+        "duracao_s": round(duracao, 2),
+        "reruns_por_s": round(len(todos) / duracao, 2) if duracao else None,
+        "latencia": percentis(todos),
+        "latencia_por_acao": {k: percentis(v) for k, v in sorted(por_acao.items())},
+        "memoria": {
+            "rss_base_mb": round(rss_base, 1),
+            "rss_pico_mb": round(sampler.pico, 1),
+            "rss_fim_mb": round(rss_fim, 1),
+            # sessões ainda vivas: o que sobrou acima da base dividido por sessão
+            "por_sessao_mb": round((rss_fim - rss_base) / args.sessoes, 1),
+            "session_state_kb_mediana": round(statistics.median(s["state_bytes"] for s in sessoes) / 1024, 1),
+        },
+        "erros": erros,
+    }
+
+    lat = relatorio["latencia"]
+    print(f"\n{'AÇÃO':<14}{'N':>6}{'P50':>9}{'P95':>9}{'P99':>9}{'MÁX':>9}")
+    for acao, p in relatorio["latencia_por_acao"].items():
+        print(f"{acao:<14}{p['n']:>6}{p['p50']:>8.2f}s{p['p95']:>8.2f}s{p['p99']:>8.2f}s{p['max']:>8.2f}s")
+    print(f"{'TOTAL':<14}{lat['n']:>6}{lat['p50']:>8.2f}s{lat['p95']:>8.2f}s{lat['p99']:>8.2f}s{lat['max']:>8.2f}s")
+    mem = relatorio["memoria"]
+    print(
+        f"\n⏱️ {duracao:.1f} s • {relatorio['reruns_por_s']} rerun(s)/s"
+        f"\n🧠 RSS base {mem['rss_base_mb']:,.0f} MB • pico {mem['rss_pico_mb']:,.0f} MB • fim {mem['rss_fim_mb']:,.0f} MB"
+        f" • ~{mem['por_sessao_mb']:,.1f} MB/sessão (session_state ~{mem['session_state_kb_mediana']:,.0f} KB)"
+    )
+    if erros:
+        print(f"❌ {len(erros)} erro(s); primeiro: {erros[0]}")
+
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"carga_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as fh:
+        json.dump(relatorio, fh, ensure_ascii=False, indent=2)
+    print(f"Resultados → {saida}")
+    return 1 if erros else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+# ======================================================
+# IDSO — BENCHMARK DAS ETAPAS DO NÚCLEO
+# Para cada tamanho de base: leitura do XLSX (read_excel_and_hash →
+# read_workbook), prepare_idso, apply_filters, calc_pending_by_airport,
+# avaliação de metas e df_to_excel_bytes. Mede tempo de parede (melhor e
+# mediana das repetições) e pico de memória por etapa (tracemalloc, numa
+# passada à parte para não distorcer o tempo) e grava tudo em JSON.
+#
+#   python bench/run_bench.py --tamanhos 10k 100k 1M
+#   python bench/run_bench.py --tamanhos 10M --sem-leitura --xlsx-max 0
+#   python bench/run_bench.py --comparar antes.json depois.json
+# ======================================================
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from idso_core import (  # noqa: E402
+    EXCEL_MAX_ROWS, ORDEM_INDICADORES, ULTIMO_ANO_METAS,
+    read_workbook, prepare_idso, apply_filters, calc_pending_by_airport,
+    filter_options, agg_monthly, metas_vigentes, metas_grid, status_metas,
+    export_sheets, df_to_excel_bytes,
+)
+from gen_workbook import synthetic_raw, write_workbook, parse_linhas, ULTIMO_MES  # noqa: E402
+
+DADOS_DIR = os.path.join(BENCH_DIR, "dados")            # planilhas geradas (reaproveitadas)
+RESULTADOS_DIR = os.path.join(BENCH_DIR, "resultados")
+
+# data de referência fixa: mês seguinte ao último lançado → há pendências
+HOJE = date(ULTIMO_ANO_METAS, ULTIMO_MES + 1, 19)
+
+# ======================================================
+# MEDIÇÃO
+# ======================================================
+def _rss_max_mb() -> float:
+    # pico de RSS do processo até agora (ru_maxrss: KB no Linux, bytes no macOS)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def measure(fn, repeticoes: int, memoria: bool) -> tuple:
+    """Roda fn repeticoes vezes (tempo) e, se pedido, mais uma com tracemalloc (pico)."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        resultado = None
+        gc.collect()
+        t0 = time.perf_counter()
+        resultado = fn()
+        tempos.append(time.perf_counter() - t0)
+
+    info = {
+        "s": round(min(tempos), 4),
+        "s_mediana": round(statistics.median(tempos), 4),
+        "repeticoes": [round(t, 4) for t in tempos],
+    }
+    if memoria:
+        resultado = None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            resultado = fn()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        info["pico_mb"] = round(pico / 1024 / 1024, 2)
+    info["rss_max_mb"] = round(_rss_max_mb(), 1)
+    return resultado, info
+
+# ======================================================
+# ETAPAS
+# ======================================================
+def workbook_bytes(linhas: int, aeroportos, anos: int, seed: int) -> bytes:
+    """XLSX sintético do tamanho pedido, gerado uma vez e guardado em bench/dados/."""
+    os.makedirs(DADOS_DIR, exist_ok=True)
+    nome = f"idso_{linhas}_{aeroportos or 'auto'}_{anos}_{seed}.xlsx"
+    caminho = os.path.join(DADOS_DIR, nome)
+    if not os.path.exists(caminho):
+        print(f"   gerando {nome}…", flush=True)
+        tmp = caminho + ".tmp"
+        with open(tmp, "wb") as fh:
+            write_workbook(synthetic_raw(linhas, aeroportos, anos, seed), fh)
+        os.replace(tmp, caminho)
+    with open(caminho, "rb") as fh:
+        return fh.read()
+
+def run_size(linhas: int, args) -> dict:
+    etapas = {}
+
+    def etapa(nome, fn):
+        res, info = measure(fn, args.repeticoes, not args.sem_memoria)
+        etapas[nome] = info
+        mem = f" • pico {info['pico_mb']:,.1f} MB" if "pico_mb" in info else ""
+        print(f"   {nome:<28}{info['s']:>10.3f} s{mem} • RSS máx {info['rss_max_mb']:,.0f} MB", flush=True)
+        return res
+
+    def pula(nome, motivo):
+        etapas[nome] = {"pulada": motivo}
+        print(f"   {nome:<28}{'—':>10}   ({motivo})", flush=True)
+
+    # 1) leitura (só cabe em uma aba do Excel até ~1M linhas)
+    if args.sem_leitura:
+        pula("read_excel_and_hash", "desligada (--sem-leitura)")
+    elif linhas > EXCEL_MAX_ROWS - 1:
+        pula("read_excel_and_hash", "acima do limite de linhas do Excel")
+    else:
+        dados = workbook_bytes(linhas, args.aeroportos, args.anos, args.seed)
+        etapa("read_excel_and_hash", lambda: read_workbook(dados))
+        dados = None
+
+    # a base crua das demais etapas vem direto do gerador (mesmos dados)
+    raw = synthetic_raw(linhas, args.aeroportos, args.anos, args.seed)
+
+    # 2) preparação
+    df = etapa("prepare_idso", lambda: prepare_idso(raw))
+    raw = None
+
+    # 3) filtros: visão "Todos" e um aeroporto no último ano
+    aero_base, ano_base, ind_base, mes_base = filter_options(df)
+    df_f = etapa("apply_filters[todos]", lambda: apply_filters(df, aero_base, ano_base, ind_base, mes_base))
+    etapa("apply_filters[1 aeroporto]", lambda: apply_filters(df, aero_base[:1], ano_base[:1], ind_base, mes_base))
+
+    # 4) pendências
+    etapa("calc_pending_by_airport", lambda: calc_pending_by_airport(df, HOJE))
+
+    # 5) metas: status do ano + grade "Todos" (o que a aba de metas calcula)
+    metas = metas_vigentes(ULTIMO_ANO_METAS)
+    df_metas = df_f[df_f["ano"] == ULTIMO_ANO_METAS]
+    etapa("metas", lambda: (
+        status_metas(df, ULTIMO_ANO_METAS, metas),
+        metas_grid(df_metas, "Todos", ORDEM_INDICADORES, [ULTIMO_ANO_METAS], metas),
+    ))
+
+    # 6) relatório XLSX da visão "Todos"
+    if len(df_f) > args.xlsx_max:
+        pula("df_to_excel_bytes", f"acima de --xlsx-max ({args.xlsx_max:,} linhas)")
+    else:
+        monthly = agg_monthly(df_f)
+        etapa("df_to_excel_bytes", lambda: len(df_to_excel_bytes(export_sheets(df_f, monthly))))
+
+    return {
+        "linhas": linhas,
+        "linhas_preparadas": int(len(df)),
+        "aeroportos": int(df["aeroporto"].nunique()),
+        "anos": args.anos,
+        "df_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1),
+        "etapas": etapas,
+    }
+
+# ======================================================
+# AMBIENTE + COMPARAÇÃO
+# ======================================================
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    import openpyxl
+    return {
+        "git": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def compare(antes_path: str, depois_path: str) -> int:
+    with open(antes_path, encoding="utf-8") as fh:
+        antes = {r["linhas"]: r for r in json.load(fh)["resultados"]}
+    with open(depois_path, encoding="utf-8") as fh:
+        depois = {r["linhas"]: r for r in json.load(fh)["resultados"]}
+
+    print(f"{'LINHAS':>10}  {'ETAPA':<28}{'ANTES':>10}{'DEPOIS':>10}{'GANHO':>8}{'PICO ANTES':>13}{'PICO DEPOIS':>13}")
+    for linhas in sorted(set(antes) & set(depois)):
+        for nome, d in depois[linhas]["etapas"].items():
+            a = antes[linhas]["etapas"].get(nome, {})
+            if "s" not in a or "s" not in d:
+                continue
+            fator = a["s"] / d["s"] if d["s"] > 0 else float("inf")
+            pa, pd_ = a.get("pico_mb"), d.get("pico_mb")
+            print(
+                f"{linhas:>10,}  {nome:<28}{a['s']:>9.3f}s{d['s']:>9.3f}s{fator:>7.2f}×"
+                f"{(f'{pa:,.1f} MB' if pa is not None else '—'):>13}{(f'{pd_:,.1f} MB' if pd_ is not None else '—'):>13}"
+            )
+    return 0
+
+# ======================================================
+# CLI
+# ======================================================
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark das etapas do núcleo IDSO com bases sintéticas.")
+    ap.add_argument("--tamanhos", nargs="+", default=["10k", "100k"], help="linhas por base (10k, 1M, 10M...)")
+    ap.add_argument("--aeroportos", type=int, default=None, help="aeroportos por base (padrão: automático)")
+    ap.add_argument("--anos", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeticoes", type=int, default=3, help="repetições por etapa (vale o melhor tempo)")
+    ap.add_argument("--sem-memoria", action="store_true", help="não mede pico com tracemalloc (mais rápido)")
+    ap.add_argument("--sem-leitura", action="store_true", help="pula a leitura do XLSX (gerar a planilha é lento)")
+    ap.add_argument("--xlsx-max", type=parse_linhas, default=EXCEL_MAX_ROWS - 1,
+                    help="maior recorte exportado em df_to_excel_bytes (padrão: limite do Excel)")
+    ap.add_argument("--saida", default=None, help="JSON de resultados (padrão: bench/resultados/bench_<data>.json)")
+    ap.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois JSON e sai")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.comparar:
+        return compare(*args.comparar)
+
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"bench_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": environment(),
+        "parametros": {
+            "aeroportos": args.aeroportos, "anos": args.anos, "seed": args.seed,
+            "repeticoes": args.repeticoes, "memoria": not args.sem_memoria,
+            "xlsx_max": args.xlsx_max, "hoje": HOJE.isoformat(),
+        },
+        "resultados": [],
+    }
+    for tamanho in args.tamanhos:
+        linhas = parse_linhas(tamanho)
+        print(f"▶ {linhas:,} linhas", flush=True)
+        relatorio["resultados"].append(run_size(linhas, args))
+        # grava a cada tamanho: uma base grande que estoure a memória não perde as anteriores
+        with open(saida, "w", encoding="utf-8") as fh:
+            json.dump(relatorio, fh, ensure_ascii=False, indent=2)
+
+    print(f"\nResultados → {saida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
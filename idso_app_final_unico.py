@@ -1,607 +1,351 @@
+# ======================================================
+# IDSO — PAINEL STREAMLIT
+# Só interface: widgets, sessão, caches e layout. Dados e cálculos vêm
+# de idso_core, HTML/figuras de idso_views, pré-computação de idso_warm
+# e a fila de exportações de idso_jobs (todos importáveis sem Streamlit).
+# ======================================================
 import hashlib
-import base64
 import json
-from io import BytesIO
-from zipfile import ZipFile, ZIP_DEFLATED
+import os
+import time
 from datetime import datetime, date
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+from idso_core import (
+    MESES_ABREV, ORDEM_MESES_ABREV,
+    fmt_int,
+    read_workbook, prepare_idso, apply_filters, default_view_frame, calc_pending_by_airport, pending_only,
+    ANO_COLORS, filter_options, agg_monthly, agg_eventos_mes, kpi_values,
+    agg_indicador, agg_ano, agg_rank, agg_indicador_aeroporto,
+    compare_base, compare_airports, compare_totals,
+    ORDEM_INDICADORES, metas_vigentes, metas_grid, status_metas,
+    export_sheets, pend_export_frame, build_package,
+)
+from idso_views import (
+    ACCENT, FONT_PATH, load_font_base64, font_data_url, build_css,
+    card_html, stat_banner_mov_years, stat_banner_years,
+    compact_figure, figure_payload_bytes,
+    BASE_COLORS, default_color_map, color_signature, label_filtro,
+    build_fig1, build_fig2, build_fig3, build_fig_evt, build_fig_idx, build_fig_cmp, build_fig_profile,
+    pending_card_html, compare_cards_html,
+    rank_cards_html, metas_grid_html, status_html,
+)
+from idso_warm import WarmStore
+from idso_snapshot import build_snapshot_html
+from idso_jobs import ExportQueue, QueueFull, FILA, ERRO
+from idso_memory import deep_size, frame_memory, mapping_sizes, fmt_bytes, process_rss_mb
+from idso_cache import get_cache, all_caches, discard_dataset, key_sha
+from idso_metrics import METRICS, timed, start_http_server, start_file_writer
+from idso_publish import publish, unpublish, published_meta, load_published, PublishedUnavailable
+from idso_arrow import ArrowStore
+
 # ======================================================
-# CARREGAMENTO DA FONTE (AJUSTE NECESSÁRIO)
+# CARREGAMENTO DA FONTE (ARQUIVO ESTÁTICO)
 # ======================================================
-def load_font_base64(path):
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+FONT_URL = "app/static/fonts/Brighter-Regular.otf"   # servido via server.enableStaticServing
 
-brighter_base64 = load_font_base64("fonts/Brighter-Regular.otf")
+@st.cache_resource(show_spinner=False)
+def font_src():
+    # com static serving o navegador baixa a fonte uma vez e guarda em cache;
+    # sem ele, volta ao data URL embutido no CSS
+    if st.get_option("server.enableStaticServing"):
+        return f"url({FONT_URL}) format('opentype')"
+    return f"url(data:font/opentype;base64,{load_font_base64(FONT_PATH)}) format('opentype')"
 
 # ======================================================
 # CONFIGURAÇÕES
 # ======================================================
 APP_TITLE = "Indicadores de Desempenho da Segurança Operacional – IDSO"
-ACCENT = "#96CE00"  # cor institucional
 
 st.set_page_config(page_title="IDSO • Painel", layout="wide")
 
+# modo diagnóstico: ?debug=1 na URL ou IDSO_DEBUG=1 no ambiente
+DEBUG = st.query_params.get("debug") == "1" or os.environ.get("IDSO_DEBUG") == "1"
+
+# perfil por etapa: ?profile=1 na URL ou IDSO_PROFILE=1 (o modo diagnóstico também liga)
+PROFILE = DEBUG or st.query_params.get("profile") == "1" or os.environ.get("IDSO_PROFILE") == "1"
+PROFILE_HISTORY = int(os.environ.get("IDSO_PROFILE_HISTORY", "50"))   # reruns guardados na sessão
+
+# administração (descartar entradas de cache): ?admin=<IDSO_ADMIN_TOKEN>; sem token configurado, desligada
+ADMIN_TOKEN = os.environ.get("IDSO_ADMIN_TOKEN", "")
+ADMIN = bool(ADMIN_TOKEN) and st.query_params.get("admin") == ADMIN_TOKEN
+
+# conjunto publicado (idso_publish): com IDSO_PUBLISH_DIR, sessões novas abrem direto
+# no último arquivo publicado por um administrador, sem upload
+PUBLISH_DIR = os.environ.get("IDSO_PUBLISH_DIR", "")
+
+# base preparada em Arrow mapeado (idso_arrow): com IDSO_ARROW_DIR, os processos do
+# mesmo host compartilham a base (e os agregados) em vez de cada um ler a sua cópia
+ARROW_DIR = os.environ.get("IDSO_ARROW_DIR", "")
+
+# sincronização com a API de lista (idso_sync): com IDSO_SYNC_URL, a base pode vir da
+# lista e receber só os lançamentos criados depois da última marca (IDSO_SYNC_TOKEN, IDSO_SYNC_TIMEOUT)
+SYNC_URL = os.environ.get("IDSO_SYNC_URL", "")
+SYNC_TIMEOUT = float(os.environ.get("IDSO_SYNC_TIMEOUT", "30"))
+
+# payload compacto dos gráficos (IDSO_PLOTLY_COMPACT=0 desliga)
+PLOTLY_COMPACT = os.environ.get("IDSO_PLOTLY_COMPACT", "1") != "0"
+
 # ======================================================
-# CSS – LAYOUT “LIMPO” (SEM SOBRA DE SIDEBAR) + ESTILO BONITO
+# 📈 MÉTRICAS (Prometheus) — uma vez por processo
 # ======================================================
-st.markdown(
-    f"""
-    <style>
-
-    /* ======================================================
-       FONTE BRIGHTER (AJUSTE ÚNICO)
-       ====================================================== */
-    @font-face {{
-        font-family: 'Brighter';
-        src: url(data:font/opentype;base64,{brighter_base64}) format('opentype');
-        font-weight: normal;
-        font-style: normal;
-    }}
-
-    html, body, [class*="css"] {{
-        font-family: 'Brighter', Arial, sans-serif !important;
-    }}
-
-    /* ======================================================
-       AJUSTE DA FONTE DO FILE UPLOADER (REMOVE CURSIVA)
-       ====================================================== */
-    [data-testid="stFileUploader"] *,   
-    [data-testid="stFileUploader"] * {{
-        font-family: system-ui, -apple-system, BlinkMacSystemFont,
-                    "Segoe UI", Roboto, Helvetica, Arial, sans-serif !important;
-        font-style: normal !important;
-        font-weight: normal !important;
-    }}
-
-    /* Remove qualquer “sobra” da sidebar */
-    [data-testid="stSidebar"] {{
-        display: none !important;
-        width: 0 !important;
-        min-width: 0 !important;
-        max-width: 0 !important;
-    }}
-    section[data-testid="stSidebarContent"] {{
-        display: none !important;
-    }}
-
-    /* Remove header/footer do Streamlit */
-    header, footer {{ visibility: hidden; height: 0px; }}
-
-    /* Ajusta container principal */
-    div.block-container {{
-        padding-top: 1.0rem;
-        padding-left: 2.0rem;
-        padding-right: 2.0rem;
-        max-width: 1500px;
-    }}
-
-    /* Chips (multiselect) */
-    [data-baseweb="tag"] {{
-        background-color: {ACCENT} !important;
-        color: #ffffff !important;
-        border-radius: 999px !important;
-        font-weight: 900 !important;
-        border: 1px solid rgba(0,0,0,0.12) !important;
-    }}
-    [data-baseweb="tag"] svg {{ color: #ffffff !important; }}
-
-    /* Cards KPI */
-    .kpi-card {{
-        background-color:#f2f3f5;
-        padding:16px;
-        border-radius:16px;
-        text-align:center;
-        border: 1px solid rgba(0,0,0,0.07);
-        box-shadow: 0 6px 16px rgba(0,0,0,0.06);
-    }}
-    .kpi-title {{
-        font-size:16px;
-        font-weight:900;
-        margin-bottom:6px;
-        color:#1a2732;
-    }}
-    .kpi-value {{
-        font-size:34px;
-        font-weight:1000;
-        line-height:1.1;
-    }}
-    .kpi-sub {{
-        font-size:13px;
-        margin-top:6px;
-        font-weight:800;
-        color:#5b6b7b;
-    }}
-
-    /* Banner estatístico */
-    .stat-banner {{
-        background: linear-gradient(90deg, #233243 0%, #2c3e50 55%, #233243 100%);
-        color: white;
-        padding: 14px 18px;
-        border-radius: 16px;
-        border: 1px solid rgba(255,255,255,0.10);
-        margin-top: 8px;
-        margin-bottom: 14px;
-        box-shadow: 0 8px 18px rgba(0,0,0,0.12);
-    }}
-    .stat-title {{
-        text-align:center;
-        font-weight:1000;
-        letter-spacing: 0.5px;
-        margin-bottom: 10px;
-        font-size: 18px;
-    }}
-    .stat-line {{
-        text-align:center;
-        font-weight:900;
-        font-size: 16px;
-        line-height: 1.6;
-        white-space: pre-wrap;
-    }}
-    .up {{ color: {ACCENT}; font-weight: 1000; }}
-    .down {{ color: #ff5a5f; font-weight: 1000; }}
-    .flat {{ color: #d0d7de; font-weight: 1000; }}
-
-    /* Pendências com pisca */
-    @keyframes blinkRed {{
-        0%   {{ box-shadow: 0 0 0 rgba(255,0,0,0.0); background:#ffe9ea; }}
-        50%  {{ box-shadow: 0 0 18px rgba(255,0,0,0.35); background:#ffd6d9; }}
-        100% {{ box-shadow: 0 0 0 rgba(255,0,0,0.0); background:#ffe9ea; }}
-    }}
-    .pending-card {{
-        border-radius:16px;
-        border: 1px solid rgba(155,28,28,0.20);
-        padding: 12px 14px;
-        animation: blinkRed 1.2s infinite;
-        margin-bottom: 10px;
-        box-shadow: 0 8px 18px rgba(0,0,0,0.08);
-    }}
-
-    .pending-title {{
-    text-align: center;
-    font-weight: 1000;
-    font-size: 18px;
-    color: #ff5a5f;
-    margin-bottom: 6px;
-    }}
-
-    /* ======================================================
-       RANKING – TOP EVENTOS POR INDICADOR (MINI CARDS)
-       ====================================================== */
-    .rank-grid {{
-        display: grid;
-        grid-template-columns: repeat(auto-fill, minmax(140px, 1fr));
-        gap: 14px;
-        margin-top: 12px;
-        margin-bottom: 20px;
-    }}
-
-    .rank-card-mini {{
-        background: #f8f9fb;
-        border: 2px solid {ACCENT};
-        border-radius: 14px;
-        padding: 12px 10px;
-        text-align: center;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.06);
-    }}
-
-    .rank-pos {{
-        font-size: 11px;
-        font-weight: 900;
-        color: #6b7c93;
-    }}
-
-    .rank-aero {{
-        font-size: 17px;
-        font-weight: 1000;
-        margin-top: 4px;
-        color: #1a2732;
-        letter-spacing: 0.4px;
-    }}
-
-    .rank-value {{
-        font-size: 22px;
-        font-weight: 1000;
-        margin-top: 6px;
-        color: #1a2732;
-        line-height: 1.1;
-    }}
-
-    .rank-label {{
-        font-size: 11px;
-        font-weight: 900;
-        color: #6b7c93;
-    }}
-
-    /* ======================================================
-       🔥 INCLUSÕES — DESTAQUES DE RANKING
-       ====================================================== */
-
-    .rank-top-1 {{
-        background: linear-gradient(135deg, #fff4cc, #ffe08a);
-        border: 3px solid #d4af37 !important;
-        box-shadow: 0 6px 20px rgba(212,175,55,0.45);
-    }}
-
-    .rank-top-3 {{
-        border-width: 3px !important;
-    }}
-
-    .rank-ind-RI {{ border-color: #ff6b6b !important; }}
-    .rank-ind-FOD {{ border-color: #ff9f43 !important; }}
-    .rank-ind-COLISAO {{ border-color: #1dd1a1 !important; }}
-    .rank-ind-FAUNA {{ border-color: #54a0ff !important; }}
-    .rank-ind-OUTROS {{ border-color: #8395a7 !important; }}
-
-    /* ======================================================
-       🔰 TÍTULO PRINCIPAL DO APP (INCLUSÃO)
-       ====================================================== */
-    .app-title {{
-        text-align: center;
-        color: #96CE00;
-        font-size: 40px;
-        font-weight: 1000;
-        margin-bottom: 6px;
-    }}
-
-    .app-subtitle {{
-        text-align: center;
-        color: #96CE00;
-        font-size: 60px;
-        font-weight: 400;
-        letter-spacing: 0.6px;
-        margin-top: 0px;
-        margin-bottom: 24px;
-        font-family: "Brighter", "Brighter Regular", Arial, sans-serif;
-    }}
-
-    /* ======================================================
-   🔽 AJUSTE REAL DO TEXTO DOS EXPANDERS (FUNCIONA)
-   ====================================================== */
-    div[data-testid="stExpander"] div[data-testid="stMarkdownContainer"] p {{
-        font-size: 18px !important;   /* 🔥 AGORA FUNCIONA */
-        font-weight: 1000 !important;
-        color: #1a2732 !important;
-        margin: 0 !important;
-    }}
-
-    /* ======================================================
-    🎯 METAS — GRID ELEGANTE (IGUAL AO RANKING)
-    ====================================================== */
-
-    .metas-grid {{
-        display: grid;
-        grid-template-columns: repeat(auto-fill, minmax(260px, 1fr));
-        gap: 18px;
-        margin-top: 14px;
-        margin-bottom: 28px;
-    }}
-
-    .meta-card {{
-        background: #f8f9fb;
-        border-radius: 18px;
-        padding: 18px 16px;
-        border: 2px solid rgba(0,0,0,0.06);
-        box-shadow: 0 6px 16px rgba(0,0,0,0.06);
-        text-align: center;
-        position: relative;
-    }}
-
-    .meta-title {{
-        font-size: 16px;
-        font-weight: 1000;
-        color: #1a2732;
-        margin-bottom: 6px;
-    }}
-
-    .meta-aero {{
-        font-size: 12px;
-        font-weight: 900;
-        color: #6b7c93;
-        letter-spacing: 0.3px;
-        margin-bottom: 10px;
-    }}
-
-    .meta-value {{
-        font-size: 40px;
-        font-weight: 1000;
-        line-height: 1.1;
-        margin-bottom: 6px;
-    }}
-
-    .meta-sub {{
-        font-size: 13px;
-        font-weight: 900;
-        color: #5b6b7b;
-    }}
-
-    /* Selo de status */
-    .meta-badge {{
-        position: absolute;
-        top: 12px;
-        right: 14px;
-        font-size: 11px;
-        font-weight: 1000;
-        padding: 4px 10px;
-        border-radius: 999px;
-    }}
-
-    .meta-ok {{
-        background: #e8f6d8;
-        color: #5ca000;
-    }}
-
-    .meta-warn {{
-        background: #fff3cd;
-        color: #b78103;
-    }}
-
-    .meta-bad {{
-        background: #ffe2e5;
-        color: #c62828;
-    }}
-
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+# IDSO_METRICS_PORT: endpoint local /metrics (IDSO_METRICS_HOST, padrão 127.0.0.1)
+# IDSO_METRICS_FILE: arquivo reescrito a cada IDSO_METRICS_INTERVAL s (padrão 15)
+# (as saídas sobem com a primeira sessão do processo e ficam até ele terminar)
+
+# ⚠️ sessões ativas vêm de API interna do Streamlit (Runtime._session_mgr,
+# list_active_sessions), sem garantia entre versões — testada com streamlit 1.66.
+# Se sumir/mudar numa atualização, métrica e diagnóstico ficam "indisponíveis".
+STREAMLIT_SESSOES_TESTADO = "1.66"
+
+def active_sessions():
+    """SessionInfo das sessões ativas; [] fora do servidor; None se a API interna não existe nesta versão."""
+    try:
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return []
+        return list(Runtime.instance()._session_mgr.list_active_sessions())
+    except (ImportError, AttributeError):
+        return None
+
+def session_samples() -> list:
+    sessoes = active_sessions()
+    return [(
+        "idso_active_sessions", "gauge", "Sessões ativas no servidor (NaN: indisponível nesta versão do Streamlit).",
+        {}, float("nan") if sessoes is None else len(sessoes),
+    )]
+
+@st.cache_resource(show_spinner=False)
+def metrics_exporters() -> dict:
+    METRICS.add_collector(session_samples)
+    saidas = {}
+    porta = os.environ.get("IDSO_METRICS_PORT")
+    if porta:
+        try:
+            saidas["http"] = start_http_server(int(porta), os.environ.get("IDSO_METRICS_HOST", "127.0.0.1"))
+        except OSError as e:
+            # porta ocupada (outro processo do painel): segue sem o endpoint
+            saidas["http_erro"] = str(e)
+    caminho = os.environ.get("IDSO_METRICS_FILE")
+    if caminho:
+        saidas["arquivo"] = start_file_writer(caminho, float(os.environ.get("IDSO_METRICS_INTERVAL", "15")))
+    return saidas
+
+metrics_exporters()
 
 # ======================================================
-# MAPAS / CONSTANTES
+# CSS – LAYOUT “LIMPO” (SEM SOBRA DE SIDEBAR) + ESTILO BONITO
 # ======================================================
-RENAME = {
-    "AEROPORTO": "aeroporto",
-    "ANO": "ano",
-    "MÊS": "mes",
-    "Nº DE EVENTOS": "eventos",
-    "MOVIMENTAÇÃO (P + D)": "mov",
-    "OrdemMes": "ordem_mes",
-    "OrdemAno": "ordem_ano",
-    "Indicador": "indicador",
-    "Criado": "criado_em",
-    "Criado por": "criado_por",
-}
-
-MESES_MAP = {
-    "JANEIRO": 1, "FEVEREIRO": 2, "MARÇO": 3, "MARCO": 3, "ABRIL": 4, "MAIO": 5, "JUNHO": 6,
-    "JULHO": 7, "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12
-}
-MESES_ABREV = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
-ORDEM_MESES_ABREV = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
+@st.cache_resource(show_spinner=False)
+def global_css(font_src: str) -> str:
+    # montado e minificado uma vez por processo (não a cada rerun)
+    return build_css(font_src)
+
+st.markdown(f"<style>{global_css(font_src())}</style>", unsafe_allow_html=True)
 
 # ======================================================
-# FUNÇÕES UTILITÁRIAS
+# LEITURA + CACHES
 # ======================================================
-def fmt_int(x):
-    try:
-        return f"{int(x):,}".replace(",", ".")
-    except Exception:
-        return "0"
+# caches limitados por estágio (idso_cache): LRU por entradas/MB, TTL e
+# contadores; compartilhados entre sessões, chave sempre começa pelo sha
+# ⚠️ valores somente leitura — quem precisa alterar trabalha sobre uma cópia
+def ingest_workbook(file_bytes: bytes) -> pd.DataFrame:
+    with timed("idso_ingest_seconds"):
+        raw = read_workbook(file_bytes)[0]
+    METRICS.observe("idso_ingest_rows", len(raw))
+    return raw
 
-def fmt_pct(x, digits=0):
-    try:
-        return f"{x*100:+.{digits}f}%"
-    except Exception:
-        return "—"
-
-def card_html(titulo, valor, cor_valor="#333", subtitulo=None, icon=None):
-    ic = f"{icon} " if icon else ""
-    sub = f'<div class="kpi-sub">{subtitulo}</div>' if subtitulo else ""
-    return f"""
-    <div class="kpi-card">
-        <div class="kpi-title">{ic}{titulo}</div>
-        <div class="kpi-value" style="color:{cor_valor};">{valor}</div>
-        {sub}
-    </div>
-    """
-
-def df_to_excel_bytes(sheets: dict) -> bytes:
-    out = BytesIO()
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        for name, df_ in sheets.items():
-            df_.to_excel(writer, index=False, sheet_name=str(name)[:31])
-    return out.getvalue()
-
-def make_zip(files):
-    bio = BytesIO()
-    with ZipFile(bio, "w", compression=ZIP_DEFLATED) as zf:
-        for name, content in files:
-            zf.writestr(name, content)
-    return bio.getvalue()
-
-@st.cache_data(show_spinner=False)
 def read_excel_and_hash(file_bytes: bytes):
     sha = hashlib.sha256(file_bytes).hexdigest()
-    df = pd.read_excel(BytesIO(file_bytes))
-    return df, sha
-
-def prepare_idso(df_raw: pd.DataFrame) -> pd.DataFrame:
-    df = df_raw.rename(columns=RENAME).copy()
+    return get_cache("ingest").get_or_compute(sha, lambda: ingest_workbook(file_bytes)), sha
 
-    for c in ["aeroporto", "indicador", "mes", "ano", "eventos", "mov"]:
-        if c not in df.columns:
-            df[c] = pd.NA
+def prepare_timed(raw: pd.DataFrame) -> pd.DataFrame:
+    with timed("idso_prepare_seconds"):
+        return prepare_idso(raw)
 
-    df["aeroporto"] = df["aeroporto"].astype(str).str.strip().str.upper()
-    df["indicador"] = df["indicador"].astype(str).str.strip()
-    df["mes"] = df["mes"].astype(str).str.strip()
+def published_frame(sha: str) -> pd.DataFrame:
+    # base e agregados vêm do disco; os agregados entram na pré-computação como já prontos
+    df, passos = load_published(PUBLISH_DIR, sha)
+    warm_store().seed(sha, passos)
+    return df
 
-    df["ano"] = pd.to_numeric(df["ano"], errors="coerce").astype("Int64")
-    df["eventos"] = pd.to_numeric(df["eventos"], errors="coerce").fillna(0).astype(int)
-    df["mov"] = pd.to_numeric(df["mov"], errors="coerce").fillna(0).astype(int)
+@st.cache_resource(show_spinner=False)
+def arrow_store():
+    if not ARROW_DIR:
+        return None
+    return ArrowStore(ARROW_DIR, max_files=int(os.environ.get("IDSO_ARROW_MAX_FILES", "8")))
+
+def shared_frame(sha: str, file_bytes: bytes) -> pd.DataFrame:
+    # outro processo já preparou este arquivo: mapeia o Arrow (sem ler o XLSX);
+    # senão prepara, grava e passa a usar a versão mapeada (a cópia privada é solta)
+    loja = arrow_store()
+    aberto = loja.open(sha)
+    if aberto is None:
+        df = prepare_timed(read_excel_and_hash(file_bytes)[0])
+        try:
+            loja.write(sha, df)
+            aberto = loja.open(sha)
+        except OSError:
+            return df               # pasta sem espaço/permissão: segue com a cópia deste processo
+    df, agregados = aberto
+    # agregados gravados por outro processo entram na pré-computação como prontos
+    warm_store().start(sha, df, date.today(), prontos=agregados)
+    return df
 
-    df["ordem_mes"] = pd.to_numeric(df.get("ordem_mes", pd.NA), errors="coerce").astype("Int64")
-    mes_upper = df["mes"].astype(str).str.upper().str.strip()
-    mes_from_name = mes_upper.map(MESES_MAP).astype("Int64")
-    invalid = (df["ordem_mes"].isna()) | (~df["ordem_mes"].between(1, 12))
-    df.loc[invalid, "ordem_mes"] = mes_from_name[invalid]
+def save_aggregates(loja: ArrowStore, sha: str, passos: dict):
+    # fim da pré-computação (thread do pool): grava os agregados da visão padrão, uma vez por sha
+    if sha in loja and not loja.has_aggregates(sha):
+        loja.write_aggregates(sha, passos)
 
-    df = df[df["ordem_mes"].between(1, 12, inclusive="both")].copy()
-    df["mes_abrev"] = df["ordem_mes"].map(MESES_ABREV)
+# base preparada: uma por arquivo (sha); a planilha só é lida se ela não estiver em cache
+# (file_bytes None = conjunto publicado)
+def prepared_frame(sha: str, file_bytes: bytes) -> pd.DataFrame:
+    if file_bytes is None:
+        return get_cache("preparado").get_or_compute(sha, lambda: published_frame(sha))
+    if ARROW_DIR:
+        return get_cache("preparado").get_or_compute(sha, lambda: shared_frame(sha, file_bytes))
+    return get_cache("preparado").get_or_compute(sha, lambda: prepare_timed(read_excel_and_hash(file_bytes)[0]))
 
-    if "criado_em" in df.columns:
-        df["criado_em"] = pd.to_datetime(df["criado_em"], errors="coerce")
+# ======================================================
+# 🔗 SINCRONIZAÇÃO COM A LISTA (IDSO_SYNC_URL)
+# ======================================================
+# a base sincronizada só existe no cache "preparado" (sha derivado da base de
+# origem + itens novos); st.session_state.dataset_sync aponta para ela e para
+# a base de origem — trocar a origem ou perder a entrada volta à origem
+@st.cache_resource(show_spinner=False)
+def sync_session():
+    # uma Session (pool keep-alive) por processo, compartilhada entre sessões
+    from idso_sync import make_session
+    return make_session(token=os.environ.get("IDSO_SYNC_TOKEN") or None)
+
+def sync_from_list(origem, nome, df=None, sha_base=None, completo=False):
+    """Busca na lista e passa a sessão para a base resultante (rerun); avisa quando não há nada novo."""
+    import requests
+    from idso_sync import sync_dataset
+
+    tipo = "completa" if completo or df is None else "incremental"
+    try:
+        with st.spinner("🔗 Consultando a lista…"), timed("idso_sync_seconds", tipo=tipo):
+            r = sync_dataset(sync_session(), SYNC_URL, df=df, sha_base=sha_base,
+                             completo=completo, timeout=SYNC_TIMEOUT)
+    except (requests.RequestException, ValueError, KeyError) as e:
+        st.error(f"❌ Falha ao consultar a lista: {e}")
+        return
+    METRICS.inc("idso_sync_items_total", r["itens"], tipo=tipo)
+    if r["df"] is None:
+        st.info(f"ℹ️ Nenhum lançamento novo na lista ({r['itens']} item(ns) na fronteira, {r['segundos']} s).")
+        return
 
-    df["chave"] = (
-        df["aeroporto"].astype(str) + "|" +
-        df["ano"].astype(str) + "|" +
-        df["ordem_mes"].astype(str) + "|" +
-        df["indicador"].astype(str)
-    )
-    return df
+    get_cache("preparado").put(r["sha"], r["df"])
+    st.session_state.dataset_sync = {
+        "sha": r["sha"], "nome": nome, "origem": origem,
+        "resumo": f"{fmt_int(r['novas'])} lançamento(s) novo(s) • {r['paginas']} página(s) • {r['segundos']} s",
+    }
+    # lançamentos a mais não invalidam os filtros: não conta como troca de arquivo
+    st.session_state.file_sha = r["sha"]
+    st.rerun()
 
-def apply_filters(df: pd.DataFrame, sel_aero, sel_ano, sel_ind, sel_mes_abrev):
-    d = df.copy()
-    if sel_aero: d = d[d["aeroporto"].isin(sel_aero)]
-    if sel_ano: d = d[d["ano"].isin(sel_ano)]
-    if sel_ind: d = d[d["indicador"].isin(sel_ind)]
-    if sel_mes_abrev: d = d[d["mes_abrev"].isin(sel_mes_abrev)]
-    return d
-
-def prev_month(today: date):
-    if today.month == 1:
-        return today.year - 1, 12
-    return today.year, today.month - 1
-
-def due_date_for_period(today: date):
-    return date(today.year, today.month, 10)
-
-def period_to_int(y: int, m: int) -> int:
-    return y * 100 + m
-
-def int_to_period(p: int):
-    return p // 100, p % 100
-
-def add_months(y: int, m: int, delta: int):
-    for _ in range(delta):
-        m += 1
-        if m == 13:
-            m = 1
-            y += 1
-    return y, m
-
-def calc_pending_by_airport(df_all: pd.DataFrame, today: date):
-    req_y, req_m = prev_month(today)
-    required = period_to_int(req_y, req_m)
-    due = due_date_for_period(today)
-
-    rows = []
-    base = df_all.dropna(subset=["ano", "ordem_mes"]).copy()
-    if base.empty:
-        return pd.DataFrame(columns=[
-            "aeroporto","required_period","required_ano","required_mes","required_mes_abrev",
-            "due_date","days_from_due","is_overdue","is_ok","missing_months","last_period"
-        ]), required, due
-
-    for aero, g in base.groupby("aeroporto"):
-        g = g.copy()
-        g["period"] = g["ano"].astype(int) * 100 + g["ordem_mes"].astype(int)
-        last_period = int(g["period"].max())
-        ok = last_period >= required
-
-        missing_months = 0
-        if not ok:
-            ly, lm = int_to_period(last_period)
-            diff = 0
-            cy, cm = ly, lm
-            while period_to_int(cy, cm) < required and diff < 60:
-                cy, cm = add_months(cy, cm, 1)
-                diff += 1
-            missing_months = diff
-
-        days = (today - due).days
-        rows.append({
-            "aeroporto": aero,
-            "required_period": required,
-            "required_ano": req_y,
-            "required_mes": req_m,
-            "required_mes_abrev": MESES_ABREV.get(req_m, str(req_m)),
-            "due_date": due.isoformat(),
-            "days_from_due": int(days),
-            "is_overdue": bool(today > due),
-            "is_ok": bool(ok),
-            "missing_months": int(missing_months),
-            "last_period": int(last_period),
-        })
-    return pd.DataFrame(rows), required, due
+def pending_for(sha: str, today: date, df: pd.DataFrame):
+    return get_cache("pendencias").get_or_compute((sha, today), lambda: calc_pending_by_airport(df, today))
 
-def stat_banner_mov_years(df_f: pd.DataFrame):
-    if df_f.empty:
-        return ""
+# ======================================================
+# PLOTLY – ENVIO AO NAVEGADOR
+# ======================================================
+PLOTLY_PAYLOAD = {}
 
-    # 🔹 remove duplicidade de movimentação por indicador
-    base = (
-        df_f
-        .drop_duplicates(subset=["aeroporto", "ano", "ordem_mes"])
-        .copy()
-    )
+# blocos exibidos neste rerun, na ordem da tela — base do snapshot HTML
+SNAPSHOT = []
 
-    byy = (
-        base
-        .groupby("ano", as_index=False)["mov"]
-        .sum()
-        .sort_values("ano", ascending=False)
-    )
+def snap(html: str) -> str:
+    SNAPSHOT.append(("html", html))
+    return html
 
-    byy["prev"] = byy["mov"].shift(-1)
+def show_chart(fig, decimals=None, **kwargs):
+    if PLOTLY_COMPACT:
+        fig = compact_figure(fig, decimals=decimals)
+    SNAPSHOT.append(("fig", fig))
+    if DEBUG:
+        nome = kwargs.get("key") or f"fig_{len(PLOTLY_PAYLOAD) + 1}"
+        PLOTLY_PAYLOAD[nome] = figure_payload_bytes(fig)
+    st.plotly_chart(fig, **kwargs)
 
-    parts = []
-    for _, r in byy.iterrows():
-        ano = int(r["ano"])
-        mov = int(r["mov"])
+# ======================================================
+# 📦 FILA DE EXPORTAÇÕES (compartilhada entre sessões)
+# ======================================================
+# IDSO_EXPORT_WORKERS: exportações simultâneas • IDSO_EXPORT_QUEUE: pedidos aguardando
+@st.cache_resource(show_spinner=False)
+def export_queue():
+    fila = ExportQueue(
+        max_workers=int(os.environ.get("IDSO_EXPORT_WORKERS", "2")),
+        max_queued=int(os.environ.get("IDSO_EXPORT_QUEUE", "8")),
+        results=get_cache("exportacoes"),
+        on_done=lambda job: METRICS.observe("idso_export_seconds", job.seconds, status=job.status),
+    )
+    METRICS.add_collector(lambda: [
+        ("idso_export_jobs", "gauge", "Exportações na fila/rodando.", {"status": status}, n)
+        for status, n in fila.stats().items() if status in ("fila", "rodando")
+    ])
+    return fila
 
-        if pd.notna(r["prev"]) and int(r["prev"]) != 0:
-            pct = (mov / int(r["prev"])) - 1
-            if pct > 0:
-                arrow = f'<span class="up">(+{abs(pct)*100:.0f}% ↑)</span>'
-            elif pct < 0:
-                arrow = f'<span class="down">(-{abs(pct)*100:.0f}% ↓)</span>'
-            else:
-                arrow = f'<span class="flat">(0% •)</span>'
-        else:
-            arrow = ""
+def run_export(df_f, monthly, pend_df, meta, xlsx=None, pend_xlsx=None, formatos=(), pdf=False, progress=None):
+    """
+    Gera (xlsx, zip, stats) da aba Exportações — roda num worker da fila.
+    xlsx/pend_xlsx reaproveitam a pré-computação.
+    formatos: ("parquet", "csv.gz") adicionais dentro do ZIP.
+    pdf: um relatório PDF por aeroporto do recorte (metas do maior ano filtrado).
+    """
+    inicio = 0.0
+    extras = []
+    if pdf and not df_f.empty:
+        from idso_pdf import generate_reports
+        progress(0.0, "PDFs por aeroporto")
+        aeros = sorted(df_f["aeroporto"].dropna().unique().tolist())
+        ano_meta = int(df_f["ano"].dropna().astype(int).max())
+        # um processo por aeroporto, até IDSO_PDF_WORKERS (padrão: núcleos)
+        workers = min(int(os.environ.get("IDSO_PDF_WORKERS", "0")) or os.cpu_count() or 1, len(aeros))
+        pdfs = generate_reports(df_f, aeros, ano_meta, pend_df, meta, workers=workers)
+        extras = [(f"pdf/IDSO_Relatorio_{aero}.pdf", conteudo) for aero, conteudo in pdfs.items()]
+        inicio = 0.3
+
+    return build_package(
+        export_sheets(df_f, monthly),
+        {"PENDENCIAS": pend_export_frame(pend_df)},
+        meta,
+        formatos=formatos,
+        xlsx=xlsx,
+        pend_xlsx=pend_xlsx,
+        extras=extras,
+        progress=lambda frac, etapa: progress(inicio + (1 - inicio) * frac, etapa),
+    )
 
-        parts.append(f"{ano}: {fmt_int(mov)} {arrow}")
+# ======================================================
+# 🔥 PRÉ-COMPUTAÇÃO DA VISÃO PADRÃO (LOGO APÓS O UPLOAD)
+# ======================================================
+@st.cache_resource(show_spinner=False)
+def warm_store():
+    loja = arrow_store()
+    return WarmStore(on_finished=(lambda sha, passos: save_aggregates(loja, sha, passos)) if loja else None)
 
-    line = " | ".join(parts)
+def release_warm(sha_antigo):
+    # a pré-computação é compartilhada: a do conjunto publicado serve a todas as sessões
+    if sha_antigo and sha_antigo != (PUBLICADO or {}).get("sha"):
+        warm_store().cancel(sha_antigo)
 
-    return f"""
-    <div class="stat-banner">
-        <div class="stat-title">COMPARATIVO ESTATÍSTICO – MOVIMENTAÇÕES</div>
-        <div class="stat-line">{line}</div>
-    </div>
-    """
+# ======================================================
+# ⏱️ TEMPOS POR ETAPA
+# ======================================================
+# cada marca fecha a etapa anterior: (nome, início, duração) em segundos
+# relativos ao começo do rerun
+RERUN_T0 = time.perf_counter()
+STAGES = []
 
-def stat_banner_years(df_f: pd.DataFrame):
-    if df_f.empty:
-        return ""
-    byy = df_f.groupby("ano", as_index=False)["eventos"].sum().sort_values("ano", ascending=False)
-    byy["prev"] = byy["eventos"].shift(-1)
-    parts = []
-    for _, r in byy.iterrows():
-        ano = int(r["ano"]); ev = int(r["eventos"])
-        if pd.notna(r["prev"]) and int(r["prev"]) != 0:
-            pct = (ev / int(r["prev"])) - 1
-            if pct > 0:
-                arrow = f'<span class="up">(+{abs(pct)*100:.0f}% ↑)</span>'
-            elif pct < 0:
-                arrow = f'<span class="down">(-{abs(pct)*100:.0f}% ↓)</span>'
-            else:
-                arrow = f'<span class="flat">(0% •)</span>'
-        else:
-            arrow = ""
-        parts.append(f"{ano}: {fmt_int(ev)} {arrow}")
-    line = " | ".join(parts)
-    return f"""
-    <div class="stat-banner">
-        <div class="stat-title">COMPARATIVO ESTATÍSTICO – EVENTOS IDSO</div>
-        <div class="stat-line">{line}</div>
-    </div>
-    """
+def mark_stage(nome):
+    agora = time.perf_counter() - RERUN_T0
+    inicio = STAGES[-1][1] + STAGES[-1][2] if STAGES else 0.0
+    STAGES.append((nome, inicio, agora - inicio))
 
 # ======================================================
 # TÍTULO + UPLOAD
@@ -626,25 +370,51 @@ uploaded = st.file_uploader(
 
 st.markdown("</div>", unsafe_allow_html=True)
 
+PUBLICADO = published_meta(PUBLISH_DIR)
+# o job do conjunto publicado serve às sessões novas: não sai por max_files
+warm_store().pin((PUBLICADO or {}).get("sha"))
+if PUBLICADO and uploaded is None:
+    st.caption(
+        f"📌 Conjunto publicado: **{PUBLICADO['nome']}** "
+        f"({datetime.fromisoformat(PUBLICADO['publicado_em']):%d/%m/%Y %H:%M}). "
+        "Envie outro arquivo para analisá-lo somente nesta sessão."
+    )
+
 def load_data():
 
-    # 🔥 CASO 1 — ARQUIVO REMOVIDO (clicou no ❌)
-    if uploaded is None:
+    if uploaded is not None:
+        # 🔥 CASO 2 — ARQUIVO PRESENTE
+        b = uploaded.getvalue() if hasattr(uploaded, "getvalue") else uploaded.read()
+        sha, nome = hashlib.sha256(b).hexdigest(), uploaded.name
+    elif PUBLICADO is not None:
+        # 🔥 CASO 3 — SEM ARQUIVO, COM CONJUNTO PUBLICADO: abre direto nele
+        b, sha, nome = None, PUBLICADO["sha"], PUBLICADO["nome"]
+    else:
+        b, sha, nome = None, None, None
+
+    # 🔥 CASO 4 — BASE SINCRONIZADA COM A LISTA (sobre a base de origem, ou só da lista)
+    sync = st.session_state.get("dataset_sync")
+    if sync and sync["origem"] == sha and sync["sha"] in get_cache("preparado"):
+        b, sha, nome = None, sync["sha"], sync["nome"]
+    elif sync:
+        st.session_state.pop("dataset_sync")
+
+    # 🔥 CASO 1 — ARQUIVO REMOVIDO (clicou no ❌) E NADA PUBLICADO
+    if sha is None:
 
         # limpa tudo
         for k in ["ano_sel", "mes_sel", "aero_sel", "ind_sel"]:
             st.session_state[k] = ["Todos"]
 
-        # remove hash anterior
+        # remove hash anterior (e cancela a pré-computação dele)
         st.session_state.pop("file_sha", None)
+        release_warm(st.session_state.pop("warm_sha", None))
 
         st.warning("⬆️ Envie o arquivo IDSO (.xlsx) para iniciar.")
+        if SYNC_URL and st.button("🔗 Carregar da lista (API)", key="btn_sync_lista"):
+            sync_from_list(None, "Lista (API)")
         st.stop()
 
-    # 🔥 CASO 2 — ARQUIVO PRESENTE
-    b = uploaded.getvalue() if hasattr(uploaded, "getvalue") else uploaded.read()
-    raw, sha = read_excel_and_hash(b)
-
     # primeiro carregamento
     if "file_sha" not in st.session_state:
         st.session_state.file_sha = sha
@@ -662,51 +432,91 @@ def load_data():
 
         st.rerun()
 
-    return raw, sha, uploaded.name
+    return b, sha, nome
 
     st.warning("⬆️ Envie o arquivo IDSO (.xlsx) para iniciar.")
     st.stop()
 
-raw_df, sha, source_name = load_data()
-df = prepare_idso(raw_df)
+file_bytes, sha, source_name = load_data()
+SYNC = st.session_state.get("dataset_sync")
+mark_stage("ingest")
+
+with st.spinner("🧮 Preparando dados…"):
+    try:
+        df = get_cache("preparado").get(sha) if SYNC else prepared_frame(sha, file_bytes)
+    except PublishedUnavailable:
+        st.error("❌ O conjunto publicado não pôde ser lido. Envie o arquivo IDSO (.xlsx).")
+        st.stop()
+if df is None:
+    # base sincronizada saiu do cache entre a checagem e a leitura: volta à origem
+    st.session_state.pop("dataset_sync", None)
+    st.rerun()
+mark_stage("prepare")
+
+# entradas vencidas saem a cada rerun (além do LRU na gravação)
+for cache in all_caches():
+    cache.expire()
 
 today = date.today()
-pend_df, required_period, due = calc_pending_by_airport(df, today)
+
+# 🔥 novo arquivo nesta sessão → aquece a visão padrão em segundo plano
+warm = warm_store()
+if st.session_state.get("warm_sha") != sha:
+    if "warm_sha" in st.session_state:
+        release_warm(st.session_state.warm_sha)
+    warm.start(sha, df, today)
+    st.session_state.warm_sha = sha
 
 title_placeholder.markdown(
     f"""
     <h1 class='app-title'>{APP_TITLE}</h1>
     <div class='app-subtitle'>Safety Corporativa</div>
     <div class='app-sub'>
-        Fonte: <b>{source_name}</b> • Hash:
+        Fonte: <b>{source_name}</b>{"" if file_bytes is not None or SYNC else " (publicado)"} • Hash:
         <code style='color:{ACCENT}; font-weight:1000;'>{sha[:12]}</code>
     </div>
     """,
     unsafe_allow_html=True
 )
 
+# 📌 publicação (somente administração, com IDSO_PUBLISH_DIR)
+if ADMIN and PUBLISH_DIR:
+    c_pub, c_despub = st.columns(2)
+    with c_pub:
+        if (file_bytes is not None or SYNC) and (PUBLICADO or {}).get("sha") != sha:
+            if st.button("📌 Publicar este arquivo para todas as sessões", key="btn_publicar"):
+                with st.spinner("📌 Publicando (base preparada + agregados)…"):
+                    pub = publish(PUBLISH_DIR, file_bytes, source_name, df=df, today=today, sha=sha)
+                st.success(f"✅ Publicado {pub['nome']} • {fmt_int(pub['linhas'])} linhas • {pub['segundos']} s")
+    with c_despub:
+        if PUBLICADO and st.button("🚫 Despublicar", key="btn_despublicar"):
+            unpublish(PUBLISH_DIR)
+            st.rerun()
+
+# 🔗 lançamentos novos da lista (com IDSO_SYNC_URL; base sem "Criado" não tem marca d'água)
+MARCA = None
+if SYNC_URL:
+    from idso_sync import watermark     # requests só é importado com a sincronização ligada
+    MARCA = watermark(df)
+if MARCA is not None:
+    c_sync, c_recarga = st.columns(2)
+    with c_sync:
+        if st.button(f"🔄 Buscar lançamentos novos (desde {MARCA:%d/%m/%Y %H:%M})", key="btn_sync_novos"):
+            sync_from_list(SYNC["origem"] if SYNC else sha,
+                           source_name if SYNC else f"{source_name} + lista", df=df, sha_base=sha)
+    with c_recarga:
+        # só itens criados depois da marca entram; edição/exclusão de antigos pede recarga
+        if st.button("♻️ Recarregar tudo da lista", key="btn_sync_completo"):
+            sync_from_list(SYNC["origem"] if SYNC else sha, "Lista (API)", completo=True)
+    if SYNC and SYNC.get("resumo"):
+        st.caption(f"🔗 Última sincronização: {SYNC['resumo']}")
+
 # ======================================================
 # FILTROS DE ANÁLISE – CONTROLE TOTAL (POWER BI STYLE)
 # ======================================================
 
 # ---------- opções base ----------
-aero_base = sorted(df["aeroporto"].dropna().unique().tolist())
-
-ano_base = sorted(
-    [int(x) for x in df["ano"].dropna().unique().tolist()],
-    reverse=True
-)
-
-ind_base = sorted(df["indicador"].dropna().unique().tolist())
-
-mes_exist = (
-    df[["ordem_mes", "mes_abrev"]]
-    .dropna()
-    .drop_duplicates()
-    .sort_values("ordem_mes")
-)
-
-mes_base = [m for m in ORDEM_MESES_ABREV if m in mes_exist["mes_abrev"].tolist()]
+aero_base, ano_base, ind_base, mes_base = filter_options(df)
 
 # ---------- opções com "Todos" ----------
 aero_opts = ["Todos"] + aero_base
@@ -853,41 +663,55 @@ sel_mes  = mes_base  if st.session_state.mes_sel  == ["Todos"] else st.session_s
 sel_aero = aero_base if st.session_state.aero_sel == ["Todos"] else st.session_state.aero_sel
 sel_ind  = ind_base  if st.session_state.ind_sel  == ["Todos"] else st.session_state.ind_sel
 
-df_f = apply_filters(
-    df,
-    sel_aero,
-    sel_ano,
-    sel_ind,
-    sel_mes
+# visão padrão ("Todos" em tudo) → usa o que a pré-computação já deixou pronto
+default_view = all(
+    st.session_state[k] == ["Todos"] for k in ["ano_sel", "mes_sel", "aero_sel", "ind_sel"]
 )
 
+def warmed(nome, assinatura=None, timeout=0.0):
+    if not default_view:
+        return None
+    return warm.get(sha, nome, assinatura, timeout)
+
+if default_view:
+    # sem cópia: o recorte "Todos" reaproveita a base preparada (somente leitura)
+    df_f = default_view_frame(df, mes_base)
+else:
+    df_f = apply_filters(
+        df,
+        sel_aero,
+        sel_ano,
+        sel_ind,
+        sel_mes
+    )
+mark_stage("filtros")
+
 # ======================================================
 # KPIs + BASE MENSAL
 # ======================================================
-total_rows = len(df_f)
-total_eventos = int(df_f["eventos"].sum()) if total_rows else 0
-
-mov_month = df_f.groupby(["aeroporto","ano","ordem_mes"], as_index=False)["mov"].max() if total_rows else pd.DataFrame(columns=["mov"])
-total_mov = int(mov_month["mov"].sum()) if len(mov_month) else 0
-
-indicadores_ativos = int(df_f["indicador"].nunique()) if total_rows else 0
-aero_ativos = int(df_f["aeroporto"].nunique()) if total_rows else 0
-
-monthly = (
-    df_f.groupby(["aeroporto","ano","ordem_mes","mes_abrev"], as_index=False)
-    .agg(eventos=("eventos","sum"), mov=("mov","max"))
-    .sort_values(["aeroporto","ordem_mes","ano"])
-) if total_rows else pd.DataFrame(columns=["aeroporto","ano","ordem_mes","mes_abrev","eventos","mov"])
-
-c1, c2, c3, c4 = st.columns(4)
-with c1: st.markdown(card_html("Aeroportos", fmt_int(aero_ativos), icon="🛫"), unsafe_allow_html=True)
-with c2: st.markdown(card_html("Indicadores", fmt_int(indicadores_ativos), icon="📌"), unsafe_allow_html=True)
-with c3: st.markdown(card_html("Eventos", fmt_int(total_eventos), icon="🚩"), unsafe_allow_html=True)
-with c4:
-    st.markdown(card_html("Movimentações", fmt_int(total_mov), icon="🧮", cor_valor=ACCENT, subtitulo="(soma mensal por aeroporto)"), unsafe_allow_html=True)
-
-st.markdown(stat_banner_mov_years(df_f), unsafe_allow_html=True)
-st.markdown(stat_banner_years(df_f), unsafe_allow_html=True)
+kpis = kpi_values(df_f)
+total_eventos = kpis["eventos"]
+total_mov = kpis["mov"]
+indicadores_ativos = kpis["indicadores"]
+aero_ativos = kpis["aeroportos"]
+
+monthly = warmed("monthly")
+if monthly is None:
+    monthly = agg_monthly(df_f)
+
+cards_kpi = [
+    card_html("Aeroportos", fmt_int(aero_ativos), icon="🛫"),
+    card_html("Indicadores", fmt_int(indicadores_ativos), icon="📌"),
+    card_html("Eventos", fmt_int(total_eventos), icon="🚩"),
+    card_html("Movimentações", fmt_int(total_mov), icon="🧮", cor_valor=ACCENT, subtitulo="(soma mensal por aeroporto)"),
+]
+for col, card in zip(st.columns(4), cards_kpi):
+    with col: st.markdown(card, unsafe_allow_html=True)
+snap('<div class="snap-cards">' + "".join(cards_kpi) + "</div>")
+
+st.markdown(snap(stat_banner_mov_years(df_f)), unsafe_allow_html=True)
+st.markdown(snap(stat_banner_years(df_f)), unsafe_allow_html=True)
+mark_stage("kpis")
 
 # ======================================================
 # TABS
@@ -902,8 +726,9 @@ with tab1:
     st.markdown("### ⏱️ Pendências de lançamento do IDSO (prazo: dia 10)")
     st.caption("Período exigido = mês anterior ao mês atual. Prazo = dia 10 do mês atual.")
 
-    pend_view = pend_df[pend_df["aeroporto"].isin(sel_aero)].copy() if not pend_df.empty else pend_df.copy()
-    pend_only = pend_view[pend_view["is_ok"] == False].sort_values(["missing_months","aeroporto"], ascending=[False, True]) if not pend_view.empty else pend_view
+    pend_df, required_period, due = pending_for(sha, today, df)
+
+    pend_only = pending_only(pend_df, sel_aero)
 
     a, b, c = st.columns(3)
     req_month = int(str(required_period)[-2:])
@@ -931,32 +756,12 @@ with tab1:
         cols = st.columns(3)
         i = 0
         for _, r in pend_only.iterrows():
-            aero = r["aeroporto"]
-            req_txt = f"{r['required_mes_abrev']}/{r['required_ano']}"
-            missing = int(r["missing_months"]) if int(r["missing_months"]) else 1
-
-            if r["is_overdue"]:
-                atraso = int(r["days_from_due"])
-                days_txt = f"⏱️ Atraso: <b>{atraso} dia(s)</b>"
-                badge = '<span class="badge red">PENDENTE</span>'
-            else:
-                faltam = abs(int(r["days_from_due"]))
-                days_txt = f"⏱️ Vence em: <b>{faltam} dia(s)</b>"
-                badge = '<span class="badge red">PRAZO ABERTO</span>'
-
-            more = f"• Meses em atraso: <b>{missing}</b>" if missing > 1 else "• Aguardando registro do período exigido"
-            html = f"""
-            <div class="pending-card">
-              <div class="pending-title">{aero}</div>
-              <div style="text-align:center;">{badge}</div>
-              <div class="pending-sub">Período exigido: <b>{req_txt}</b></div>
-              <div class="pending-days">{days_txt}<br/>{more}</div>
-            </div>
-            """
             with cols[i % 3]:
-                st.markdown(html, unsafe_allow_html=True)
+                st.markdown(pending_card_html(r), unsafe_allow_html=True)
             i += 1
 
+mark_stage("pendencias")
+
 with tab2:
     st.markdown("### 📊 Análises & Gráficos")
     st.caption("Use os filtros para mudar o recorte. Sem tabelas na tela.")
@@ -964,23 +769,9 @@ with tab2:
     if df_f.empty:
         st.info("Sem dados com os filtros atuais.")
     else:
-        m = monthly.copy()
-        m["mes_abrev"] = pd.Categorical(
-            m["mes_abrev"],
-            categories=ORDEM_MESES_ABREV,
-            ordered=True
-        )
-        m = m.sort_values(["aeroporto", "ano", "mes_abrev"])
-
         # ======================================================
         # 🎨 MOTOR DE CORES (reaproveitável)
         # ======================================================
-        BASE_COLORS = [
-            "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728",
-            "#9467bd", "#17becf", "#e377c2", "#7f7f7f",
-            "#bcbd22", "#8c564b"
-        ]
-
         def ensure_color_map(state_key: str, items: list, base_colors=BASE_COLORS):
             """
             Garante um dict {item: cor} persistido no session_state.
@@ -1011,40 +802,21 @@ with tab2:
         # ------------------------------------------------------
         st.markdown("#### 1) Eventos por mês (por ano)")
 
-        ser = (
-            df_f
-            .groupby(["ano", "ordem_mes", "mes_abrev"], as_index=False)["eventos"]
-            .sum()
-            .sort_values(["ano", "ordem_mes"])
-        )
-        ser["mes_abrev"] = pd.Categorical(
-            ser["mes_abrev"],
-            categories=ORDEM_MESES_ABREV,
-            ordered=True
-        )
+        ser = warmed("ser")
+        if ser is None:
+            ser = agg_eventos_mes(df_f)
 
         # ----- cores dinâmicas por ANO -----
         anos_disp = sorted(ser["ano"].unique().tolist())
 
         if "color_map_anos" not in st.session_state:
-            base_colors = [
-                "#1f77b4",
-                "#ff7f0e",
-                "#2ca02c",
-                "#d62728",
-                "#9467bd",
-                "#17becf"
-            ]
-            st.session_state.color_map_anos = {
-                ano: base_colors[i % len(base_colors)]
-                for i, ano in enumerate(anos_disp)
-            }
+            st.session_state.color_map_anos = default_color_map(anos_disp, ANO_COLORS)
 
         # ✅ PATCH CRÍTICO — evita KeyError em novos anos (ex: 2026, 2027…)
         for ano in anos_disp:
             if ano not in st.session_state.color_map_anos:
-                st.session_state.color_map_anos[ano] = base_colors[
-                    len(st.session_state.color_map_anos) % len(base_colors)
+                st.session_state.color_map_anos[ano] = ANO_COLORS[
+                    len(st.session_state.color_map_anos) % len(ANO_COLORS)
                 ]
 
         with st.expander("🎨 Ajustar cores das linhas (anos)", expanded=False):
@@ -1063,38 +835,12 @@ with tab2:
         else ", ".join(st.session_state.ind_sel)
         )
 
-        fig1 = px.line(
-            ser,
-            x="mes_abrev",
-            y="eventos",
-            color="ano",
-            markers=True,
-            text=ser["eventos"].map(fmt_int),
-            color_discrete_map=st.session_state.color_map_anos
-        )
+        fig1 = warmed("fig1", (color_signature(st.session_state.color_map_anos, anos_disp), titulo_ind))
+        if fig1 is None:
+            fig1 = build_fig1(ser, st.session_state.color_map_anos, titulo_ind)
 
-        fig1.update_traces(
-            textposition="top center",
-            marker=dict(size=10),
-            line=dict(width=3),
-            textfont=dict(
-                color="#1A1A1A",
-                size=14,
-                family="Arial Black"
-            )
-        )
-
-        fig1.update_layout(
-            title=titulo_ind,
-            xaxis_title=None,
-            yaxis_title=None,
-            legend_title_text=None,
-            xaxis=dict(showgrid=False, zeroline=False),
-            yaxis=dict(showgrid=False, zeroline=False),
-            margin=dict(l=10, r=10, t=55, b=10),
-        )
-
-        st.plotly_chart(fig1, use_container_width=True)
+        show_chart(fig1, key="fig1", use_container_width=True)
+        mark_stage("grafico_1")
 
         # ------------------------------------------------------
         # 2) Participação por indicador
@@ -1102,51 +848,10 @@ with tab2:
         st.markdown("---")
         st.markdown("#### 2) Participação por indicador")
 
-        ind_sum = (
-            df_f
-            .groupby("indicador", as_index=False)["eventos"]
-            .sum()
-            .sort_values("eventos", ascending=False)
-            .head(12)
-        )
+        ind_sum = warmed("ind_sum")
+        if ind_sum is None:
+            ind_sum = agg_indicador(df_f)
 
-        # quebra de texto para rótulos longos
-        def quebra_texto(s, max_len=18):
-            palavras = s.split()
-            linhas = []
-            atual = ""
-            for p in palavras:
-                if len(atual) + len(p) <= max_len:
-                    atual = (atual + " " + p).strip()
-                else:
-                    linhas.append(atual)
-                    atual = p
-            if atual:
-                linhas.append(atual)
-            return "<br>".join(linhas)
-
-        ind_sum["indicador_fmt"] = ind_sum["indicador"].apply(quebra_texto)
-
-        # -----------------------------
-        # controle de largura dinâmica
-        # -----------------------------
-        n_barras = len(ind_sum)
-        bar_width = 0.6 if n_barras > 1 else 0.35  # ← ocupa mais espaço quando só 1
-
-        # -----------------------------
-        # lógica de rótulo interno/externo
-        # -----------------------------
-        max_val = ind_sum["eventos"].max()
-
-        def label_position(v):
-            return "inside" if v >= max_val * 0.25 else "outside"
-
-        def label_color(v):
-            return "white" if v >= max_val * 0.25 else "#333"
-
-        ind_sum["label_pos"] = ind_sum["eventos"].apply(label_position)
-        ind_sum["label_color"] = ind_sum["eventos"].apply(label_color)
-        
         # 🎨 cores por indicador (item 2)
         indicadores_2 = ind_sum["indicador"].tolist()
         cmap_ind_2 = ensure_color_map("color_map_item2_indicadores", indicadores_2)
@@ -1200,44 +905,12 @@ with tab2:
 
             st.session_state.color_map_item2_indicadores = cmap_ind_2
 
-        fig2 = px.bar(
-            ind_sum,
-            x="indicador_fmt",
-            y="eventos",
-            text=ind_sum["eventos"].map(fmt_int),
-        )
+        fig2 = warmed("fig2", color_signature(cmap_ind_2, indicadores_2))
+        if fig2 is None:
+            fig2 = build_fig2(ind_sum, cmap_ind_2)
 
-        fig2.update_traces(
-            width=bar_width,
-            textfont=dict(size=14, family="Arial Black")
-        )
-
-        # aplica cor por barra (por indicador)
-        fig2.data[0].marker.color = [cmap_ind_2[ind] for ind in ind_sum["indicador"].tolist()]
-
-        # aplica posição e cor manualmente (100% confiável)
-        for i, row in ind_sum.iterrows():
-            fig2.data[0].textposition = ind_sum["label_pos"].tolist()
-            fig2.data[0].textfont.color = ind_sum["label_color"].tolist()
-
-        fig2.update_layout(
-            xaxis_title=None,
-            yaxis_title=None,
-            showlegend=False,
-            xaxis=dict(
-                showgrid=False,
-                zeroline=False,
-                tickangle=0,
-                tickfont=dict(size=12)
-            ),
-            yaxis=dict(
-                showgrid=False,
-                zeroline=False
-            ),
-            margin=dict(l=10, r=10, t=20, b=40)
-        )
-
-        st.plotly_chart(fig2, use_container_width=True)
+        show_chart(fig2, key="fig2", use_container_width=True)
+        mark_stage("grafico_2")
 
         # ------------------------------------------------------
         # 3) Total de eventos por ano (barras verdes + rótulo branco)
@@ -1245,14 +918,9 @@ with tab2:
         st.markdown("---")
         st.markdown("#### 3) Total de eventos por ano")
 
-        byy = (
-            df_f
-            .groupby("ano", as_index=False)["eventos"]
-            .sum()
-            .sort_values("ano", ascending=False)  # ← ORDEM 2025 → 2020
-        )
-
-        byy["ano"] = byy["ano"].astype(int)
+        byy = warmed("byy")
+        if byy is None:
+            byy = agg_ano(df_f)
 
         # 🎨 cores por ano (item 3)
         anos_3 = byy["ano"].astype(int).tolist()
@@ -1307,54 +975,12 @@ with tab2:
 
             st.session_state.color_map_item3_anos = cmap_ano_3
 
-        fig3 = px.bar(
-            byy,
-            x="ano",
-            y="eventos",
-            text=byy["eventos"].map(fmt_int)
-        )
-
-        fig3.update_traces(
-            textposition="inside",
-            textfont=dict(color="white", size=18, family="Arial Black"),
-        )
-
-        # cor por barra (por ano)
-        fig3.data[0].marker.color = [
-            cmap_ano_3[int(a)] for a in byy["ano"].astype(int).tolist()
-        ]
-
-        fig3.update_layout(
-            xaxis_title=None,
-            yaxis_title=None,
-            showlegend=False,
-            xaxis=dict(
-                type="category",
-                categoryorder="array",                # ← força ordem manual
-                categoryarray=byy["ano"].tolist(),    # ← exatamente como o dataframe
-                showgrid=False,
-                zeroline=False,
-            ),
-            yaxis=dict(showgrid=False, zeroline=False),
-            margin=dict(l=10, r=10, t=15, b=10),
-        )
-
-        st.plotly_chart(fig3, use_container_width=True)
+        fig3 = warmed("fig3", color_signature(cmap_ano_3, anos_3))
+        if fig3 is None:
+            fig3 = build_fig3(byy, cmap_ano_3)
 
-        # ======================================================
-        # FUNÇÃO AUXILIAR – CLASSE CSS POR INDICADOR
-        # ======================================================
-        def classe_indicador(nome):
-            nome = nome.upper()
-            if "RI" in nome:
-                return "rank-ind-RI"
-            if "FOD" in nome:
-                return "rank-ind-FOD"
-            if "COL" in nome:
-                return "rank-ind-COLISAO"
-            if "FAUNA" in nome:
-                return "rank-ind-FAUNA"
-            return "rank-ind-OUTROS"
+        show_chart(fig3, key="fig3", use_container_width=True)
+        mark_stage("grafico_3")
 
         # ------------------------------------------------------
         # 4) Top eventos por indicador (ranking por aeroporto)
@@ -1370,54 +996,12 @@ with tab2:
             index=0
         )
 
-        # ==============================
-        # ORDEM FIXA DOS INDICADORES
-        # ==============================
-        ordem_fixa_indicadores = [
-            "Incursão em Pista",
-            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura",
-            "Colisão entre Veículos, Equipamentos, Estruturas",
-            "F.O.D",
-            "Colisão com Aves",
-            "Excursão de Pista",
-            "RELPREV",
-        ]
-
         # ==============================
         # BASE DE CÁLCULO DO RANKING
         # ==============================
-        if modo_rank == "Indicador por Eventos":
-
-            rank_df = (
-                df_f
-                .groupby(["indicador", "aeroporto"], as_index=False)["eventos"]
-                .sum()
-            )
-
-            rank_df["valor_rank"] = rank_df["eventos"]
-
-        else:
-            base_idx = (
-                df_f
-                .groupby(["indicador", "aeroporto", "ano", "ordem_mes"], as_index=False)
-                .agg(
-                    eventos=("eventos", "sum"),
-                    mov=("mov", "max")
-                )
-            )
-
-            rank_df = (
-                base_idx
-                .groupby(["indicador", "aeroporto"], as_index=False)
-                .agg(
-                    eventos=("eventos", "sum"),
-                    mov=("mov", "sum")
-                )
-            )
-
-            rank_df["valor_rank"] = (
-                rank_df["eventos"] * 100 / rank_df["mov"]
-            ).fillna(0)
+        rank_df = warmed(("rank", modo_rank))
+        if rank_df is None:
+            rank_df = agg_rank(df_f, modo_rank)
 
         # ==============================
         # EXIBIÇÃO
@@ -1427,77 +1011,21 @@ with tab2:
         else:
             # 🔒 garante somente indicadores existentes, mantendo a ordem fixa
             indicadores_ordem = [
-                i for i in ordem_fixa_indicadores
+                i for i in ORDEM_INDICADORES
                 if i in rank_df["indicador"].unique()
             ]
 
             for indicador in indicadores_ordem:
-
-                sub = (
-                    rank_df[rank_df["indicador"] == indicador]
-                    .sort_values("valor_rank", ascending=False)
-                    .head(17)
-                    .reset_index(drop=True)
-                )
-
-                classe_ind = classe_indicador(indicador)
-
+                SNAPSHOT.append(("titulo", f"📌 {indicador}"))
                 with st.expander(f"📌 {indicador}", expanded=False):
+                    st.markdown(snap(rank_cards_html(rank_df, indicador, modo_rank)), unsafe_allow_html=True)
 
-                    html_cards = '<div class="rank-grid">'
-
-                    for pos, row in sub.iterrows():
-
-                        classes = ["rank-card-mini", classe_ind]
-
-                        if pos == 0:
-                            classes.append("rank-top-1")
-                        elif pos in [1, 2]:
-                            classes.append("rank-top-3")
-
-                        if modo_rank == "Indicador por Eventos":
-                            valor_html = f"""
-                                <div class="rank-value">{fmt_int(row["eventos"])}</div>
-                                <div class="rank-label">eventos</div>
-                            """
-                        else:
-                            valor_fmt = f"{row['valor_rank']:.4f}".replace(".", ",")
-                            valor_html = f"""
-                                <div class="rank-value">{valor_fmt}</div>
-                                <div class="rank-label">índice</div>
-                            """
-
-                        html_cards += (
-                            f'<div class="{" ".join(classes)}">'
-                            f'<div class="rank-pos">#{pos + 1}</div>'
-                            f'<div class="rank-aero">{row["aeroporto"]}</div>'
-                            f'{valor_html}'
-                            '</div>'
-                        )
-
-                    html_cards += "</div>"
-
-                    st.markdown(html_cards, unsafe_allow_html=True)
+        mark_stage("ranking_4")
 
         # ------------------------------------------------------
         # 5) Gráfico por Indicador
         # ------------------------------------------------------
 
-        def label_filtro(ano_sel, mes_sel):
-            # ANO
-            if ano_sel == ["Todos"]:
-                ano_txt = "ANO TODOS"
-            else:
-                ano_txt = "Ano " + ", ".join(map(str, ano_sel))
-
-            # MÊS
-            if mes_sel == ["Todos"]:
-                mes_txt = "MÊS TODOS"
-            else:
-                mes_txt = "Mês " + ", ".join(mes_sel)
-
-            return f"{ano_txt} – {mes_txt}"
-        
         # 🔤 monta texto de ANO / MÊS selecionados
         titulo_filtros = label_filtro(
             st.session_state.ano_sel,
@@ -1564,97 +1092,16 @@ with tab2:
             
             for indicador in indicadores_ordem:
 
-                sub_evt = (
-                    df_f[df_f["indicador"] == indicador]
-                    .groupby("aeroporto", as_index=False)
-                    .agg(
-                        eventos=("eventos", "sum"),
-                        mov=("mov", "sum")
-                    )
-                    .sort_values("aeroporto")  # 🔠 ordem alfabética
-                    .reset_index(drop=True)
-                )
-
+                sub_evt = agg_indicador_aeroporto(df_f, indicador)
                 if sub_evt.empty:
                     continue
 
-                # 🔤 eixo X com aeroporto + movimentação
-                sub_evt["label_x"] = (
-                    sub_evt["aeroporto"]
-                    + "<br><span style='font-size:11px'>"
-                    + sub_evt["mov"].map(fmt_int)
-                    + "</span>"
-                )
-
                 with st.expander(f"📌 {indicador}", expanded=False):
-
-                    fig_evt = px.bar(
+                    fig_evt = build_fig_evt(
                         sub_evt,
-                        x="label_x",
-                        y="eventos",
-                        text=sub_evt["eventos"].map(fmt_int),
-                    )
-
-                    # 🔧 limite superior com folga (EVITA CORTE)
-                    y_max = sub_evt["eventos"].max()
-                    y_lim = y_max * 1.25 if y_max > 0 else 1
-
-                    fig_evt.update_traces(
-                        marker_color=st.session_state.color_map_item5_eventos.get(indicador, ACCENT),
-                        textposition="outside",
-                        cliponaxis=False,
-                        textfont=dict(
-                            color="#000000",
-                            size=13,
-                            family="Arial Black"
-                        )
-                    )
-
-                    fig_evt.update_layout(
-                        showlegend=False,
-
-                        xaxis_title="MOVIMENTAÇÃO",
-                        yaxis_title=None,
-
-                        xaxis=dict(
-                            showgrid=False,
-                            zeroline=False,
-                            tickfont=dict(
-                                color="#000000",
-                                size=13,
-                                family="Arial Black"
-                            )
-                        ),
-                        xaxis_title_font=dict(
-                            size=14,
-                            family="Arial Black",
-                            color="#1a2732"
-                        ),
-
-                        yaxis=dict(
-                            showgrid=False,
-                            zeroline=False,
-                            range=[0, y_lim],
-                            tickfont=dict(
-                                color="#000000",
-                                size=13,
-                                family="Arial Black"
-                            )
-                        ),
-
-                        uniformtext_minsize=12,
-                        uniformtext_mode="show",
-
-                        margin=dict(
-                            l=40,
-                            r=30,
-                            t=80,
-                            b=100   # 👈 já tem espaço suficiente
-                        ),
-                        height=420,
+                        st.session_state.color_map_item5_eventos.get(indicador, ACCENT),
                     )
-
-                    st.plotly_chart(
+                    show_chart(
                         fig_evt,
                         use_container_width=True,
                         key=f"evt_{modo_rank}_{indicador}"
@@ -1731,73 +1178,20 @@ with tab2:
                 if sub.empty:
                     continue
 
-                # 🔥 VERIFICA SE TODOS OS VALORES SÃO ZERO
-                todos_zero = (sub["valor_rank"].abs().sum() == 0)
-
                 with st.expander(f"📌 {indicador}", expanded=False):
-
-                    fig_idx = px.line(
+                    fig_idx = build_fig_idx(
                         sub,
-                        x="aeroporto",
-                        y="valor_rank",
-                        markers=True,
-                        text=sub["valor_rank"].apply(
-                            lambda x: f"{x:.3f}".replace(".", ",")
-                        ),
-                    )
-
-                    fig_idx.update_traces(
-                        textposition="top center",
-                        marker=dict(size=10),
-                        line=dict(width=3, color=st.session_state.color_map_item5_indice.get(indicador, ACCENT)),
-                        textfont=dict(
-                            color="#000000",
-                            size=13,
-                            family="Arial Black"
-                        )
+                        st.session_state.color_map_item5_indice.get(indicador, ACCENT),
                     )
-
-                    fig_idx.update_layout(
-                        xaxis_title=None,
-                        yaxis_title=None,
-                        showlegend=False,
-
-                        xaxis=dict(
-                            showgrid=False,
-                            zeroline=False,
-                            tickfont=dict(
-                                color="#000000",
-                                size=13,
-                                family="Arial Black"
-                            )
-                        ),
-
-                        yaxis=dict(
-                            showgrid=False,
-                            zeroline=False,
-
-                            # 🔥 SE TUDO FOR ZERO → MOSTRA SÓ O 0
-                            tickmode="array" if todos_zero else "auto",
-                            tickvals=[0] if todos_zero else None,
-                            range=[-0.05, 0.05] if todos_zero else None,
-
-                            tickfont=dict(
-                                color="#000000",
-                                size=13,
-                                family="Arial Black"
-                            )
-                        ),
-
-                        margin=dict(l=40, r=30, t=30, b=60),
-                        height=420,
-                    )
-
-                    st.plotly_chart(
+                    show_chart(
                         fig_idx,
+                        decimals=3,
                         use_container_width=True,
                         key=f"graf_idx_{modo_rank}_{indicador}"
                     )
 
+        mark_stage("grafico_5")
+
     # ------------------------------------------------------
     # 5) Comparativo de Aeroportos (Eventos x Índice)
     # ------------------------------------------------------
@@ -1837,160 +1231,15 @@ with tab2:
                     key="cmp_aero_b_tab5"
                 )
 
-            base_cmp = df.copy()
-            if sel_ano:
-                base_cmp = base_cmp[base_cmp["ano"].isin(sel_ano)]
-            if sel_mes:
-                base_cmp = base_cmp[base_cmp["mes_abrev"].isin(sel_mes)]
-            if sel_ind:
-                base_cmp = base_cmp[base_cmp["indicador"].isin(sel_ind)]
-
-            # ======================================================
-            # BASE POR EVENTOS
-            # ======================================================
-            if modo_cmp == "Comparar por Eventos":
-
-                cmp = (
-                    base_cmp[base_cmp["aeroporto"].isin([aero_a, aero_b])]
-                    .groupby(["aeroporto", "ordem_mes", "mes_abrev"], as_index=False)["eventos"]
-                    .sum()
-                )
-
-                cmp["valor"] = cmp["eventos"]
-                eixo_y = "valor"
-                label_y = "eventos"
-                texto = cmp["valor"].map(fmt_int)
-
-            # ======================================================
-            # BASE POR ÍNDICE (EVENTOS * 100 / MOV) — IGUAL AO POWER BI
-            # ======================================================
-            else:
-                # 🔥 AGREGA EVENTOS POR MÊS (SOMA NORMAL)
-                base_evt = (
-                    base_cmp[base_cmp["aeroporto"].isin([aero_a, aero_b])]
-                    .groupby(["aeroporto", "ordem_mes", "mes_abrev"], as_index=False)
-                    .agg(
-                        eventos=("eventos", "sum")
-                    )
-                )
-
-                # 🔥 MOVIMENTAÇÃO ÚNICA DO MÊS (MODE → evita 226 vs 562 misturados)
-                base_mov = (
-                    base_cmp[base_cmp["aeroporto"].isin([aero_a, aero_b])]
-                    .groupby(["aeroporto", "ordem_mes", "mes_abrev"], as_index=False)
-                    .agg(
-                        mov=("mov", lambda s: s.mode().iloc[0] if not s.mode().empty else s.max())
-                    )
-                )
-
-                # 🔥 JUNTA EVENTOS + MOV
-                cmp = base_evt.merge(
-                    base_mov,
-                    on=["aeroporto", "ordem_mes", "mes_abrev"],
-                    how="left"
-                )
-
-                # 🔥 ÍNDICE MENSAL (EXATAMENTE COMO O POWER BI)
-                cmp["valor"] = (cmp["eventos"] * 100 / cmp["mov"]).fillna(0)
-
-                eixo_y = "valor"
-                label_y = "índice"
-                texto = cmp["valor"].apply(lambda x: f"{x:.3f}".replace(".", ","))
-
-            # ======================================================
-            # ORDENAÇÃO DE MESES
-            # ======================================================
-            cmp["mes_abrev"] = pd.Categorical(
-                cmp["mes_abrev"],
-                categories=ORDEM_MESES_ABREV,
-                ordered=True
-            )
-            cmp = cmp.sort_values(["ordem_mes", "aeroporto"])
-
-            # ======================================================
-            # GRÁFICO
-            # ======================================================
+            por_indice = modo_cmp == "Comparar por Índice"
+            cmp = compare_airports(compare_base(df, sel_ano, sel_mes, sel_ind), aero_a, aero_b, por_indice)
 
             color_map = {aero_a: ACCENT, aero_b: "#2BB7FF"}
 
-            # 🔀 AJUSTE POR MODO
-            if modo_cmp == "Comparar por Eventos":
-
-                # 🔢 EVENTOS = INTEIRO PURO
-                cmp["valor_plot"] = cmp["eventos"].astype(int)
-                cmp["texto_plot"] = cmp["valor_plot"].astype(str)
-
-                eixo_y = "valor_plot"
-                tickformat_y = "d"          # 👈 inteiro
-                hover_fmt = "%{y:d}"
-
-            else:
-                # 🔢 ÍNDICE = DECIMAL (0,000)
-                cmp["valor_plot"] = cmp["valor"].round(3)
-                cmp["texto_plot"] = cmp["valor_plot"].apply(
-                    lambda x: f"{x:.3f}".replace(".", ",")
-                )
-
-                eixo_y = "valor_plot"
-                tickformat_y = ".3f"        # 👈 decimal
-                hover_fmt = "%{y:.3f}"
-
-            fig_cmp = px.bar(
-                cmp,
-                x="mes_abrev",
-                y=eixo_y,
-                color="aeroporto",
-                text="texto_plot",          # 🔥 texto certo para cada modo
-                color_discrete_map=color_map,
-            )
-
-            # 🔥 hover SEMPRE coerente com o modo
-            fig_cmp.update_traces(
-                hovertemplate=(
-                    "aeroporto=%{legendgroup}"
-                    "<br>mês=%{x}"
-                    f"<br>valor={hover_fmt}"
-                    "<extra></extra>"
-                )
-            )
-
-            # 🔢 eixo Y correto por modo
-            fig_cmp.update_yaxes(tickformat=tickformat_y)
-
-            # 🔹 lógica inside / outside
-            for trace in fig_cmp.data:
-                valores = list(trace.y)
-                max_val = max(valores) if valores else 0
-
-                pos, cor = [], []
-                for v in valores:
-                    if v >= max_val * 0.25:
-                        pos.append("inside")
-                        cor.append("white")
-                    else:
-                        pos.append("outside")
-                        cor.append("#333")
-
-                trace.textposition = pos
-                trace.textangle = 0
-                trace.textfont = dict(
-                    color=cor,
-                    size=11,
-                    family="Arial Black"
-                )
-
-            fig_cmp.update_layout(
-                barmode="group",
-                xaxis_title=None,
-                yaxis_title=None,
-                legend_title_text=None,
-                xaxis=dict(showgrid=False, zeroline=False),
-                yaxis=dict(showgrid=False, zeroline=False),
-                margin=dict(l=10, r=10, t=15, b=10),
-            )
-
-            st.plotly_chart(
+            fig_cmp = build_fig_cmp(cmp, por_indice, color_map)
+            show_chart(
                 fig_cmp,
+                decimals=3,
                 use_container_width=True,
                 key=f"cmp_{modo_cmp}_{aero_a}_{aero_b}"
             )
@@ -1998,73 +1247,15 @@ with tab2:
             # ======================================================
             # KPIs
             # ======================================================
-            if modo_cmp == "Comparar por Eventos":
-                total_a = cmp.loc[cmp["aeroporto"] == aero_a, "eventos"].sum()
-                total_b = cmp.loc[cmp["aeroporto"] == aero_b, "eventos"].sum()
-            else:
-                ev_a = cmp.loc[cmp["aeroporto"] == aero_a, "eventos"].sum()
-                mv_a = cmp.loc[cmp["aeroporto"] == aero_a, "mov"].sum()
-                total_a = (ev_a * 100 / mv_a) if mv_a > 0 else 0
-
-                ev_b = cmp.loc[cmp["aeroporto"] == aero_b, "eventos"].sum()
-                mv_b = cmp.loc[cmp["aeroporto"] == aero_b, "mov"].sum()
-                total_b = (ev_b * 100 / mv_b) if mv_b > 0 else 0
-
-            pct_var = (total_a - total_b) / total_b if total_b > 0 else 0
-
-
-            def fmt_pct_cmp(v):
-                return f"{v*100:+.2f}%".replace(".", ",")
+            total_a, total_b, pct_var = compare_totals(cmp, aero_a, aero_b, por_indice)
+            for col, card in zip(
+                st.columns(3),
+                compare_cards_html(aero_a, aero_b, total_a, total_b, pct_var, por_indice, color_map),
+            ):
+                with col:
+                    st.markdown(card, unsafe_allow_html=True)
 
-
-            def fmt_val(v):
-                if modo_cmp == "Comparar por Eventos":
-                    return fmt_int(v)
-                else:
-                    return f"{v:.3f}".replace(".", ",")
-
-
-            cor_a = color_map.get(aero_a, "#1a2732")
-            cor_b = color_map.get(aero_b, "#1a2732")
-
-            k1, k2, k3 = st.columns(3)
-
-            with k1:
-                st.markdown(
-                    f"""
-                    <div class="kpi-card">
-                        <div class="kpi-title" style="color:{cor_a};">{aero_a}</div>
-                        <div class="kpi-value" style="color:{cor_a};">{fmt_val(total_a)}</div>
-                        <div class="kpi-sub">{label_y}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-
-            with k2:
-                cor_var = "up" if pct_var > 0 else "down" if pct_var < 0 else "flat"
-                st.markdown(
-                    f"""
-                    <div class="kpi-card">
-                        <div class="kpi-title">Variação A × B</div>
-                        <div class="kpi-value {cor_var}">{fmt_pct_cmp(pct_var)}</div>
-                        <div class="kpi-sub">{aero_a} vs {aero_b}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
-
-            with k3:
-                st.markdown(
-                    f"""
-                    <div class="kpi-card">
-                        <div class="kpi-title" style="color:{cor_b};">{aero_b}</div>
-                        <div class="kpi-value" style="color:{cor_b};">{fmt_val(total_b)}</div>
-                        <div class="kpi-sub">{label_y}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
+            mark_stage("comparativo_6")
 
             # ======================================================
             # 🎯 DATAFRAME EXCLUSIVO PARA METAS
@@ -2150,280 +1341,26 @@ with tab2:
 
 
             # ======================================================
-            # 🎯 METAS POR ANO (2025 = base / 2026 muda SBSP)
+            # 🎯 METAS DO ANO (regras em idso_core.metas_vigentes)
             # ======================================================
-            METAS_POR_ANO = {
-                2025: {
-                    "SBJU": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 7,
-                        "Colisão com Aves": 40,
-                        "RELPREV": 15,
-                    },
-                    "SBCG": {
-                        "Incursão em Pista": 4,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 50,
-                        "RELPREV": 30,
-                    },
-                    "SBCJ": {
-                        "Incursão em Pista": 2,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 3,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBCR": {
-                        "Incursão em Pista": 2,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 3,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBHT": {
-                        "Incursão em Pista": 2,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 1,
-                        "F.O.D": 5,
-                        "Colisão com Aves": 25,
-                        "RELPREV": 10,
-                    },
-                    "SBJP": {
-                        "Incursão em Pista": 5,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 50,
-                        "RELPREV": 35,
-                    },
-                    "SBKG": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 5,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 15,
-                    },
-                    "SBMA": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBMK": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBMO": {
-                        "Incursão em Pista": 5,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 50,
-                        "RELPREV": 30,
-                    },
-                    "SBPP": {
-                        "Incursão em Pista": 2,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 3,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBRF": {
-                        "Incursão em Pista": 7,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 5,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 12,
-                        "F.O.D": 15,
-                        "Colisão com Aves": 144,
-                        "RELPREV": 150,
-                    },
-                    "SBSN": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 31,
-                    },
-                    "SBSP": {
-                        "Incursão em Pista": 4,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 6,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 50,
-                        "F.O.D": 67,
-                        "Colisão com Aves": 52,
-                        "RELPREV": 300,
-                    },
-                    "SBUL": {
-                        "Incursão em Pista": 4,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 5,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 50,
-                        "RELPREV": 30,
-                    },
-                    "SBUR": {
-                        "Incursão em Pista": 2,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 3,
-                        "F.O.D": 10,
-                        "Colisão com Aves": 30,
-                        "RELPREV": 20,
-                    },
-                    "SBAR": {
-                        "Incursão em Pista": 3,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 3,
-                        "F.O.D": 6,
-                        "Colisão com Aves": 40,
-                        "RELPREV": 30,
-                    },
-                },
-
-                2026: {
-                    "SBSP": {
-                        "Incursão em Pista": 5,
-                        "Excursão de Pista": 1,
-                        "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 10,
-                        "Colisão entre Veículos, Equipamentos, Estruturas": 70,
-                        "F.O.D": 29,
-                        "Colisão com Aves": 72,
-                        "RELPREV": 400,
-                    }
-                }
-            }
-
-            # ======================================================
-            # ✅ REGRAS CERTAS DE ANO PARA META
-            # - Ano = Todos  → meta usa SEMPRE 2025 (base)
-            # - Ano = 2026   → aplica override (SBSP)
-            # - Ano >= 2027  → herda 2026
-            # ======================================================
-
-            anos_metas_def = sorted(METAS_POR_ANO.keys())
-            ANO_BASE_METAS = min(anos_metas_def)     # 2025
-            ULTIMO_ANO_METAS = max(anos_metas_def)   # 2026
-
             if st.session_state.ano_sel == ["Todos"]:
-                ano_meta = ANO_BASE_METAS
+                METAS = metas_vigentes()
             else:
-                ano_escolhido = int(st.session_state.ano_sel[0])
-                ano_meta = min(ano_escolhido, ULTIMO_ANO_METAS)  # 2027+ vira 2026
-
-            # base sempre 2025 (tem todos os aeroportos)
-            METAS = {
-                aero: metas.copy()
-                for aero, metas in METAS_POR_ANO[ANO_BASE_METAS].items()
-            }
-
-            # aplica override somente se ano_meta tiver overrides (ex: 2026)
-            if ano_meta in METAS_POR_ANO and ano_meta != ANO_BASE_METAS:
-                for aero, metas_aero in METAS_POR_ANO[ano_meta].items():
-                    METAS.setdefault(aero, {}).update(metas_aero)
-
-            import streamlit.components.v1 as components
+                METAS = metas_vigentes(int(st.session_state.ano_sel[0]))
 
             # ======================================================
             # 🎯 ACOMPANHAMENTO DE METAS — GRID (HTML)
             # ======================================================
-
-            def meta_card_kpi(indicador, aeroporto_label, valor, meta):
-
-                pct = (valor / meta) if meta > 0 else 0
-                pct_pct = pct * 100
-                pct_bar = min(pct_pct, 150)
-
-                nome_ind = indicador.upper()
-
-                # 🔵 RELPREV (quanto MAIOR, melhor)
-                if "RELPREV" in nome_ind:
-                    bar_color = "#96CE00" if valor >= meta else "#ff5a5f"
-
-                # 🔴 DEMAIS INDICADORES (quanto MENOR, melhor)
-                else:
-                    if pct < 0.8:
-                        bar_color = "#96CE00"        # 🟢 confortável
-                    elif pct <= 1:
-                        bar_color = "#ffb703"        # 🟡 atenção (80% até 100% inclusive)
-                    else:
-                        bar_color = "#ff5a5f"        # 🔴 ultrapassou a meta
-
-                return f"""
-                <div class="meta-card">
-                    <div class="meta-title">{indicador}</div>
-                    <div class="meta-aero">{aeroporto_label}</div>
-
-                    <div class="meta-value" style="color:{bar_color};">
-                        {fmt_int(valor)}
-                    </div>
-
-                    <div class="meta-sub">
-                        Meta: {fmt_int(meta)}
-                    </div>
-
-                    <div class="meta-bar">
-                        <div class="meta-bar-fill"
-                            style="width:{pct_bar:.1f}%; background:{bar_color};">
-                        </div>
-                    </div>
-
-                    <div class="meta-pct">
-                        {pct_pct:.1f}% da meta
-                    </div>
-                </div>
-                """
-
-            ordem_indicadores = [
-                "Incursão em Pista",
-                "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura",
-                "Colisão entre Veículos, Equipamentos, Estruturas",
-                "F.O.D",
-                "Colisão com Aves",
-                "Excursão de Pista",
-                "RELPREV",
-            ]
-
             if st.session_state.ind_sel == ["Todos"]:
-                indicadores_grid = ordem_indicadores
+                indicadores_grid = ORDEM_INDICADORES
             else:
-                indicadores_grid = [ind for ind in ordem_indicadores if ind in st.session_state.ind_sel]
-
-            html_cards = '<div class="metas-grid">'
+                indicadores_grid = [ind for ind in ORDEM_INDICADORES if ind in st.session_state.ind_sel]
 
             # ⚠️ IMPORTANTÍSSIMO:
             # valores SEMPRE vêm do df_f (respeita filtro global):
             # - Ano = Todos → df_f já tem todos os anos (sel_ano = ano_base)
             # - Ano específico → df_f já vem filtrado
-            # (não usar "ano_meta" para filtrar valores)
+            # (não usar o ano da meta para filtrar valores)
 
             # ======================================================
             # 📅 ANOS ATIVOS (igual VALUES(ANO) no Power BI)
@@ -2446,188 +1383,14 @@ with tab2:
                 anos_ativos = [int(a) for a in st.session_state.ano_sel]
 
             # ======================================================
-            # 🧮 META POR ANO (regra 2025 / 2026 / herança)
-            # ======================================================
-
-            def meta_por_ano(aeroporto, indicador, ano):
-
-                if ano <= 2025:
-                    ano_meta = 2025
-                elif ano == 2026:
-                    ano_meta = 2026
-                else:
-                    ano_meta = 2026
-
-                if (
-                    ano_meta in METAS_POR_ANO
-                    and aeroporto in METAS_POR_ANO[ano_meta]
-                    and indicador in METAS_POR_ANO[ano_meta][aeroporto]
-                ):
-                    return METAS_POR_ANO[ano_meta][aeroporto][indicador]
-
-                return METAS_POR_ANO[2025].get(aeroporto, {}).get(indicador, 0)
-
-
-            # ======================================================
-            # 🎯 GRID — TODOS OS AEROPORTOS (COM META POR ANO)
+            # 🎯 GRID — META = SOMA DA META DE CADA ANO
             # ======================================================
+            html_cards = metas_grid_html(metas_grid(df_f, aero_meta_sel, indicadores_grid, anos_ativos, METAS))
 
-            if aero_meta_sel == "Todos":
-                aeroporto_label = "Todos os Aeroportos"
-
-                for ind in indicadores_grid:
-
-                    # 🔹 VALOR REAL (eventos) — continua igual
-                    valor_total = (
-                        df_f[df_f["indicador"] == ind]["eventos"].sum()
-                        if not df_f.empty else 0
-                    )
 
-                    # 🔥 META CORRETA = SOMA DA META DE CADA ANO
-                    # (cada aeroporto soma SOMENTE nos anos em que possui dados)
+            # render nativo: reaproveita o CSS global (sem iframe por rerun)
+            st.markdown(snap(html_cards), unsafe_allow_html=True)
 
-                    meta_total = 0
-
-                    for aero in METAS_POR_ANO[2025].keys():
-
-                        # anos reais em que o aeroporto possui dados
-                        anos_aero = sorted(
-                            df_f[df_f["aeroporto"] == aero]["ano"].unique()
-                        )
-
-                        for ano in anos_aero:
-                            meta_total += meta_por_ano(aero, ind, ano)
-
-                    if meta_total == 0:
-                        continue
-
-                    html_cards += meta_card_kpi(
-                        indicador=ind,
-                        aeroporto_label=aeroporto_label,
-                        valor=int(valor_total),
-                        meta=int(meta_total),
-                    )
-
-            else:
-                aeroporto = aero_meta_sel
-                aeroporto_label = aeroporto
-
-                for ind in indicadores_grid:
-
-                    if ind not in METAS.get(aeroporto, {}):
-                        continue
-
-                    valor_total = (
-                        df_f[
-                            (df_f["aeroporto"] == aeroporto)
-                            & (df_f["indicador"] == ind)
-                        ]["eventos"].sum()
-                        if not df_f.empty else 0
-                    )
-
-                    # 🔥 META CORRETA = SOMA DA META POR ANO
-                    meta_valor = sum(
-                        meta_por_ano(aeroporto, ind, ano)
-                        for ano in anos_ativos
-                    )
-
-                    if meta_valor == 0:
-                        continue
-
-                    html_cards += meta_card_kpi(
-                        indicador=ind,
-                        aeroporto_label=aeroporto_label,
-                        valor=int(valor_total),
-                        meta=int(meta_valor),
-                    )
-
-            html_cards += "</div>"
-
-            components.html(
-            f"""
-            <div style="width:100%; overflow: visible;">
-                <style>
-                    .metas-grid {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-                        gap: 18px;
-                        margin-top: 16px;
-                        margin-bottom: 28px;
-                    }}
-
-                    .meta-card {{
-                        background: #f8f9fb;
-                        border: 2px solid rgba(0,0,0,0.08);
-                        border-radius: 16px;
-                        padding: 16px 14px;
-                        text-align: center;
-                        box-shadow: 0 6px 16px rgba(0,0,0,0.06);
-                        display: flex;
-                        flex-direction: column;
-                        gap: 6px;
-                    }}
-
-                    .meta-title {{
-                        font-size: 16px;
-                        font-weight: 1000;
-                        color: #1a2732;
-                        min-height: 56px;
-                        display: flex;
-                        align-items: center;
-                        justify-content: center;
-                        text-align: center;
-                    }}
-
-                    .meta-aero {{
-                        font-size: 11px;
-                        font-weight: 900;
-                        color: #6b7c93;
-                        text-transform: uppercase;
-                        letter-spacing: 0.4px;
-                    }}
-
-                    .meta-value {{
-                        font-size: 42px;
-                        font-weight: 1000;
-                        min-height: 48px;
-                        display: flex;
-                        align-items: center;
-                        justify-content: center;
-                    }}
-
-                    .meta-sub {{
-                        font-size: 16px;
-                        font-weight: 1000;
-                        color: #5b6b7b;
-                    }}
-
-                    .meta-bar {{
-                        background: #e5e7eb;
-                        border-radius: 999px;
-                        height: 10px;
-                        overflow: hidden;
-                    }}
-
-                    .meta-bar-fill {{
-                        height: 100%;
-                        border-radius: 999px;
-                        transition: width 0.6s ease;
-                    }}
-
-                    .meta-pct {{
-                        font-size: 14px;
-                        font-weight: 1000;
-                        color: #1a2732;
-                    }}
-                </style>
-
-                {html_cards}
-            </div>
-            """,
-            height=620,
-            scrolling=False
-            )
-        
         # ======================================================
         # 🎯 STATUS DAS METAS POR AEROPORTO (BLOCO SEPARADO)
         # ======================================================
@@ -2692,234 +1455,357 @@ with tab2:
             )
 
             # ======================================================
-            # 🔎 BASE PARA STATUS
-            # - respeita ANO
+            # 🔎 STATUS — respeita ANO, INDICADOR e AEROPORTO
             # ======================================================
-            df_base_status = df[df["ano"] == ano_ref]
+            atingiram, nao_atingiram = status_metas(
+                df,
+                ano_ref,
+                METAS,
+                aeroportos=None if st.session_state.aero_sel == ["Todos"] else st.session_state.aero_sel,
+                indicadores=None if st.session_state.ind_sel == ["Todos"] else st.session_state.ind_sel,
+            )
 
             # ======================================================
-            # 🔎 DEFINE INDICADORES A AVALIAR
+            # 🖼️ HTML FINAL
             # ======================================================
-            if st.session_state.ind_sel == ["Todos"]:
-                indicadores_status = None
-            else:
-                indicadores_status = st.session_state.ind_sel
+            status_bloco = status_html(atingiram, nao_atingiram)
 
-            # ======================================================
-            # 🔎 DEFINE AEROPORTOS A AVALIAR  ✅ NOVO
-            # ======================================================
-            if st.session_state.aero_sel == ["Todos"]:
-                aeroportos_status = METAS.keys()
-            else:
-                aeroportos_status = st.session_state.aero_sel
+            if status_bloco:
+                st.markdown(snap(status_bloco), unsafe_allow_html=True)
 
-            atingiram = []
-            nao_atingiram = []
+    mark_stage("metas")
 
-            # ======================================================
-            # 🔄 LOOP POR AEROPORTO (RESPEITA FILTRO)
-            # ======================================================
-            for aeroporto in aeroportos_status:
+    # ======================================================
+    # 📦 DIAGNÓSTICO — TAMANHO DOS GRÁFICOS (?debug=1)
+    # ======================================================
+    if DEBUG and PLOTLY_PAYLOAD:
+        total_kb = sum(PLOTLY_PAYLOAD.values()) / 1024
+        with st.expander(f"📦 Payload Plotly: {total_kb:,.1f} KB em {len(PLOTLY_PAYLOAD)} gráfico(s)", expanded=False):
+            st.caption("Modo compacto: " + ("ligado" if PLOTLY_COMPACT else "desligado"))
+            st.json({k: f"{v / 1024:,.1f} KB" for k, v in PLOTLY_PAYLOAD.items()})
 
-                if aeroporto not in METAS:
-                    continue
+with tab3:
+    st.markdown("### 📦 Exportações")
+    st.caption("Relatório XLSX + pacote ZIP (inclui pendências e metadados).")
 
-                metas_aero = METAS[aeroporto]
+    # ======================================================
+    # ⚙️ GERAÇÃO SOB DEMANDA (cache por arquivo + filtros)
+    # ======================================================
+    export_key = (
+        today.isoformat(),
+        tuple(sel_aero), tuple(sel_ano), tuple(sel_ind), tuple(sel_mes),
+    )
 
-                df_aero = df_base_status[df_base_status["aeroporto"] == aeroporto]
-                if df_aero.empty:
-                    continue
+    # visão padrão já aquecida → arquivos prontos sem clique
+    xlsx_pronto = warmed("xlsx_relatorio")
+    pend_pronto = warm.get(sha, "xlsx_pendencias", today)
+
+    st.caption("Formatos extras no ZIP (tabelas para Python/R/BI e PDF por aeroporto):")
+    cfa, cfb, cfc = st.columns(3)
+    with cfa:
+        inc_parquet = st.checkbox("Parquet", value=False, key="exp_parquet")
+    with cfb:
+        inc_csvgz = st.checkbox("CSV.gz", value=False, key="exp_csvgz")
+    with cfc:
+        inc_pdf = st.checkbox("PDF por aeroporto", value=False, key="exp_pdf")
+    formatos = tuple(f for f, on in (("parquet", inc_parquet), ("csv.gz", inc_csvgz)) if on)
+
+    pedidos = st.session_state.setdefault("export_pedidos", [])
+    solicitado = (sha, export_key) in pedidos or xlsx_pronto is not None
+
+    if not solicitado:
+        st.info("Os arquivos são gerados somente quando solicitados (e reaproveitados enquanto os filtros não mudarem).")
+        if st.button("⚙️ Gerar arquivos (XLSX + ZIP)", key="btn_gerar_exports"):
+            pedidos.append((sha, export_key))
+            del pedidos[:-8]
+            solicitado = True
+
+    if solicitado:
+        exports = export_queue()
+        job_key = (sha, export_key, formatos, inc_pdf)
+        job = exports.get(job_key)
+        retry = job is not None and job.status == ERRO and st.button("🔁 Tentar novamente", key="btn_export_retry")
+        if job is None or retry:
+            meta = {
+                "generated_at_utc": datetime.utcnow().isoformat() + "Z",
+                "today_local": today.isoformat(),
+                "source_name": source_name,
+                "hash_sha256": sha,
+                "filters": {"aeroporto": sel_aero, "ano": sel_ano, "indicador": sel_ind, "mes": sel_mes},
+                "rule": {"due_day": 10, "required_period": int(required_period), "due_date": due.isoformat()},
+                "counts": {
+                    "rows_filtered": int(len(df_f)),
+                    "eventos_filtered": int(total_eventos),
+                    "mov_filtered_sum_by_month": int(total_mov),
+                }
+            }
+            try:
+                # pedido idêntico de outra sessão → mesmo job
+                job = exports.submit(
+                    job_key, run_export, df_f, monthly, pend_df, meta,
+                    xlsx=xlsx_pronto, pend_xlsx=pend_pronto, formatos=formatos, pdf=inc_pdf,
+                )
+            except QueueFull:
+                job = None
+                st.warning("⏳ Muitas exportações em andamento no servidor. Tente novamente em instantes.")
+
+        # exportações rápidas (ex.: visão padrão já aquecida) saem sem passar pela barra
+        if job is not None and not job.wait(0.5):
+            @st.fragment(run_every=1.0)
+            def export_progress():
+                if job.done:
+                    st.rerun()
+                if job.status == FILA:
+                    st.progress(0.0, text=f"⏳ Na fila • {exports.position(job)} exportação(ões) antes desta")
+                else:
+                    st.progress(job.progress, text=f"📦 {job.etapa} • {job.progress:.0%} ({job.seconds:.0f} s)")
 
-                ok = True
-                falha = None
+            export_progress()
 
-                # ======================================================
-                # 🔄 LOOP POR INDICADOR
-                # ======================================================
-                for indicador, meta in metas_aero.items():
-
-                    # ⛔ RESPEITA FILTRO DE INDICADOR
-                    if indicadores_status is not None and indicador not in indicadores_status:
-                        continue
-
-                    valor = df_aero[df_aero["indicador"] == indicador]["eventos"].sum()
-
-                    if meta == 0:
-                        continue
-
-                    # 🔵 REGRA ESPECIAL — RELPREV (quanto MAIOR, melhor)
-                    if "RELPREV" in indicador.upper():
-                        if valor < meta:
-                            ok = False
-                            falha = {
-                                "indicador": indicador,
-                                "meta": meta,
-                                "valor": int(valor)
-                            }
-                            break
-
-                    # 🔴 REGRA PADRÃO — demais indicadores (quanto MENOR, melhor)
-                    else:
-                        if valor > meta:
-                            ok = False
-                            falha = {
-                                "indicador": indicador,
-                                "meta": meta,
-                                "valor": int(valor)
-                            }
-                            break
-
-                if ok:
-                    atingiram.append(aeroporto)
-                else:
-                    nao_atingiram.append({
-                        "aeroporto": aeroporto,
-                        **falha
-                    })
+        elif job is not None and job.status == ERRO:
+            st.error(f"❌ Falha ao gerar os arquivos: {job.error}")
 
-            # ======================================================
-            # 🎨 FUNÇÃO DE RENDERIZAÇÃO
-            # ======================================================
-            def bloco_aero(lista, titulo, cor_borda, cor_fundo, detalhado=False):
-
-                if not lista:
-                    return ""
-
-                cards = ""
-
-                for item in lista:
-
-                    if not detalhado:
-                        aero = item
-                        extra = ""
-                    else:
-                        aero = item["aeroporto"]
-                        extra = f"""
-                        <div style="font-size:12px; margin-top:6px;">
-                            Meta: <b>{fmt_int(item["meta"])}</b>
-                        </div>
-                        <div style="font-size:12px;">
-                            Realizado: <b>{fmt_int(item["valor"])}</b>
-                        </div>
-                        """
-
-                    cards += f"""
-                    <div class="status-card" style="
-                        border: 2px solid {cor_borda};
-                        background: {cor_fundo};
-                    ">
-                        <div class="status-aero">{aero}</div>
-                        {extra}
-                    </div>
-                    """
-
-                return f"""
-                <div class="status-group">
-                    <div class="status-title">{titulo}</div>
-                    <div class="status-grid">
-                        {cards}
-                    </div>
-                </div>
-                """
+        elif job is not None:
+            xlsx_bytes, zip_bytes, xlsx_stats = job.result
 
-            # ======================================================
-            # 🖼️ HTML FINAL
-            # ======================================================
-            status_html = f"""
-            <style>
-                .status-group {{
-                    margin-top: 18px;
-                    margin-bottom: 28px;
-                }}
-
-                .status-title {{
-                    font-size: 18px;
-                    font-weight: 1000;
-                    color: #1a2732;
-                    margin-bottom: 10px;
-                }}
-
-                .status-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fill, minmax(120px, 1fr));
-                    gap: 12px;
-                }}
-
-                .status-card {{
-                    border-radius: 14px;
-                    padding: 14px 10px;
-                    text-align: center;
-                    font-weight: 1000;
-                    box-shadow: 0 4px 10px rgba(0,0,0,0.06);
-                }}
-
-                .status-aero {{
-                    font-size: 16px;
-                    letter-spacing: 0.5px;
-                }}
-            </style>
-
-            {bloco_aero(atingiram, "🟢 Aeroportos que ficaram dentro das metas", "#96CE00", "#f1f8e9")}
-            {bloco_aero(nao_atingiram, "🔴 Aeroportos que extrapolaram as metas", "#ff5a5f", "#fdecea", detalhado=True)}
-            """
+            st.download_button(
+                "⬇️ Baixar relatório XLSX (filtros aplicados)",
+                data=xlsx_bytes,
+                file_name="IDSO_Relatorio.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
+            )
 
-            components.html(
-                f"""
-                <div style="width:100%; overflow: visible;">
-                    {status_html}
-                </div>
-                """,
-                height=520,
-                scrolling=True
+            st.download_button(
+                "📦 Baixar pacote ZIP (XLSX + pendências + metadados"
+                + "".join(f" + {f.upper()}" for f in formatos) + (" + PDF" if inc_pdf else "") + ")",
+                data=zip_bytes,
+                file_name="IDSO_Pacote.zip",
+                mime="application/zip",
+                on_click="ignore",
             )
 
-with tab3:
-    st.markdown("### 📦 Exportações")
-    st.caption("Relatório XLSX + pacote ZIP (inclui pendências e metadados).")
+            if xlsx_stats:
+                st.caption(
+                    f"📈 XLSX: {fmt_int(xlsx_stats['rows'])} linhas em {xlsx_stats['seconds']:.2f} s "
+                    f"({fmt_int(xlsx_stats['rows_per_s'])} linhas/s) • abas: {', '.join(xlsx_stats['sheets'])}"
+                )
 
-    sheets = {
-        "RAW_FILTRADO": df_f.drop(columns=["chave"], errors="ignore"),
-        "EVENTOS_MENSAL_AEROPORTO": monthly,
-        "TOTAL_EVENTOS_ANO": df_f.groupby("ano", as_index=False)["eventos"].sum().sort_values("ano"),
-        "TOTAL_EVENTOS_INDICADOR": df_f.groupby("indicador", as_index=False)["eventos"].sum().sort_values("eventos", ascending=False),
-    }
-    xlsx_bytes = df_to_excel_bytes(sheets)
+        if DEBUG:
+            st.caption("🧵 Fila de exportações: " + " • ".join(f"{k}: {v}" for k, v in exports.stats().items()))
 
-    st.download_button(
-        "⬇️ Baixar relatório XLSX (filtros aplicados)",
-        data=xlsx_bytes,
-        file_name="IDSO_Relatorio.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # ======================================================
+    # 🌐 SNAPSHOT HTML (arquivo único, abre sem internet)
+    # ======================================================
+    st.markdown("#### 🌐 Snapshot HTML")
+    st.caption("Cards, gráficos, ranking e metas da tela atual em um único .html (abre offline, sem o painel).")
 
-    meta = {
-        "generated_at_utc": datetime.utcnow().isoformat() + "Z",
-        "today_local": today.isoformat(),
-        "source_name": source_name,
-        "hash_sha256": sha,
-        "filters": {"aeroporto": sel_aero, "ano": sel_ano, "indicador": sel_ind, "mes": sel_mes},
-        "rule": {"due_day": 10, "required_period": int(required_period), "due_date": due.isoformat()},
-        "counts": {
-            "rows_filtered": int(len(df_f)),
-            "eventos_filtered": int(total_eventos),
-            "mov_filtered_sum_by_month": int(total_mov),
-        }
-    }
+    snapshot = st.session_state.get("snapshot_html")
+    if snapshot is not None and snapshot[0] != (sha, export_key):
+        snapshot = None
 
-    pend_export = pend_df.copy()
-    if not pend_export.empty:
-        pend_export["required_period_txt"] = pend_export["required_mes_abrev"].astype(str) + "/" + pend_export["required_ano"].astype(str)
-        pend_export = pend_export.sort_values(["is_ok","aeroporto"])
+    if st.button("🌐 Gerar snapshot HTML", key="btn_snapshot"):
+        with st.spinner("🌐 Montando snapshot…"):
+            filtros_txt = " • ".join(
+                f"{nome}: {', '.join(map(str, st.session_state[k]))}"
+                for nome, k in (("Aeroporto", "aero_sel"), ("Ano", "ano_sel"), ("Indicador", "ind_sel"), ("Mês", "mes_sel"))
+            )
+            snapshot = (
+                (sha, export_key),
+                build_snapshot_html(
+                    APP_TITLE, SNAPSHOT, build_css(font_data_url()),
+                    subtitulo=f"{source_name} • {today.strftime('%d/%m/%Y')} • {filtros_txt}",
+                ).encode("utf-8"),
+            )
+            st.session_state.snapshot_html = snapshot
+
+    if snapshot is not None:
+        st.download_button(
+            f"⬇️ Baixar snapshot HTML ({len(snapshot[1]) / 1024 / 1024:,.1f} MB)",
+            data=snapshot[1],
+            file_name="IDSO_Snapshot.html",
+            mime="text/html",
+            on_click="ignore",
+        )
 
-    zip_bytes = make_zip([
-        ("metadata.json", json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8")),
-        ("IDSO_Relatorio.xlsx", xlsx_bytes),
-        ("Pendencias_IDSO.xlsx", df_to_excel_bytes({"PENDENCIAS": pend_export})),
-    ])
+mark_stage("exportacoes")
 
-    st.download_button(
-        "📦 Baixar pacote ZIP (XLSX + pendências + metadados)",
-        data=zip_bytes,
-        file_name="IDSO_Pacote.zip",
-        mime="application/zip"
-    )
+# ======================================================
+# ⏱️ PERFIL DO RERUN (?profile=1 ou ?debug=1)
+# ======================================================
+if PROFILE:
+    total_ms = sum(dur for _, _, dur in STAGES) * 1000
+    historico = st.session_state.setdefault("profile_hist", [])
+    historico.append({
+        "em": datetime.now().isoformat(timespec="seconds"),
+        "sha": sha[:12],
+        "filtros": {k: list(map(str, st.session_state[k])) for k in ("ano_sel", "mes_sel", "aero_sel", "ind_sel")},
+        "total_ms": round(total_ms, 1),
+        "etapas": [
+            {"etapa": nome, "inicio_ms": round(ini * 1000, 1), "ms": round(dur * 1000, 1)}
+            for nome, ini, dur in STAGES
+        ],
+    })
+    del historico[:-PROFILE_HISTORY]
+
+    with st.expander(f"⏱️ Perfil do rerun: {fmt_int(total_ms)} ms", expanded=False):
+        st.plotly_chart(build_fig_profile(STAGES), use_container_width=True, key="fig_profile")
+
+        # últimos reruns × etapa (ms) — o mais recente em cima
+        tabela = pd.DataFrame(
+            [{"em": h["em"][11:], "total": h["total_ms"], **{e["etapa"]: e["ms"] for e in h["etapas"]}} for h in historico]
+        ).iloc[::-1]
+        st.caption(f"Histórico da sessão: {len(historico)} rerun(s) (máx. {PROFILE_HISTORY}) • 1ª linha = mediana por etapa")
+        st.dataframe(
+            pd.concat([tabela.drop(columns="em").median().to_frame().T.assign(em="mediana"), tabela])[tabela.columns]
+            .reset_index(drop=True),
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.download_button(
+            "⬇️ Baixar histórico (JSON)",
+            data=json.dumps(historico, ensure_ascii=False, indent=2).encode("utf-8"),
+            file_name=f"IDSO_Perfil_{sha[:12]}.json",
+            mime="application/json",
+            on_click="ignore",
+            key="btn_profile_json",
+        )
+
+# ======================================================
+# 🧠 DIAGNÓSTICO — MEMÓRIA (?debug=1; descarte com ?admin=<token>)
+# ======================================================
+def live_sessions():
+    """
+    ([(id, é_esta, estado, bytes de upload)], disponível) das sessões ativas.
+    Fora do servidor, ou sem a API interna (ver STREAMLIT_SESSOES_TESTADO), só a atual.
+    """
+    so_esta = [("atual", True, {k: st.session_state[k] for k in st.session_state.keys()}, None)]
+    infos = active_sessions()
+    if not infos:
+        return so_esta, infos is not None
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        atual = get_script_run_ctx().session_id
+        uploads = getattr(Runtime.instance().uploaded_file_mgr, "file_storage", {})
+        sessoes = []
+        for info in infos:
+            sessao = info.session
+            up = sum(len(rec.data) for rec in uploads.get(sessao.id, {}).values())
+            sessoes.append((sessao.id, sessao.id == atual, sessao.session_state.filtered_state, up))
+        return sessoes, True
+    except (ImportError, AttributeError):
+        return so_esta, False
+
+def cache_entries() -> list:
+    """Uma linha por entrada dos caches do processo: cache, dataset (sha), rótulo, bytes, hits e idade."""
+    linhas = []
+    for cache in all_caches():
+        for e in cache.entries():
+            chave = e["chave"]
+            rotulo = " • ".join(str(c)[:12] for c in chave) if isinstance(chave, tuple) else str(chave)[:12]
+            linhas.append((cache.nome, key_sha(chave), rotulo, e["bytes"], e["hits"], e["idade_s"] / 60))
+    return linhas
+
+def cache_summary() -> pd.DataFrame:
+    """Uso × orçamento e contadores de cada cache."""
+    linhas = []
+    for cache in all_caches():
+        s_ = cache.stats()
+        linhas.append({
+            "cache": s_["cache"],
+            "entradas": f"{s_['entradas']} / {s_['max_entradas'] or '∞'}",
+            "tamanho": f"{fmt_bytes(s_['bytes'])} / {fmt_bytes(s_['max_bytes']) if s_['max_bytes'] else '∞'}",
+            "ttl (h)": round(s_["ttl_s"] / 3600, 1) if s_["ttl_s"] else None,
+            "hits": s_["hits"],
+            "misses": s_["misses"],
+            "acerto %": round(100 * s_["taxa_acerto"], 1) if s_["taxa_acerto"] is not None else None,
+            **{f"desc. {m}": n for m, n in s_["descartes"].items()},
+            "cálculo (s)": s_["segundos_calculo"],
+        })
+    return pd.DataFrame(linhas)
+
+def evict_dataset(sha_alvo: str):
+    # tudo que foi derivado do arquivo: leitura, base preparada, pendências, pré-computação e exportações
+    warm.cancel(sha_alvo)
+    discard_dataset(sha_alvo)
+
+def evict_cache(nome: str):
+    get_cache(nome).clear()
+
+if DEBUG or ADMIN:
+    with st.expander(f"🧠 Memória do servidor: RSS {fmt_int(process_rss_mb())} MB", expanded=False):
+        # 1) base preparada desta sessão (compartilhada por quem usa o mesmo arquivo)
+        st.markdown("**Base preparada (arquivo atual)**")
+        st.caption(f"{fmt_int(len(df))} linhas • {fmt_bytes(deep_size(df))} (memória profunda, por coluna)")
+        st.dataframe(frame_memory(df), use_container_width=True, hide_index=True)
+
+        # 2) caches do processo (orçamento, acertos, descartes) e suas entradas
+        entradas = pd.DataFrame(
+            cache_entries(), columns=["cache", "sha", "entrada", "bytes", "hits", "idade (min)"]
+        )
+        st.markdown(f"**Caches** • total {fmt_bytes(entradas['bytes'].sum())}")
+        st.dataframe(cache_summary(), use_container_width=True, hide_index=True)
+        st.dataframe(
+            entradas.assign(tamanho=entradas["bytes"].map(fmt_bytes), **{"idade (min)": entradas["idade (min)"].round(1)})
+            .drop(columns=["sha", "bytes"]),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+        if arrow_store() is not None:
+            arquivos = arrow_store().entries()
+            st.caption(
+                f"🗂️ Arrow compartilhado ({ARROW_DIR}): {len(arquivos)} base(s) • "
+                f"{fmt_bytes(sum(b + g for _, b, g in arquivos))} mapeados entre os processos do host"
+            )
+
+        # 3) estado por sessão (session_state + arquivo enviado)
+        sessoes, sessoes_ok = live_sessions()
+        linhas_sessao = []
+        for sid, esta, estado, up in sessoes:
+            maiores = mapping_sizes(estado, top=3)
+            linhas_sessao.append({
+                "sessão": f"{sid[:8]}{' ← esta' if esta else ''}",
+                "chaves": len(estado),
+                "estado": fmt_bytes(sum(deep_size(v) for v in estado.values())),
+                "upload": fmt_bytes(up) if up is not None else "—",
+                "maiores chaves": ", ".join(f"{k} ({fmt_bytes(b)})" for k, b in maiores),
+            })
+        st.markdown(f"**Sessões ativas: {len(sessoes)}**")
+        if not sessoes_ok:
+            st.caption(
+                f"⚠️ Lista de sessões indisponível no streamlit {st.__version__} "
+                f"(API interna testada com {STREAMLIT_SESSOES_TESTADO}); mostrando só esta sessão."
+            )
+        st.dataframe(pd.DataFrame(linhas_sessao), use_container_width=True, hide_index=True)
+
+        # 4) descarte (somente administração)
+        if ADMIN:
+            st.markdown("**Descartar**")
+            shas = sorted({s for s in entradas["sha"].dropna() if isinstance(s, str)})
+            alvo = st.selectbox(
+                "Dataset (sha)", shas, key="mem_sha_alvo",
+                format_func=lambda s: f"{s[:12]}{' (arquivo atual)' if s == sha else ''}",
+            )
+            nomes = [c.nome for c in all_caches()]
+            c1, c2, c3 = st.columns(3)
+            with c1:
+                st.button("🗑️ Descartar dataset", key="btn_evict_sha", disabled=not shas,
+                          on_click=evict_dataset, args=(alvo,))
+            with c2:
+                cache_alvo = st.selectbox("Cache", nomes, key="mem_cache_alvo", label_visibility="collapsed")
+            with c3:
+                st.button("🧹 Limpar cache", key="btn_evict_cache", disabled=not nomes,
+                          on_click=evict_cache, args=(cache_alvo,))
+        else:
+            st.caption("Descarte de entradas: abra com ?admin=<IDSO_ADMIN_TOKEN>.")
+
+# ======================================================
+# 📈 MÉTRICAS DO RERUN (seções marcadas com mark_stage)
+# ======================================================
+METRICS.inc("idso_reruns_total")
+METRICS.observe("idso_rerun_seconds", time.perf_counter() - RERUN_T0)
+for nome, _, dur in STAGES:
+    METRICS.observe("idso_section_seconds", dur, secao=nome)
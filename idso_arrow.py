@@ -0,0 +1,148 @@
+# ======================================================
+# IDSO — BASE PREPARADA EM ARROW, MAPEADA EM MEMÓRIA (SEM STREAMLIT)
+# Com vários processos do Streamlit no mesmo host, cada um lia e guardava
+# a sua cópia da mesma base. Aqui a base preparada (e os agregados da
+# visão padrão) vira um arquivo Arrow IPC por sha256, escrito uma vez; os
+# processos abrem com memory_map e as colunas de texto, int64 e datas
+# apontam direto para as páginas do arquivo — o cache de páginas do SO é
+# compartilhado, então mais processos não multiplicam a memória, e um
+# processo novo abre a base sem ler o XLSX de novo.
+#
+# Em IDSO_ARROW_DIR:
+#   <sha>.arrow            base preparada (sem compressão: é o que permite zero-cópia)
+#   <sha>.agregados.arrow  uma linha por agregado: nome + tabela em IPC (binário)
+# Colunas Int64 (com nulos possíveis) são copiadas na conversão para o pandas.
+# ======================================================
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+EXT_BASE = ".arrow"
+EXT_AGREGADOS = ".agregados.arrow"
+
+# ======================================================
+# TABELAS
+# ======================================================
+def _write_table(tabela: pa.Table, caminho: str):
+    # grava ao lado e troca de uma vez: outro processo nunca mapeia um arquivo pela metade
+    tmp = f"{caminho}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with pa.OSFile(tmp, "wb") as fh:
+        with pa.ipc.new_file(fh, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(tmp, caminho)
+
+def _map_table(caminho: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+
+def _to_pandas(tabela: pa.Table) -> pd.DataFrame:
+    # split_blocks: uma coluna por bloco, sem consolidar (consolidar copiaria)
+    return tabela.to_pandas(split_blocks=True)
+
+def _ipc_bytes(df: pd.DataFrame) -> bytes:
+    tabela = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return sink.getvalue().to_pybytes()
+
+def write_frame(caminho: str, df: pd.DataFrame):
+    _write_table(pa.Table.from_pandas(df), caminho)
+
+def read_frame(caminho: str) -> pd.DataFrame:
+    return _to_pandas(_map_table(caminho))
+
+# ======================================================
+# LOJA POR SHA
+# ======================================================
+class ArrowStore:
+    """
+    Arquivos Arrow por sha numa pasta compartilhada entre processos.
+    - write(sha, df) / write_aggregates(sha, {nome: DataFrame})
+    - open(sha) → (df, {nome: DataFrame}) mapeados, ou None se não existe
+    - guarda no máximo max_files bases (as abertas há mais tempo saem)
+    """
+
+    def __init__(self, diretorio: str, max_files: int = 8):
+        self.diretorio = diretorio
+        self.max_files = max_files
+        os.makedirs(diretorio, exist_ok=True)
+
+    def path(self, sha: str, ext: str = EXT_BASE) -> str:
+        return os.path.join(self.diretorio, f"{sha}{ext}")
+
+    def __contains__(self, sha) -> bool:
+        return os.path.exists(self.path(sha))
+
+    def write(self, sha: str, df: pd.DataFrame):
+        write_frame(self.path(sha), df)
+        self._prune(manter=sha)
+
+    def has_aggregates(self, sha: str) -> bool:
+        return os.path.exists(self.path(sha, EXT_AGREGADOS))
+
+    def write_aggregates(self, sha: str, agregados: dict):
+        """Agregados (só DataFrames) num único arquivo; nomes em JSON (tuplas viram listas)."""
+        tabelas = {n: v for n, v in agregados.items() if isinstance(v, pd.DataFrame)}
+        if not tabelas or sha not in self:
+            return
+        _write_table(
+            pa.table({
+                "nome": [json.dumps(n, ensure_ascii=False) for n in tabelas],
+                "ipc": pa.array([_ipc_bytes(v) for v in tabelas.values()], type=pa.large_binary()),
+            }),
+            self.path(sha, EXT_AGREGADOS),
+        )
+
+    def open(self, sha: str):
+        try:
+            df = read_frame(self.path(sha))
+        except FileNotFoundError:
+            return None
+        os.utime(self.path(sha))        # "usada agora" para o descarte por idade
+        return df, self._open_aggregates(sha)
+
+    def _open_aggregates(self, sha) -> dict:
+        try:
+            tabela = _map_table(self.path(sha, EXT_AGREGADOS))
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return {}
+        agregados = {}
+        for nome, ipc in zip(tabela["nome"].to_pylist(), tabela["ipc"]):
+            nome = json.loads(nome)
+            # cada agregado é um IPC dentro do arquivo mapeado: lido sem copiar
+            agregados[tuple(nome) if isinstance(nome, list) else nome] = _to_pandas(
+                pa.ipc.open_file(ipc.as_buffer()).read_all()
+            )
+        return agregados
+
+    def discard(self, sha: str):
+        for ext in (EXT_BASE, EXT_AGREGADOS):
+            try:
+                os.remove(self.path(sha, ext))   # quem já mapeou segue lendo até soltar
+            except FileNotFoundError:
+                pass
+
+    def entries(self) -> list:
+        """[(sha, bytes da base, bytes dos agregados)] dos arquivos na pasta."""
+        linhas = []
+        for nome in sorted(os.listdir(self.diretorio)):
+            if nome.endswith(EXT_BASE) and not nome.endswith(EXT_AGREGADOS) and len(nome) == 64 + len(EXT_BASE):
+                sha = nome[:64]
+                agg = self.path(sha, EXT_AGREGADOS)
+                linhas.append((
+                    sha,
+                    os.path.getsize(self.path(sha)),
+                    os.path.getsize(agg) if os.path.exists(agg) else 0,
+                ))
+        return linhas
+
+    def _prune(self, manter=None):
+        if not self.max_files:
+            return
+        shas = [sha for sha, _, _ in self.entries() if sha != manter]
+        shas.sort(key=lambda s: os.path.getmtime(self.path(s)), reverse=True)
+        for sha in shas[max(self.max_files - 1, 0):]:
+            self.discard(sha)
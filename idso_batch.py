@@ -0,0 +1,206 @@
+# ======================================================
+# IDSO — GERAÇÃO EM LOTE (SEM STREAMLIT)
+# Um pacote XLSX + ZIP (e, opcionalmente, PDF e snapshot HTML) por aeroporto, em paralelo
+# (um processo por núcleo).
+#
+#   python idso_batch.py base.xlsx --saida pacotes/
+#   python idso_batch.py base.xlsx --aeroportos SBJU SBSP --formatos parquet csv.gz
+#   python idso_batch.py base.xlsx --pdf --html
+# ======================================================
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date
+
+import pandas as pd
+
+from idso_core import (
+    fmt_int,
+    read_workbook, prepare_idso, apply_filters, calc_pending_by_airport,
+    agg_monthly, metas_tabela,
+    export_sheets, pend_export_frame, build_package, COLUMNAR_FORMATS,
+)
+from idso_pdf import generate_reports
+from idso_snapshot import build_snapshot_html, airport_blocos
+from idso_views import build_css, font_data_url
+
+# base preparada de cada processo (recebida uma vez, no initializer)
+_DF = None
+
+def _init_worker(df: pd.DataFrame):
+    global _DF
+    _DF = df
+
+def gerar_aeroporto(aeroporto: str, saida: str, today: date, ano_meta: int,
+                    pend_aero: pd.DataFrame, meta_base: dict, formatos=(), extras=(),
+                    snapshot_css: str = None) -> dict:
+    """
+    Gera IDSO_Relatorio_<AERO>.xlsx e IDSO_Pacote_<AERO>.zip em saida/.
+    extras: membros adicionais do ZIP (ex.: o PDF já gravado em disco).
+    snapshot_css: se informado, gera também IDSO_Snapshot_<AERO>.html (vai no ZIP).
+    Devolve os tempos (s) de cada etapa para o resumo.
+    """
+    t0 = time.perf_counter()
+    extras = list(extras)
+    t_html = 0.0
+    if snapshot_css is not None:
+        html_path = Path(saida) / f"IDSO_Snapshot_{aeroporto}.html"
+        html_path.write_text(
+            build_snapshot_html(f"IDSO – {aeroporto}", airport_blocos(_DF, aeroporto, ano_meta), snapshot_css,
+                                subtitulo=f"Referência {today.strftime('%d/%m/%Y')} • metas {ano_meta}"),
+            encoding="utf-8",
+        )
+        extras.append((html_path.name, html_path))
+        t_html = time.perf_counter() - t0
+        t0 = time.perf_counter()
+    df_f = apply_filters(_DF, [aeroporto], None, None, None)
+    monthly = agg_monthly(df_f)
+    t_filtro = time.perf_counter()
+
+    sheets = export_sheets(df_f, monthly)
+    sheets["METAS"] = metas_tabela(df_f, aeroporto, ano_meta)
+    t_metas = time.perf_counter()
+
+    meta = dict(
+        meta_base,
+        filters={"aeroporto": [aeroporto], "ano": "Todos", "indicador": "Todos", "mes": "Todos"},
+        counts={
+            "rows_filtered": int(len(df_f)),
+            "eventos_filtered": int(df_f["eventos"].sum()),
+            "mov_filtered_sum_by_month": int(monthly["mov"].sum()) if not monthly.empty else 0,
+        },
+    )
+
+    zip_path = os.path.join(saida, f"IDSO_Pacote_{aeroporto}.zip")
+    with open(zip_path, "wb") as fh:
+        xlsx_bytes, _, stats = build_package(
+            sheets,
+            {"PENDENCIAS": pend_export_frame(pend_aero)},
+            meta,
+            formatos=formatos,
+            fh=fh,
+            extras=extras,
+        )
+    xlsx_path = os.path.join(saida, f"IDSO_Relatorio_{aeroporto}.xlsx")
+    with open(xlsx_path, "wb") as fh:
+        fh.write(xlsx_bytes)
+    t_fim = time.perf_counter()
+
+    return {
+        "aeroporto": aeroporto,
+        "linhas": int(len(df_f)),
+        "filtro_s": t_filtro - t0,
+        "metas_s": t_metas - t_filtro,
+        "xlsx_s": stats["seconds"] if stats else 0.0,
+        "pacote_s": t_fim - t_metas,
+        "html_s": t_html,
+        "total_s": t_fim - t0 + t_html,
+        "zip_bytes": os.path.getsize(zip_path),
+    }
+
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Gera um pacote IDSO (XLSX + ZIP) por aeroporto.")
+    ap.add_argument("planilha", help="planilha base do IDSO (.xlsx)")
+    ap.add_argument("--saida", default="pacotes_idso", help="pasta de destino (padrão: pacotes_idso)")
+    ap.add_argument("--aeroportos", nargs="*", help="somente estes aeroportos (padrão: todos)")
+    ap.add_argument("--hoje", type=date.fromisoformat, default=None, help="data de referência AAAA-MM-DD (padrão: hoje)")
+    ap.add_argument("--ano-meta", type=int, default=None, help="ano das metas (padrão: maior ano da base)")
+    ap.add_argument("--formatos", nargs="*", default=[], choices=sorted(COLUMNAR_FORMATS), help="formatos extras no ZIP")
+    ap.add_argument("--pdf", action="store_true", help="gera também o relatório PDF (incluído no ZIP)")
+    ap.add_argument("--html", action="store_true", help="gera também o snapshot HTML offline (incluído no ZIP)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos em paralelo (padrão: núcleos)")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    today = args.hoje or date.today()
+    t0 = time.perf_counter()
+
+    with open(args.planilha, "rb") as fh:
+        raw, sha = read_workbook(fh.read())
+    df = prepare_idso(raw)
+    t_ingest = time.perf_counter() - t0
+
+    aeroportos = sorted(df["aeroporto"].dropna().unique().tolist())
+    if args.aeroportos:
+        pedidos = [a.strip().upper() for a in args.aeroportos]
+        faltando = sorted(set(pedidos) - set(aeroportos))
+        if faltando:
+            print(f"⚠️ Sem dados para: {', '.join(faltando)}", file=sys.stderr)
+        aeroportos = [a for a in aeroportos if a in pedidos]
+    if not aeroportos:
+        print("Nenhum aeroporto para gerar.", file=sys.stderr)
+        return 1
+
+    ano_meta = args.ano_meta or int(df["ano"].dropna().astype(int).max())
+    pend_df, required_period, due = calc_pending_by_airport(df, today)
+    meta_base = {
+        "generated_at_utc": datetime.utcnow().isoformat() + "Z",
+        "today_local": today.isoformat(),
+        "source_name": os.path.basename(args.planilha),
+        "hash_sha256": sha,
+        "rule": {"due_day": 10, "required_period": int(required_period), "due_date": due.isoformat()},
+        "metas": {"ano": ano_meta},
+    }
+
+    os.makedirs(args.saida, exist_ok=True)
+    workers = max(1, min(args.workers, len(aeroportos)))
+    resultados = []
+
+    # ======================================================
+    # 📄 PDFs (gráficos em paralelo + cache por hash dos dados)
+    # ======================================================
+    pdfs = {}
+    t_pdf = 0.0
+    if args.pdf:
+        t = time.perf_counter()
+        for aero, conteudo in generate_reports(df, aeroportos, ano_meta, pend_df, meta_base, workers=workers).items():
+            caminho = Path(args.saida) / f"IDSO_Relatorio_{aero}.pdf"
+            caminho.write_bytes(conteudo)
+            pdfs[aero] = [(f"IDSO_Relatorio_{aero}.pdf", caminho)]
+        t_pdf = time.perf_counter() - t
+
+    # CSS do snapshot (com a fonte embutida) montado uma vez e repassado aos processos
+    snapshot_css = build_css(font_data_url()) if args.html else None
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+        futuros = {
+            pool.submit(
+                gerar_aeroporto, aero, args.saida, today, ano_meta,
+                pend_df[pend_df["aeroporto"] == aero], meta_base, tuple(args.formatos),
+                pdfs.get(aero, ()), snapshot_css,
+            ): aero
+            for aero in aeroportos
+        }
+        for fut in as_completed(futuros):
+            try:
+                resultados.append(fut.result())
+            except Exception as e:
+                print(f"❌ {futuros[fut]}: {e}", file=sys.stderr)
+
+    total = time.perf_counter() - t0
+
+    # ======================================================
+    # ⏱️ RESUMO POR AEROPORTO
+    # ======================================================
+    print(f"{'AEROPORTO':<10}{'LINHAS':>10}{'HTML':>9}{'FILTRO':>9}{'METAS':>9}{'XLSX':>9}{'PACOTE':>9}{'TOTAL':>9}{'ZIP (KB)':>11}")
+    for r in sorted(resultados, key=lambda r: r["total_s"], reverse=True):
+        print(
+            f"{r['aeroporto']:<10}{fmt_int(r['linhas']):>10}{r['html_s']:>8.2f}s"
+            f"{r['filtro_s']:>8.2f}s{r['metas_s']:>8.2f}s{r['xlsx_s']:>8.2f}s"
+            f"{r['pacote_s']:>8.2f}s{r['total_s']:>8.2f}s{r['zip_bytes'] / 1024:>11,.1f}"
+        )
+    soma = sum(r["total_s"] for r in resultados)
+    if args.pdf:
+        print(f"\n📄 {len(pdfs)} PDF(s) em {t_pdf:.2f} s")
+    print(
+        f"\n{len(resultados)}/{len(aeroportos)} pacote(s) em {total:.2f} s "
+        f"(leitura {t_ingest:.2f} s • {workers} processo(s) • soma por aeroporto {soma:.2f} s) → {args.saida}"
+    )
+    return 0 if len(resultados) == len(aeroportos) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
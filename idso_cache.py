@@ -0,0 +1,242 @@
+# ======================================================
+# IDSO — GOVERNANÇA DE CACHE (SEM STREAMLIT)
+# Um cache por estágio (leitura, base preparada, pendências, agregados,
+# figuras, exportações), todos no mesmo processo e compartilhados entre
+# sessões. Cada um tem orçamento de entradas e de MB (LRU), TTL e
+# contadores de acerto/falta/descarte — a memória do servidor fica
+# estável por semanas em vez de crescer a cada arquivo enviado.
+#
+# Orçamentos: ORCAMENTOS abaixo; por ambiente, IDSO_CACHE_<NOME>_ENTRIES,
+# IDSO_CACHE_<NOME>_MB e IDSO_CACHE_<NOME>_TTL (segundos; 0 = sem limite).
+# ======================================================
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from idso_memory import deep_size
+
+# padrão por estágio: entradas, MB e TTL (s). None = sem limite
+ORCAMENTOS = {
+    "ingest":      {"max_entries": 2,   "max_mb": 512,  "ttl_s": 60 * 60},
+    "preparado":   {"max_entries": 4,   "max_mb": 1024, "ttl_s": 12 * 60 * 60},
+    "pendencias":  {"max_entries": 32,  "max_mb": 64,   "ttl_s": 24 * 60 * 60},
+    "agregados":   {"max_entries": 256, "max_mb": 256,  "ttl_s": 12 * 60 * 60},
+    "figuras":     {"max_entries": 256, "max_mb": 256,  "ttl_s": 12 * 60 * 60},
+    "exportacoes": {"max_entries": 16,  "max_mb": 512,  "ttl_s": 2 * 60 * 60},
+}
+
+MOTIVOS = ("lru", "bytes", "ttl", "manual")
+
+def key_sha(chave):
+    """sha do arquivo de origem de uma chave (todas começam por ele)."""
+    return chave if isinstance(chave, str) else chave[0] if isinstance(chave, tuple) and chave else None
+
+# ======================================================
+# CACHE LIMITADO
+# ======================================================
+class _Entrada:
+    __slots__ = ("valor", "bytes", "criada", "usada", "hits")
+
+    def __init__(self, valor, tamanho):
+        self.valor = valor
+        self.bytes = tamanho
+        self.criada = self.usada = time.monotonic()
+        self.hits = 0
+
+class BoundedCache:
+    """
+    LRU com teto de entradas e de bytes, TTL por entrada (desde a criação)
+    e contadores. get_or_compute calcula uma vez por chave: quem chega
+    durante o cálculo espera o resultado em vez de recalcular.
+    """
+
+    def __init__(self, nome, max_entries=None, max_bytes=None, ttl=None, sizer=deep_size):
+        self.nome = nome
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizer = sizer
+        self.lock = threading.RLock()
+        self._dados = OrderedDict()         # chave -> _Entrada (mais antiga primeiro)
+        self._calculando = {}               # chave -> Lock do cálculo em andamento
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.descartes = defaultdict(int)   # motivo -> quantidade
+        self.segundos_calculo = 0.0
+
+    # ---------- leitura / escrita ----------
+    def get(self, chave, default=None):
+        with self.lock:
+            entrada = self._dados.get(chave)
+            if entrada is not None and self._expirada(entrada, time.monotonic()):
+                self._remove(chave, "ttl")
+                entrada = None
+            if entrada is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            entrada.hits += 1
+            entrada.usada = time.monotonic()
+            self._dados.move_to_end(chave)
+            return entrada.valor
+
+    def put(self, chave, valor):
+        tamanho = self.sizer(valor) if self.sizer else 0
+        with self.lock:
+            if chave in self._dados:
+                self._remove(chave, None)
+            self._dados[chave] = _Entrada(valor, tamanho)
+            self.bytes += tamanho
+            self._enforce(manter=chave)
+        return valor
+
+    def get_or_compute(self, chave, fn):
+        sentinela = object()
+        valor = self.get(chave, sentinela)
+        if valor is not sentinela:
+            return valor
+        with self.lock:
+            trava = self._calculando.setdefault(chave, threading.Lock())
+        with trava:
+            # outra sessão pode ter calculado enquanto esperávamos
+            with self.lock:
+                entrada = self._dados.get(chave)
+                if entrada is not None and not self._expirada(entrada, time.monotonic()):
+                    self.misses -= 1            # a falta de antes virou acerto
+                    self.hits += 1
+                    entrada.hits += 1
+                    return entrada.valor
+            t0 = time.perf_counter()
+            try:
+                valor = fn()
+                # grava antes de liberar a trava: quem acorda já encontra o valor
+                self.put(chave, valor)
+            finally:
+                with self.lock:
+                    self.segundos_calculo += time.perf_counter() - t0
+                    self._calculando.pop(chave, None)
+            return valor
+
+    def peek(self, chave, default=None):
+        """Lê sem contar acerto/falta nem mexer na ordem LRU (diagnóstico, polling)."""
+        with self.lock:
+            entrada = self._dados.get(chave)
+            if entrada is None or self._expirada(entrada, time.monotonic()):
+                return default
+            return entrada.valor
+
+    def __contains__(self, chave):
+        with self.lock:
+            entrada = self._dados.get(chave)
+            return entrada is not None and not self._expirada(entrada, time.monotonic())
+
+    # ---------- descarte ----------
+    def discard(self, chave) -> bool:
+        with self.lock:
+            if chave not in self._dados:
+                return False
+            self._remove(chave, "manual")
+            return True
+
+    def discard_where(self, pred) -> int:
+        with self.lock:
+            alvos = [k for k in self._dados if pred(k)]
+            for k in alvos:
+                self._remove(k, "manual")
+            return len(alvos)
+
+    def clear(self) -> int:
+        return self.discard_where(lambda _: True)
+
+    def expire(self) -> int:
+        """Remove as entradas vencidas (o painel chama a cada rerun)."""
+        agora = time.monotonic()
+        with self.lock:
+            vencidas = [k for k, e in self._dados.items() if self._expirada(e, agora)]
+            for k in vencidas:
+                self._remove(k, "ttl")
+            return len(vencidas)
+
+    def _expirada(self, entrada, agora) -> bool:
+        return bool(self.ttl) and agora - entrada.criada > self.ttl
+
+    def _remove(self, chave, motivo):
+        entrada = self._dados.pop(chave)
+        self.bytes -= entrada.bytes
+        if motivo:
+            self.descartes[motivo] += 1
+
+    def _enforce(self, manter=None):
+        # LRU: sai a menos usada; a entrada recém-gravada nunca sai (mesmo sozinha acima do teto)
+        self.expire()
+        while self.max_entries and len(self._dados) > self.max_entries:
+            self._remove(next(k for k in self._dados if k != manter), "lru")
+        while self.max_bytes and self.bytes > self.max_bytes and len(self._dados) > 1:
+            self._remove(next(k for k in self._dados if k != manter), "bytes")
+
+    # ---------- observação ----------
+    def entries(self) -> list:
+        """Entradas da mais antiga para a mais recente (para o diagnóstico)."""
+        agora = time.monotonic()
+        with self.lock:
+            return [
+                {
+                    "chave": chave, "bytes": e.bytes, "hits": e.hits,
+                    "idade_s": agora - e.criada, "ociosa_s": agora - e.usada,
+                }
+                for chave, e in self._dados.items()
+            ]
+
+    def stats(self) -> dict:
+        with self.lock:
+            consultas = self.hits + self.misses
+            return {
+                "cache": self.nome,
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": round(self.hits / consultas, 3) if consultas else None,
+                "descartes": {m: self.descartes.get(m, 0) for m in MOTIVOS},
+                "segundos_calculo": round(self.segundos_calculo, 3),
+            }
+
+# ======================================================
+# REGISTRO DO PROCESSO
+# ======================================================
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def _budget(nome, chave, padrao, fator=1):
+    valor = os.environ.get(f"IDSO_CACHE_{nome.upper()}_{chave}")
+    if valor is None:
+        return None if padrao is None else int(padrao * fator)
+    return int(float(valor) * fator) or None
+
+def get_cache(nome: str, sizer=deep_size) -> BoundedCache:
+    """O cache do estágio `nome` (criado na primeira chamada, com os orçamentos de ORCAMENTOS/ambiente)."""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(nome)
+        if cache is None:
+            padrao = ORCAMENTOS.get(nome, {})
+            cache = _CACHES[nome] = BoundedCache(
+                nome,
+                max_entries=_budget(nome, "ENTRIES", padrao.get("max_entries")),
+                max_bytes=_budget(nome, "MB", padrao.get("max_mb"), 1024 * 1024),
+                ttl=_budget(nome, "TTL", padrao.get("ttl_s")),
+                sizer=sizer,
+            )
+        return cache
+
+def all_caches() -> list:
+    with _CACHES_LOCK:
+        return list(_CACHES.values())
+
+def discard_dataset(sha: str) -> int:
+    """Remove de todos os caches o que veio do arquivo `sha`."""
+    return sum(c.discard_where(lambda k: key_sha(k) == sha) for c in all_caches())
@@ -0,0 +1,1014 @@
+# ======================================================
+# IDSO — NÚCLEO SEM STREAMLIT
+# Leitura, preparação, filtros, pendências, metas e exportação.
+# Usado pelo painel (idso_app_final_unico.py) e pela geração em lote
+# (idso_batch.py); nada aqui depende de sessão ou de st.*
+# ======================================================
+import hashlib
+import json
+import os
+import time
+from functools import partial
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+from datetime import datetime, date
+
+import pandas as pd
+
+# ======================================================
+# MAPAS / CONSTANTES
+# ======================================================
+RENAME = {
+    "AEROPORTO": "aeroporto",
+    "ANO": "ano",
+    "MÊS": "mes",
+    "Nº DE EVENTOS": "eventos",
+    "MOVIMENTAÇÃO (P + D)": "mov",
+    "OrdemMes": "ordem_mes",
+    "OrdemAno": "ordem_ano",
+    "Indicador": "indicador",
+    "Criado": "criado_em",
+    "Criado por": "criado_por",
+}
+
+MESES_MAP = {
+    "JANEIRO": 1, "FEVEREIRO": 2, "MARÇO": 3, "MARCO": 3, "ABRIL": 4, "MAIO": 5, "JUNHO": 6,
+    "JULHO": 7, "AGOSTO": 8, "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12
+}
+MESES_ABREV = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
+ORDEM_MESES_ABREV = ["Jan","Fev","Mar","Abr","Mai","Jun","Jul","Ago","Set","Out","Nov","Dez"]
+
+# ======================================================
+# FUNÇÕES UTILITÁRIAS
+# ======================================================
+def fmt_int(x):
+    try:
+        return f"{int(x):,}".replace(",", ".")
+    except Exception:
+        return "0"
+
+def fmt_pct(x, digits=0):
+    try:
+        return f"{x*100:+.{digits}f}%"
+    except Exception:
+        return "—"
+
+# quebra de texto para rótulos longos
+def quebra_texto(s, max_len=18):
+    palavras = s.split()
+    linhas = []
+    atual = ""
+    for p in palavras:
+        if len(atual) + len(p) <= max_len:
+            atual = (atual + " " + p).strip()
+        else:
+            linhas.append(atual)
+            atual = p
+    if atual:
+        linhas.append(atual)
+    return "<br>".join(linhas)
+
+# ======================================================
+# XLSX EM STREAMING (memória constante)
+# ======================================================
+EXCEL_MAX_ROWS = 1_048_576                   # limite do Excel (inclui o cabeçalho)
+XLSX_CHUNK_ROWS = 50_000                     # linhas convertidas por vez
+XLSX_SPOOL_MAX = 32 * 1024 * 1024            # acima disso o arquivo vai para disco
+XLSX_PROGRESS_ROWS = 5_000                   # intervalo (linhas) entre avisos de progresso
+
+def _sheet_names(name, n_parts):
+    base = str(name)[:31]
+    if n_parts == 1:
+        return [base]
+    nomes = []
+    for i in range(1, n_parts + 1):
+        sufixo = f"_{i}"
+        nomes.append(str(name)[:31 - len(sufixo)] + sufixo)
+    return nomes
+
+def _xlsx_rows(df_: pd.DataFrame, start: int, stop: int, chunk_rows: int):
+    for i in range(start, stop, chunk_rows):
+        chunk = df_.iloc[i:min(i + chunk_rows, stop)]
+        for col in chunk.columns:
+            # openpyxl não aceita datetime com fuso
+            if isinstance(chunk[col].dtype, pd.DatetimeTZDtype):
+                chunk = chunk.assign(**{col: chunk[col].dt.tz_localize(None)})
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+def write_xlsx_stream(sheets: dict, fh, chunk_rows: int = XLSX_CHUNK_ROWS, progress=None) -> dict:
+    """
+    Escreve as planilhas linha a linha (openpyxl write_only) direto em fh.
+    Abas acima do limite do Excel viram NOME_1, NOME_2, ...
+    progress: função opcional (linhas_escritas, linhas_totais).
+    Devolve estatísticas de escrita (linhas, segundos, linhas/s, abas).
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    t0 = time.perf_counter()
+    wb = Workbook(write_only=True)
+
+    # mesmo cabeçalho que o pandas.to_excel gera
+    lado = Side(style="thin")
+    header_font = Font(bold=True)
+    header_border = Border(left=lado, right=lado, top=lado, bottom=lado)
+    header_align = Alignment(horizontal="center", vertical="top")
+
+    max_data_rows = EXCEL_MAX_ROWS - 1
+    total_rows = 0
+    abas = []
+    linhas_totais = sum(len(df_) for df_ in sheets.values())
+
+    for name, df_ in sheets.items():
+        n = len(df_)
+        n_parts = max(1, -(-n // max_data_rows))
+        for part, sheet_name in enumerate(_sheet_names(name, n_parts)):
+            ws = wb.create_sheet(title=sheet_name)
+            header = []
+            for col in df_.columns:
+                cell = WriteOnlyCell(ws, value=str(col))
+                cell.font = header_font
+                cell.border = header_border
+                cell.alignment = header_align
+                header.append(cell)
+            ws.append(header)
+
+            start = part * max_data_rows
+            stop = min(start + max_data_rows, n)
+            for i, row in enumerate(_xlsx_rows(df_, start, stop, chunk_rows), 1):
+                ws.append(row)
+                if progress is not None and i % XLSX_PROGRESS_ROWS == 0:
+                    progress(total_rows + i, linhas_totais)
+            total_rows += stop - start
+            abas.append(sheet_name)
+            if progress is not None:
+                progress(total_rows, linhas_totais)
+
+    if not abas:
+        wb.create_sheet(title="Sheet1")
+
+    wb.save(fh)
+    seconds = time.perf_counter() - t0
+    return {
+        "rows": int(total_rows),
+        "seconds": round(seconds, 3),
+        "rows_per_s": int(total_rows / seconds) if seconds > 0 else 0,
+        "sheets": abas,
+    }
+
+def xlsx_bytes_with_stats(sheets: dict, progress=None):
+    with SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX) as fh:
+        stats = write_xlsx_stream(sheets, fh, progress=progress)
+        fh.seek(0)
+        return fh.read(), stats
+
+def df_to_excel_bytes(sheets: dict) -> bytes:
+    return xlsx_bytes_with_stats(sheets)[0]
+
+# ======================================================
+# ZIP EM STREAMING (store × deflate por membro)
+# ======================================================
+# formatos que já são comprimidos: deflate de novo só gasta CPU
+ZIP_STORED_EXT = (".xlsx", ".parquet", ".gz", ".zip", ".png", ".jpg", ".jpeg", ".pdf")
+ZIP_SPOOL_MAX = 64 * 1024 * 1024
+
+def zip_compression(name: str) -> int:
+    return ZIP_STORED if str(name).lower().endswith(ZIP_STORED_EXT) else ZIP_DEFLATED
+
+def write_zip_stream(files, fh, progress=None) -> None:
+    """
+    Escreve o ZIP direto em fh, um membro por vez. Cada membro é
+    (nome, conteúdo), onde conteúdo pode ser:
+      • bytes/str            → gravado como está
+      • Path (os.PathLike)   → lido do disco pelo próprio zipfile
+      • função sem argumento → chamada só na hora de gravar (bytes ou iterável de bytes)
+      • iterável de bytes    → gravado em blocos
+    Assim nenhum membro precisa existir em memória antes da sua vez.
+    progress: função opcional (membros_gravados, membros_totais, nome).
+    """
+    files = list(files)
+    with ZipFile(fh, "w", compression=ZIP_DEFLATED, allowZip64=True) as zf:
+        for n, (name, content) in enumerate(files):
+            if progress is not None:
+                progress(n, len(files), name)
+            compress = zip_compression(name)
+            if isinstance(content, os.PathLike):
+                zf.write(content, arcname=name, compress_type=compress)
+                continue
+            if callable(content):
+                content = content()
+            if isinstance(content, (bytes, bytearray, memoryview, str)):
+                zf.writestr(name, content, compress_type=compress)
+                continue
+            info = ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = compress
+            with zf.open(info, "w", force_zip64=True) as dst:
+                for chunk in content:
+                    dst.write(chunk)
+            content = None
+
+def make_zip(files, progress=None) -> bytes:
+    # compatibilidade: mesmo resultado em bytes, montado num arquivo temporário
+    with SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX) as fh:
+        write_zip_stream(files, fh, progress=progress)
+        fh.seek(0)
+        return fh.read()
+
+# ======================================================
+# FORMATOS COLUNARES (PARQUET / CSV.GZ)
+# ======================================================
+COLUMNAR_FORMATS = {
+    "parquet": ("parquet", ".parquet"),
+    "csv.gz": ("csv", ".csv.gz"),
+}
+
+def table_schema(df_: pd.DataFrame) -> dict:
+    return {str(c): str(t) for c, t in df_.dtypes.items()}
+
+def _parquet_ready(df_: pd.DataFrame) -> pd.DataFrame:
+    # colunas object com tipos misturados (comum em planilhas) quebram o pyarrow
+    # sempre sobre uma cópia rasa: df_ pode ser a base compartilhada do cache
+    out = df_.set_axis([str(c) for c in df_.columns], axis=1)
+    for col, nome in zip(df_.columns, out.columns):
+        if df_[col].dtype == object:
+            tipos = {type(v) for v in df_[col].dropna().head(10_000)}
+            if len(tipos) > 1:
+                out[nome] = df_[col].map(lambda v: None if pd.isna(v) else str(v))
+    return out
+
+def table_to_parquet_bytes(df_: pd.DataFrame) -> bytes:
+    bio = BytesIO()
+    _parquet_ready(df_).to_parquet(bio, index=False, compression="zstd")
+    return bio.getvalue()
+
+def table_to_csv_gz_bytes(df_: pd.DataFrame) -> bytes:
+    bio = BytesIO()
+    # mtime fixo → mesmo conteúdo gera o mesmo arquivo
+    df_.to_csv(bio, index=False, encoding="utf-8", compression={"method": "gzip", "mtime": 0})
+    return bio.getvalue()
+
+def columnar_files(tables: dict, formatos) -> tuple:
+    """
+    Gera os membros colunares do ZIP (pasta por formato, um arquivo por
+    tabela) e a descrição de cada arquivo para o metadata.json.
+    """
+    writers = {"parquet": table_to_parquet_bytes, "csv.gz": table_to_csv_gz_bytes}
+    files, info = [], {}
+    for fmt in formatos:
+        pasta, ext = COLUMNAR_FORMATS[fmt]
+        for name, df_ in tables.items():
+            arq = f"{pasta}/{name}{ext}"
+            files.append((arq, partial(writers[fmt], df_)))   # gerado só na hora de entrar no ZIP
+            info[arq] = {"format": fmt, "rows": int(len(df_)), "schema": table_schema(df_)}
+    return files, info
+
+# ======================================================
+# LEITURA + PREPARAÇÃO
+# ======================================================
+def read_workbook(file_bytes: bytes):
+    sha = hashlib.sha256(file_bytes).hexdigest()
+    df = pd.read_excel(BytesIO(file_bytes))
+    return df, sha
+
+def prepare_idso(df_raw: pd.DataFrame) -> pd.DataFrame:
+    df = df_raw.rename(columns=RENAME).copy()
+
+    for c in ["aeroporto", "indicador", "mes", "ano", "eventos", "mov"]:
+        if c not in df.columns:
+            df[c] = pd.NA
+
+    df["aeroporto"] = df["aeroporto"].astype(str).str.strip().str.upper()
+    df["indicador"] = df["indicador"].astype(str).str.strip()
+    df["mes"] = df["mes"].astype(str).str.strip()
+
+    df["ano"] = pd.to_numeric(df["ano"], errors="coerce").astype("Int64")
+    df["eventos"] = pd.to_numeric(df["eventos"], errors="coerce").fillna(0).astype(int)
+    df["mov"] = pd.to_numeric(df["mov"], errors="coerce").fillna(0).astype(int)
+
+    df["ordem_mes"] = pd.to_numeric(df.get("ordem_mes", pd.NA), errors="coerce").astype("Int64")
+    mes_upper = df["mes"].astype(str).str.upper().str.strip()
+    mes_from_name = mes_upper.map(MESES_MAP).astype("Int64")
+    invalid = (df["ordem_mes"].isna()) | (~df["ordem_mes"].between(1, 12))
+    df.loc[invalid, "ordem_mes"] = mes_from_name[invalid]
+
+    df = df[df["ordem_mes"].between(1, 12, inclusive="both")].copy()
+    df["mes_abrev"] = df["ordem_mes"].map(MESES_ABREV)
+
+    if "criado_em" in df.columns:
+        df["criado_em"] = pd.to_datetime(df["criado_em"], errors="coerce")
+
+    df["chave"] = (
+        df["aeroporto"].astype(str) + "|" +
+        df["ano"].astype(str) + "|" +
+        df["ordem_mes"].astype(str) + "|" +
+        df["indicador"].astype(str)
+    )
+    return df
+
+def apply_filters(df: pd.DataFrame, sel_aero, sel_ano, sel_ind, sel_mes_abrev):
+    d = df.copy()
+    if sel_aero: d = d[d["aeroporto"].isin(sel_aero)]
+    if sel_ano: d = d[d["ano"].isin(sel_ano)]
+    if sel_ind: d = d[d["indicador"].isin(sel_ind)]
+    if sel_mes_abrev: d = d[d["mes_abrev"].isin(sel_mes_abrev)]
+    return d
+
+def default_view_frame(df: pd.DataFrame, mes_base=None) -> pd.DataFrame:
+    """
+    Recorte da visão padrão ("Todos" em todos os filtros) — o mesmo de
+    apply_filters com as opções de filter_options — sem copiar a base:
+    sem linhas a descartar, devolve o próprio df (somente leitura).
+    """
+    if mes_base is None:
+        mes_base = filter_options(df)[3]
+    manter = df[["aeroporto", "ano", "indicador"]].notna().all(axis=1) & df["mes_abrev"].isin(mes_base)
+    return df if manter.all() else df[manter]
+
+def prev_month(today: date):
+    if today.month == 1:
+        return today.year - 1, 12
+    return today.year, today.month - 1
+
+def due_date_for_period(today: date):
+    return date(today.year, today.month, 10)
+
+def period_to_int(y: int, m: int) -> int:
+    return y * 100 + m
+
+def int_to_period(p: int):
+    return p // 100, p % 100
+
+def add_months(y: int, m: int, delta: int):
+    for _ in range(delta):
+        m += 1
+        if m == 13:
+            m = 1
+            y += 1
+    return y, m
+
+def calc_pending_by_airport(df_all: pd.DataFrame, today: date):
+    req_y, req_m = prev_month(today)
+    required = period_to_int(req_y, req_m)
+    due = due_date_for_period(today)
+
+    rows = []
+    base = df_all.dropna(subset=["ano", "ordem_mes"]).copy()
+    if base.empty:
+        return pd.DataFrame(columns=[
+            "aeroporto","required_period","required_ano","required_mes","required_mes_abrev",
+            "due_date","days_from_due","is_overdue","is_ok","missing_months","last_period"
+        ]), required, due
+
+    for aero, g in base.groupby("aeroporto"):
+        g = g.copy()
+        g["period"] = g["ano"].astype(int) * 100 + g["ordem_mes"].astype(int)
+        last_period = int(g["period"].max())
+        ok = last_period >= required
+
+        missing_months = 0
+        if not ok:
+            ly, lm = int_to_period(last_period)
+            diff = 0
+            cy, cm = ly, lm
+            while period_to_int(cy, cm) < required and diff < 60:
+                cy, cm = add_months(cy, cm, 1)
+                diff += 1
+            missing_months = diff
+
+        days = (today - due).days
+        rows.append({
+            "aeroporto": aero,
+            "required_period": required,
+            "required_ano": req_y,
+            "required_mes": req_m,
+            "required_mes_abrev": MESES_ABREV.get(req_m, str(req_m)),
+            "due_date": due.isoformat(),
+            "days_from_due": int(days),
+            "is_overdue": bool(today > due),
+            "is_ok": bool(ok),
+            "missing_months": int(missing_months),
+            "last_period": int(last_period),
+        })
+    return pd.DataFrame(rows), required, due
+
+def pending_only(pend_df: pd.DataFrame, aeroportos) -> pd.DataFrame:
+    """Aeroportos do recorte com o período exigido em aberto (mais meses em atraso primeiro)."""
+    if pend_df.empty:
+        return pend_df
+    view = pend_df[pend_df["aeroporto"].isin(aeroportos)]
+    if view.empty:
+        return view
+    return view[~view["is_ok"].astype(bool)].sort_values(["missing_months", "aeroporto"], ascending=[False, True])
+
+# ======================================================
+# OPÇÕES DE FILTRO + AGREGAÇÕES BÁSICAS
+# ======================================================
+ANO_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#17becf"]
+
+def filter_options(df: pd.DataFrame):
+    aero_base = sorted(df["aeroporto"].dropna().unique().tolist())
+    ano_base = sorted(
+        [int(x) for x in df["ano"].dropna().unique().tolist()],
+        reverse=True
+    )
+    ind_base = sorted(df["indicador"].dropna().unique().tolist())
+    mes_exist = (
+        df[["ordem_mes", "mes_abrev"]]
+        .dropna()
+        .drop_duplicates()
+        .sort_values("ordem_mes")
+    )
+    mes_base = [m for m in ORDEM_MESES_ABREV if m in mes_exist["mes_abrev"].tolist()]
+    return aero_base, ano_base, ind_base, mes_base
+
+def agg_monthly(df_f: pd.DataFrame) -> pd.DataFrame:
+    if df_f.empty:
+        return pd.DataFrame(columns=["aeroporto","ano","ordem_mes","mes_abrev","eventos","mov"])
+    return (
+        df_f.groupby(["aeroporto","ano","ordem_mes","mes_abrev"], as_index=False)
+        .agg(eventos=("eventos","sum"), mov=("mov","max"))
+        .sort_values(["aeroporto","ordem_mes","ano"])
+    )
+
+def agg_eventos_mes(df_f: pd.DataFrame) -> pd.DataFrame:
+    ser = (
+        df_f
+        .groupby(["ano", "ordem_mes", "mes_abrev"], as_index=False)["eventos"]
+        .sum()
+        .sort_values(["ano", "ordem_mes"])
+    )
+    ser["mes_abrev"] = pd.Categorical(
+        ser["mes_abrev"],
+        categories=ORDEM_MESES_ABREV,
+        ordered=True
+    )
+    return ser
+
+def kpi_values(df_f: pd.DataFrame) -> dict:
+    """Cards do topo: aeroportos, indicadores, eventos e movimentações (soma mensal por aeroporto)."""
+    if df_f.empty:
+        return {"aeroportos": 0, "indicadores": 0, "eventos": 0, "mov": 0}
+    mov_month = df_f.groupby(["aeroporto","ano","ordem_mes"], as_index=False)["mov"].max()
+    return {
+        "aeroportos": int(df_f["aeroporto"].nunique()),
+        "indicadores": int(df_f["indicador"].nunique()),
+        "eventos": int(df_f["eventos"].sum()),
+        "mov": int(mov_month["mov"].sum()),
+    }
+
+# ======================================================
+# RANKING + COMPARATIVO ENTRE AEROPORTOS
+# ======================================================
+def agg_indicador(df_f: pd.DataFrame) -> pd.DataFrame:
+    ind_sum = (
+        df_f
+        .groupby("indicador", as_index=False)["eventos"]
+        .sum()
+        .sort_values("eventos", ascending=False)
+        .head(12)
+    )
+    ind_sum["indicador_fmt"] = ind_sum["indicador"].apply(quebra_texto)
+
+    # lógica de rótulo interno/externo
+    max_val = ind_sum["eventos"].max()
+    ind_sum["label_pos"] = ind_sum["eventos"].apply(lambda v: "inside" if v >= max_val * 0.25 else "outside")
+    ind_sum["label_color"] = ind_sum["eventos"].apply(lambda v: "white" if v >= max_val * 0.25 else "#333")
+    return ind_sum
+
+def agg_ano(df_f: pd.DataFrame) -> pd.DataFrame:
+    byy = (
+        df_f
+        .groupby("ano", as_index=False)["eventos"]
+        .sum()
+        .sort_values("ano", ascending=False)  # ← ORDEM 2025 → 2020
+    )
+    byy["ano"] = byy["ano"].astype(int)
+    return byy
+
+def agg_rank(df_f: pd.DataFrame, modo_rank: str) -> pd.DataFrame:
+    if modo_rank == "Indicador por Eventos":
+
+        rank_df = (
+            df_f
+            .groupby(["indicador", "aeroporto"], as_index=False)["eventos"]
+            .sum()
+        )
+
+        rank_df["valor_rank"] = rank_df["eventos"]
+
+    else:
+        base_idx = (
+            df_f
+            .groupby(["indicador", "aeroporto", "ano", "ordem_mes"], as_index=False)
+            .agg(
+                eventos=("eventos", "sum"),
+                mov=("mov", "max")
+            )
+        )
+
+        rank_df = (
+            base_idx
+            .groupby(["indicador", "aeroporto"], as_index=False)
+            .agg(
+                eventos=("eventos", "sum"),
+                mov=("mov", "sum")
+            )
+        )
+
+        rank_df["valor_rank"] = (
+            rank_df["eventos"] * 100 / rank_df["mov"]
+        ).fillna(0)
+
+    return rank_df
+
+def agg_indicador_aeroporto(df_f: pd.DataFrame, indicador: str) -> pd.DataFrame:
+    """Eventos e movimentação por aeroporto (ordem alfabética) de um indicador."""
+    return (
+        df_f[df_f["indicador"] == indicador]
+        .groupby("aeroporto", as_index=False)
+        .agg(
+            eventos=("eventos", "sum"),
+            mov=("mov", "sum")
+        )
+        .sort_values("aeroporto")
+        .reset_index(drop=True)
+    )
+
+def compare_base(df: pd.DataFrame, sel_ano, sel_mes, sel_ind) -> pd.DataFrame:
+    # comparativo usa a base inteira (qualquer aeroporto) com os demais filtros
+    base_cmp = df
+    if sel_ano:
+        base_cmp = base_cmp[base_cmp["ano"].isin(sel_ano)]
+    if sel_mes:
+        base_cmp = base_cmp[base_cmp["mes_abrev"].isin(sel_mes)]
+    if sel_ind:
+        base_cmp = base_cmp[base_cmp["indicador"].isin(sel_ind)]
+    return base_cmp
+
+def compare_airports(base_cmp: pd.DataFrame, aero_a: str, aero_b: str, por_indice: bool) -> pd.DataFrame:
+    """
+    Série mensal de dois aeroportos: eventos ou índice (eventos * 100 / mov),
+    com valor_plot/texto_plot prontos para o gráfico.
+    """
+    chaves = ["aeroporto", "ordem_mes", "mes_abrev"]
+    base_ab = base_cmp[base_cmp["aeroporto"].isin([aero_a, aero_b])]
+
+    if not por_indice:
+        cmp = base_ab.groupby(chaves, as_index=False)["eventos"].sum()
+        cmp["valor"] = cmp["eventos"]
+    else:
+        # eventos: soma normal no mês
+        base_evt = base_ab.groupby(chaves, as_index=False).agg(eventos=("eventos", "sum"))
+
+        # movimentação única do mês (moda → evita 226 vs 562 misturados)
+        base_mov = base_ab.groupby(chaves, as_index=False).agg(
+            mov=("mov", lambda s: s.mode().iloc[0] if not s.mode().empty else s.max())
+        )
+
+        cmp = base_evt.merge(base_mov, on=chaves, how="left")
+
+        # índice mensal (igual ao Power BI)
+        cmp["valor"] = (cmp["eventos"] * 100 / cmp["mov"]).fillna(0)
+
+    cmp["mes_abrev"] = pd.Categorical(
+        cmp["mes_abrev"],
+        categories=ORDEM_MESES_ABREV,
+        ordered=True
+    )
+    cmp = cmp.sort_values(["ordem_mes", "aeroporto"])
+
+    if not por_indice:
+        # eventos = inteiro puro
+        cmp["valor_plot"] = cmp["eventos"].astype(int)
+        cmp["texto_plot"] = cmp["valor_plot"].astype(str)
+    else:
+        # índice = decimal (0,000)
+        cmp["valor_plot"] = cmp["valor"].round(3)
+        cmp["texto_plot"] = cmp["valor_plot"].apply(lambda x: f"{x:.3f}".replace(".", ","))
+    return cmp
+
+def compare_totals(cmp: pd.DataFrame, aero_a: str, aero_b: str, por_indice: bool) -> tuple:
+    """(total A, total B, variação A × B) — eventos somados ou índice do período."""
+    def total(aero):
+        sub = cmp[cmp["aeroporto"] == aero]
+        if not por_indice:
+            return sub["eventos"].sum()
+        mov = sub["mov"].sum()
+        return (sub["eventos"].sum() * 100 / mov) if mov > 0 else 0
+
+    total_a, total_b = total(aero_a), total(aero_b)
+    pct_var = (total_a - total_b) / total_b if total_b > 0 else 0
+    return total_a, total_b, pct_var
+
+# ======================================================
+# 🎯 METAS POR ANO (2025 = base / 2026 muda SBSP)
+# ======================================================
+METAS_POR_ANO = {
+    2025: {
+        "SBJU": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 7,
+            "Colisão com Aves": 40,
+            "RELPREV": 15,
+        },
+        "SBCG": {
+            "Incursão em Pista": 4,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 50,
+            "RELPREV": 30,
+        },
+        "SBCJ": {
+            "Incursão em Pista": 2,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 3,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBCR": {
+            "Incursão em Pista": 2,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 3,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBHT": {
+            "Incursão em Pista": 2,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 1,
+            "F.O.D": 5,
+            "Colisão com Aves": 25,
+            "RELPREV": 10,
+        },
+        "SBJP": {
+            "Incursão em Pista": 5,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 50,
+            "RELPREV": 35,
+        },
+        "SBKG": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 5,
+            "Colisão com Aves": 30,
+            "RELPREV": 15,
+        },
+        "SBMA": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBMK": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBMO": {
+            "Incursão em Pista": 5,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 50,
+            "RELPREV": 30,
+        },
+        "SBPP": {
+            "Incursão em Pista": 2,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 3,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBRF": {
+            "Incursão em Pista": 7,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 5,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 12,
+            "F.O.D": 15,
+            "Colisão com Aves": 144,
+            "RELPREV": 150,
+        },
+        "SBSN": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 31,
+        },
+        "SBSP": {
+            "Incursão em Pista": 4,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 6,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 50,
+            "F.O.D": 67,
+            "Colisão com Aves": 52,
+            "RELPREV": 300,
+        },
+        "SBUL": {
+            "Incursão em Pista": 4,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 3,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 5,
+            "F.O.D": 10,
+            "Colisão com Aves": 50,
+            "RELPREV": 30,
+        },
+        "SBUR": {
+            "Incursão em Pista": 2,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 1,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 3,
+            "F.O.D": 10,
+            "Colisão com Aves": 30,
+            "RELPREV": 20,
+        },
+        "SBAR": {
+            "Incursão em Pista": 3,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 2,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 3,
+            "F.O.D": 6,
+            "Colisão com Aves": 40,
+            "RELPREV": 30,
+        },
+    },
+
+    2026: {
+        "SBSP": {
+            "Incursão em Pista": 5,
+            "Excursão de Pista": 1,
+            "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura": 10,
+            "Colisão entre Veículos, Equipamentos, Estruturas": 70,
+            "F.O.D": 29,
+            "Colisão com Aves": 72,
+            "RELPREV": 400,
+        }
+    }
+}
+
+ORDEM_INDICADORES = [
+    "Incursão em Pista",
+    "Colisões Entre Aeronaves e Veículos, Equipamentos, Estrutura",
+    "Colisão entre Veículos, Equipamentos, Estruturas",
+    "F.O.D",
+    "Colisão com Aves",
+    "Excursão de Pista",
+    "RELPREV",
+]
+
+ANO_BASE_METAS = min(METAS_POR_ANO)      # 2025
+ULTIMO_ANO_METAS = max(METAS_POR_ANO)    # 2026
+
+def metas_vigentes(ano=None) -> dict:
+    """
+    Metas por aeroporto/indicador do ano escolhido:
+    - ano None (Todos) → SEMPRE 2025 (base)
+    - ano = 2026       → base + override (SBSP)
+    - ano >= 2027      → herda 2026
+    """
+    ano_meta = ANO_BASE_METAS if ano is None else min(int(ano), ULTIMO_ANO_METAS)
+
+    # base sempre 2025 (tem todos os aeroportos)
+    metas = {aero: m.copy() for aero, m in METAS_POR_ANO[ANO_BASE_METAS].items()}
+
+    # aplica override somente se ano_meta tiver overrides (ex: 2026)
+    if ano_meta in METAS_POR_ANO and ano_meta != ANO_BASE_METAS:
+        for aero, m in METAS_POR_ANO[ano_meta].items():
+            metas.setdefault(aero, {}).update(m)
+    return metas
+
+def meta_por_ano(aeroporto, indicador, ano):
+    # regra 2025 / 2026 / herança
+    ano_meta = ANO_BASE_METAS if ano <= ANO_BASE_METAS else ULTIMO_ANO_METAS
+
+    if (
+        ano_meta in METAS_POR_ANO
+        and aeroporto in METAS_POR_ANO[ano_meta]
+        and indicador in METAS_POR_ANO[ano_meta][aeroporto]
+    ):
+        return METAS_POR_ANO[ano_meta][aeroporto][indicador]
+
+    return METAS_POR_ANO[ANO_BASE_METAS].get(aeroporto, {}).get(indicador, 0)
+
+def meta_faixa(indicador, valor, meta) -> str:
+    """
+    "ok" / "atencao" / "fora" para o realizado frente à meta.
+    RELPREV: quanto MAIOR, melhor. Demais: quanto MENOR, melhor
+    (atenção de 80% até 100% inclusive).
+    """
+    if "RELPREV" in str(indicador).upper():
+        return "ok" if valor >= meta else "fora"
+    pct = (valor / meta) if meta > 0 else 0
+    if pct < 0.8:
+        return "ok"
+    if pct <= 1:
+        return "atencao"
+    return "fora"
+
+def metas_grid(df_f: pd.DataFrame, aeroporto, indicadores, anos_ativos, metas: dict) -> list:
+    """
+    Realizado × meta por indicador (a meta é a soma da meta de cada ano).
+    - aeroporto "Todos": cada aeroporto soma SOMENTE nos anos em que possui dados
+    - aeroporto específico: soma nos anos ativos
+    Os valores SEMPRE vêm do df_f (respeita o filtro global).
+    """
+    linhas = []
+
+    if aeroporto == "Todos":
+        # anos reais em que cada aeroporto possui dados
+        anos_por_aero = {
+            aero: sorted(df_f[df_f["aeroporto"] == aero]["ano"].unique())
+            for aero in METAS_POR_ANO[ANO_BASE_METAS].keys()
+        }
+        for ind in indicadores:
+            valor_total = df_f[df_f["indicador"] == ind]["eventos"].sum() if not df_f.empty else 0
+            meta_total = sum(
+                meta_por_ano(aero, ind, ano)
+                for aero, anos_aero in anos_por_aero.items()
+                for ano in anos_aero
+            )
+            if meta_total == 0:
+                continue
+            linhas.append({
+                "indicador": ind,
+                "aeroporto": "Todos os Aeroportos",
+                "valor": int(valor_total),
+                "meta": int(meta_total),
+            })
+        return linhas
+
+    for ind in indicadores:
+        if ind not in metas.get(aeroporto, {}):
+            continue
+        valor_total = (
+            df_f[(df_f["aeroporto"] == aeroporto) & (df_f["indicador"] == ind)]["eventos"].sum()
+            if not df_f.empty else 0
+        )
+        meta_valor = sum(meta_por_ano(aeroporto, ind, ano) for ano in anos_ativos)
+        if meta_valor == 0:
+            continue
+        linhas.append({
+            "indicador": ind,
+            "aeroporto": aeroporto,
+            "valor": int(valor_total),
+            "meta": int(meta_valor),
+        })
+    return linhas
+
+def metas_tabela(df_f: pd.DataFrame, aeroporto, ano: int) -> pd.DataFrame:
+    """Metas de um aeroporto (ou "Todos") em um único ano, com a faixa de cada indicador."""
+    base = df_f[df_f["ano"] == ano]
+    linhas = metas_grid(base, aeroporto, ORDEM_INDICADORES, [ano], metas_vigentes(ano))
+    for linha in linhas:
+        linha["ano"] = ano
+        linha["status"] = meta_faixa(linha["indicador"], linha["valor"], linha["meta"])
+    return pd.DataFrame(linhas, columns=["aeroporto", "ano", "indicador", "valor", "meta", "status"])
+
+def status_metas(df: pd.DataFrame, ano_ref, metas: dict, aeroportos=None, indicadores=None):
+    """
+    Aeroportos dentro / fora das metas no ano de referência.
+    Devolve (atingiram, nao_atingiram); cada item de nao_atingiram traz
+    o primeiro indicador que extrapolou a meta.
+    """
+    df_base_status = df[df["ano"] == ano_ref]
+    if aeroportos is None:
+        aeroportos = metas.keys()
+
+    atingiram = []
+    nao_atingiram = []
+
+    for aeroporto in aeroportos:
+        if aeroporto not in metas:
+            continue
+
+        df_aero = df_base_status[df_base_status["aeroporto"] == aeroporto]
+        if df_aero.empty:
+            continue
+
+        falha = None
+        for indicador, meta in metas[aeroporto].items():
+            if indicadores is not None and indicador not in indicadores:
+                continue
+            if meta == 0:
+                continue
+
+            valor = df_aero[df_aero["indicador"] == indicador]["eventos"].sum()
+
+            # RELPREV: quanto MAIOR, melhor / demais: quanto MENOR, melhor
+            if "RELPREV" in indicador.upper():
+                estourou = valor < meta
+            else:
+                estourou = valor > meta
+
+            if estourou:
+                falha = {"indicador": indicador, "meta": meta, "valor": int(valor)}
+                break
+
+        if falha is None:
+            atingiram.append(aeroporto)
+        else:
+            nao_atingiram.append({"aeroporto": aeroporto, **falha})
+
+    return atingiram, nao_atingiram
+
+# ======================================================
+# 📦 PACOTE DE EXPORTAÇÃO (XLSX + ZIP)
+# ======================================================
+def export_sheets(df_f: pd.DataFrame, monthly: pd.DataFrame) -> dict:
+    return {
+        "RAW_FILTRADO": df_f.drop(columns=["chave"], errors="ignore"),
+        "EVENTOS_MENSAL_AEROPORTO": monthly,
+        "TOTAL_EVENTOS_ANO": df_f.groupby("ano", as_index=False)["eventos"].sum().sort_values("ano"),
+        "TOTAL_EVENTOS_INDICADOR": df_f.groupby("indicador", as_index=False)["eventos"].sum().sort_values("eventos", ascending=False),
+    }
+
+def pend_export_frame(pend_df: pd.DataFrame) -> pd.DataFrame:
+    pend_export = pend_df.copy()
+    if not pend_export.empty:
+        pend_export["required_period_txt"] = pend_export["required_mes_abrev"].astype(str) + "/" + pend_export["required_ano"].astype(str)
+        pend_export = pend_export.sort_values(["is_ok","aeroporto"])
+    return pend_export
+
+def _sheets_info(sheets: dict) -> dict:
+    return {k: {"rows": int(len(v)), "schema": table_schema(v)} for k, v in sheets.items()}
+
+def build_package(sheets: dict, pend_sheet: dict, meta: dict, formatos=(), xlsx=None, pend_xlsx=None, fh=None, extras=(),
+                  progress=None):
+    """
+    Relatório XLSX + pacote ZIP (metadata.json, relatório, pendências e,
+    opcionalmente, Parquet / CSV.gz por tabela).
+    xlsx/pend_xlsx: bytes já gerados (pré-computação) — evita refazer.
+    fh: arquivo de destino do ZIP; nesse caso zip_bytes volta None.
+    extras: membros adicionais (nome, conteúdo), ex.: PDFs por aeroporto.
+    progress: função opcional (fração 0–1, etapa) — XLSX até 70%, ZIP no resto.
+    Devolve (xlsx_bytes, zip_bytes, stats do XLSX ou None).
+    """
+    def avisa(frac, etapa):
+        if progress is not None:
+            progress(frac, etapa)
+
+    stats = None
+    if xlsx is None:
+        xlsx, stats = xlsx_bytes_with_stats(
+            sheets, progress=lambda feitas, total: avisa(0.6 * feitas / max(total, 1), "Relatório XLSX"),
+        )
+    if pend_xlsx is None:
+        avisa(0.6, "Pendências XLSX")
+        pend_xlsx = df_to_excel_bytes(pend_sheet)
+
+    files_info = {
+        "IDSO_Relatorio.xlsx": {"format": "xlsx", "sheets": _sheets_info(sheets)},
+        "Pendencias_IDSO.xlsx": {"format": "xlsx", "sheets": _sheets_info(pend_sheet)},
+    }
+    col_files, col_info = columnar_files({**sheets, **pend_sheet}, formatos)
+    files_info.update(col_info)
+    for name, _ in extras:
+        files_info[name] = {"format": os.path.splitext(name)[1].lstrip(".").lower()}
+
+    members = [
+        ("metadata.json", json.dumps(dict(meta, files=files_info), ensure_ascii=False, indent=2).encode("utf-8")),
+        ("IDSO_Relatorio.xlsx", xlsx),
+        ("Pendencias_IDSO.xlsx", pend_xlsx),
+        *col_files,
+        *extras,
+    ]
+    def zip_progress(feitos, total, nome):
+        avisa(0.7 + 0.3 * feitos / total, f"ZIP • {nome}")
+
+    if fh is not None:
+        write_zip_stream(members, fh, progress=zip_progress)
+        avisa(1.0, "Concluído")
+        return xlsx, None, stats
+    zip_bytes = make_zip(members, progress=zip_progress)
+    avisa(1.0, "Concluído")
+    return xlsx, zip_bytes, stats
@@ -0,0 +1,158 @@
+# ======================================================
+# IDSO — FILA DE EXPORTAÇÕES (SEM STREAMLIT)
+# Pool limitado de workers + fila com teto. Cada job tem uma chave: o
+# mesmo pedido vindo de outra sessão reaproveita o job em andamento (ou
+# o resultado pronto) em vez de gerar de novo. Resultados prontos ficam
+# num BoundedCache (idso_cache) e o progresso de cada job pode ser
+# consultado a qualquer momento pelo painel.
+# ======================================================
+import itertools
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from idso_cache import BoundedCache
+
+FILA, RODANDO, PRONTO, ERRO = "fila", "rodando", "pronto", "erro"
+
+class ExportJob:
+    """Estado de um job: status, progresso (0–1), etapa, resultado ou erro."""
+
+    def __init__(self, key, seq):
+        self.key = key
+        self.seq = seq                  # ordem de chegada (posição na fila)
+        self.status = FILA
+        self.progress = 0.0
+        self.etapa = "Na fila"
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.hits = 1                   # pedidos atendidos por este job
+        self._fim = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (PRONTO, ERRO)
+
+    def wait(self, timeout=None) -> bool:
+        """Espera o job terminar (até timeout s); True se terminou."""
+        return self._fim.wait(timeout)
+
+    @property
+    def seconds(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+class QueueFull(Exception):
+    """A fila atingiu o limite de jobs aguardando."""
+
+class ExportQueue:
+    """
+    - no máximo max_workers exportações rodando ao mesmo tempo
+    - no máximo max_queued aguardando; além disso submit levanta QueueFull
+    - pedidos com a mesma chave viram um job só (entre sessões)
+    - jobs concluídos vão para `results` (BoundedCache: LRU, MB, TTL);
+      sem cache informado, guarda os max_results mais recentes
+    - on_done(job), se informado, é chamado ao fim de cada job (métricas)
+    """
+
+    def __init__(self, max_workers=2, max_queued=8, max_results=16, results=None, on_done=None):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="idso-export")
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()       # key -> ExportJob (só pendentes: na fila ou rodando)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.results = results if results is not None else BoundedCache("exportacoes", max_entries=max_results)
+        self.on_done = on_done
+        self._seq = itertools.count()
+
+    def submit(self, key, fn, *args, **kwargs) -> ExportJob:
+        """
+        Enfileira fn(*args, progress=..., **kwargs) sob key e devolve o job.
+        Se já existe um job com essa chave (na fila, rodando ou pronto), devolve ele.
+        Jobs que falharam são refeitos no próximo pedido.
+        """
+        with self.lock:
+            job = self.jobs.get(key) or self.results.get(key)
+            if job is not None and job.status != ERRO:
+                job.hits += 1
+                return job
+            if sum(j.status == FILA for j in self.jobs.values()) >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} exportações já aguardando")
+            self.results.discard(key)
+            job = ExportJob(key, next(self._seq))
+            self.jobs[key] = job
+        self.pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, key):
+        with self.lock:
+            job = self.jobs.get(key)
+        return job if job is not None else self.results.get(key)
+
+    def position(self, job: ExportJob) -> int:
+        """Quantos jobs da fila chegaram antes deste (0 = o próximo a rodar)."""
+        with self.lock:
+            return sum(j.status == FILA and j.seq < job.seq for j in self.jobs.values())
+
+    def stats(self) -> dict:
+        pendentes, prontos = self._listas()
+        jobs = pendentes + prontos
+        # cada status lido uma vez só (os workers o mudam fora da trava); conta-se
+        # pelo status e não pela lista porque _run marca PRONTO antes de tirar o job da fila
+        status = Counter(j.status for j in jobs)
+        return {
+            "workers": self.max_workers,
+            "fila": status[FILA],
+            "rodando": status[RODANDO],
+            "prontos": status[PRONTO],
+            "erros": status[ERRO],
+            "pedidos_reaproveitados": sum(j.hits - 1 for j in jobs),
+        }
+
+    def snapshot(self) -> list:
+        """Jobs atuais: pendentes primeiro, depois os concluídos ainda em cache."""
+        pendentes, prontos = self._listas()
+        return pendentes + prontos
+
+    def _listas(self):
+        # mesma trava com que _run move o job de `jobs` para `results`: cada job
+        # aparece em exatamente uma das listas
+        with self.lock:
+            pendentes = list(self.jobs.values())
+            # o cache pode ser compartilhado com outros produtores (pré-computação de XLSX)
+            prontos = [self.results.peek(e["chave"]) for e in self.results.entries()]
+        return pendentes, [j for j in prontos if isinstance(j, ExportJob)]
+
+    def discard(self, key) -> bool:
+        """Remove um job já concluído (e o resultado dele); pendentes ficam."""
+        return self.results.discard(key)
+
+    def _run(self, job, fn, args, kwargs):
+        def progress(frac, etapa=None):
+            job.progress = min(max(float(frac), 0.0), 1.0)
+            if etapa:
+                job.etapa = etapa
+
+        job.status, job.started, job.etapa = RODANDO, time.monotonic(), "Iniciando"
+        try:
+            job.result = fn(*args, progress=progress, **kwargs)
+            job.progress, job.etapa, job.status = 1.0, "Concluído", PRONTO
+        except Exception as e:
+            job.error, job.etapa, job.status = e, "Falhou", ERRO
+        finally:
+            job.finished = time.monotonic()
+            # concluído: sai da fila e entra no cache de resultados (que aplica os limites)
+            with self.lock:
+                self.results.put(job.key, job)
+                self.jobs.pop(job.key, None)
+            if self.on_done is not None:
+                try:
+                    self.on_done(job)
+                except Exception:
+                    pass            # observador com problema não pode travar quem espera o job
+            job._fim.set()
@@ -0,0 +1,91 @@
+# ======================================================
+# IDSO — CONTABILIDADE DE MEMÓRIA (SEM STREAMLIT)
+# Tamanho "profundo" de DataFrames, bytes, figuras e estruturas aninhadas
+# (o que sys.getsizeof não conta), uso por coluna da base preparada e RSS
+# do processo. Usado pela visão de diagnóstico de memória do painel.
+# ======================================================
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# TAMANHOS
+# ======================================================
+# objetos cujos atributos não são "dados" (seguir __dict__ varreria o programa)
+_SEM_ATRIBUTOS = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+def deep_size(obj, _vistos=None) -> int:
+    """
+    Bytes ocupados por obj e pelo que ele referencia (cada objeto conta uma vez).
+    DataFrame/Series: memory_usage(deep=True) • ndarray: nbytes • figuras
+    Plotly: o JSON equivalente • dict/list/tuple/set e atributos de
+    objetos comuns: soma recursiva.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, memoryview):
+        return obj.nbytes
+    if isinstance(obj, str):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            deep_size(k, vistos) + deep_size(v, vistos) for k, v in list(obj.items())
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_size(v, vistos) for v in list(obj))
+    if hasattr(obj, "to_plotly_json"):
+        return deep_size(obj.to_plotly_json(), vistos)
+    if hasattr(obj, "__dict__") and not isinstance(obj, _SEM_ATRIBUTOS):
+        return sys.getsizeof(obj) + deep_size(vars(obj), vistos)
+    return sys.getsizeof(obj)
+
+def frame_memory(df: pd.DataFrame) -> pd.DataFrame:
+    """Memória por coluna (deep), da maior para a menor."""
+    uso = df.memory_usage(deep=True, index=True)
+    return (
+        pd.DataFrame({
+            "coluna": uso.index.astype(str),
+            "dtype": [str(df[c].dtype) if c in df.columns else "índice" for c in uso.index],
+            "mb": (uso.to_numpy() / 1024 / 1024).round(2),
+        })
+        .sort_values("mb", ascending=False)
+        .reset_index(drop=True)
+    )
+
+def mapping_sizes(d, top=None) -> list:
+    """[(chave, bytes)] de um dict (ou session_state), do maior para o menor."""
+    tamanhos = sorted(((str(k), deep_size(v)) for k, v in list(d.items())), key=lambda kv: -kv[1])
+    return tamanhos[:top] if top else tamanhos
+
+def fmt_bytes(n) -> str:
+    for unidade, fator in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if n >= fator:
+            return f"{n / fator:,.1f} {unidade}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{int(n)} B"
+
+# ======================================================
+# PROCESSO
+# ======================================================
+def process_rss_mb() -> float:
+    # RSS atual (Linux: /proc; fora dele, o pico do getrusage)
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
@@ -0,0 +1,236 @@
+# ======================================================
+# IDSO — MÉTRICAS PARA MONITORAMENTO (SEM STREAMLIT)
+# Contadores, gauges e histogramas no formato texto do Prometheus, sem
+# dependência extra. Duas saídas, ambas opcionais e em threads daemon:
+#   • endpoint HTTP local (GET /metrics) — IDSO_METRICS_PORT
+#   • arquivo reescrito periodicamente (textfile collector do
+#     node_exporter) — IDSO_METRICS_FILE, a cada IDSO_METRICS_INTERVAL s
+# Valores "ao vivo" (caches, RSS, sessões) entram por coletores chamados
+# a cada leitura, não a cada rerun.
+# ======================================================
+import math
+import os
+import threading
+import time
+
+from idso_cache import all_caches
+from idso_memory import process_rss_mb
+
+# limites (s) dos histogramas de latência
+BUCKETS_S = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# limites (linhas) do histograma de linhas por upload
+BUCKETS_LINHAS = (1_000, 5_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pares) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pares) + "}" if pares else ""
+
+def _num(v) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return "NaN"
+    if isinstance(v, float) and math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) else str(int(v))
+
+# ======================================================
+# REGISTRO
+# ======================================================
+class MetricsRegistry:
+    """
+    Métricas do processo. describe() declara nome, tipo e ajuda; inc/set/
+    observe gravam com rótulos por keyword. Coletores são funções que
+    devolvem [(nome, tipo, ajuda, {rótulos}, valor)] no momento da leitura.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._meta = {}          # nome -> (tipo, ajuda, buckets)
+        self._valores = {}       # nome -> {rótulos (tupla ordenada): valor}
+        self._hist = {}          # nome -> {rótulos: [contagens por bucket, soma, n]}
+        self._coletores = []
+
+    def describe(self, nome, tipo, ajuda, buckets=BUCKETS_S):
+        with self.lock:
+            self._meta[nome] = (tipo, ajuda, tuple(buckets) if tipo == "histogram" else None)
+
+    def add_collector(self, fn):
+        with self.lock:
+            self._coletores.append(fn)
+
+    # ---------- escrita ----------
+    def inc(self, nome, valor=1, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self.lock:
+            serie = self._valores.setdefault(nome, {})
+            serie[chave] = serie.get(chave, 0) + valor
+
+    def set(self, nome, valor, **rotulos):
+        with self.lock:
+            self._valores.setdefault(nome, {})[tuple(sorted(rotulos.items()))] = valor
+
+    def observe(self, nome, valor, **rotulos):
+        chave = tuple(sorted(rotulos.items()))
+        with self.lock:
+            buckets = self._meta.get(nome, ("histogram", "", BUCKETS_S))[2] or BUCKETS_S
+            h = self._hist.setdefault(nome, {}).setdefault(chave, [[0] * len(buckets), 0.0, 0])
+            for i, limite in enumerate(buckets):
+                if valor <= limite:
+                    h[0][i] += 1
+            h[1] += valor
+            h[2] += 1
+
+    # ---------- leitura ----------
+    def render(self) -> str:
+        """Todas as séries no formato de exposição texto do Prometheus."""
+        with self.lock:
+            meta = dict(self._meta)
+            valores = {n: dict(s) for n, s in self._valores.items()}
+            hist = {n: {k: [list(h[0]), h[1], h[2]] for k, h in s.items()} for n, s in self._hist.items()}
+            coletores = list(self._coletores)
+
+        for fn in coletores:
+            try:
+                amostras = fn()
+            except Exception:
+                continue            # coletor com problema não derruba a leitura inteira
+            for nome, tipo, ajuda, rotulos, valor in amostras:
+                meta.setdefault(nome, (tipo, ajuda, None))
+                valores.setdefault(nome, {})[tuple(sorted(rotulos.items()))] = valor
+
+        linhas = []
+        for nome in sorted(set(valores) | set(hist)):
+            tipo, ajuda, buckets = meta.get(nome, ("untyped", "", None))
+            if ajuda:
+                linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for chave, valor in sorted(valores.get(nome, {}).items()):
+                linhas.append(f"{nome}{_labels(chave)} {_num(valor)}")
+            for chave, (contagens, soma, n) in sorted(hist.get(nome, {}).items()):
+                for limite, c in zip(buckets or BUCKETS_S, contagens):
+                    linhas.append(f"{nome}_bucket{_labels(chave + (('le', _num(float(limite))),))} {c}")
+                linhas.append(f"{nome}_bucket{_labels(chave + (('le', '+Inf'),))} {n}")
+                linhas.append(f"{nome}_sum{_labels(chave)} {_num(float(soma))}")
+                linhas.append(f"{nome}_count{_labels(chave)} {n}")
+        return "\n".join(linhas) + "\n"
+
+METRICS = MetricsRegistry()
+
+# ======================================================
+# MÉTRICAS DO PAINEL
+# ======================================================
+METRICS.describe("idso_reruns_total", "counter", "Reruns completos do painel.")
+METRICS.describe("idso_rerun_seconds", "histogram", "Duração total do rerun (s).")
+METRICS.describe("idso_section_seconds", "histogram", "Duração de cada seção do rerun (s).")
+METRICS.describe("idso_ingest_seconds", "histogram", "Leitura da planilha enviada (s).")
+METRICS.describe("idso_ingest_rows", "histogram", "Linhas por planilha enviada.", BUCKETS_LINHAS)
+METRICS.describe("idso_prepare_seconds", "histogram", "Preparação da base (s).")
+METRICS.describe("idso_export_seconds", "histogram", "Geração de exportações na fila (s), por status.")
+METRICS.describe("idso_sync_seconds", "histogram", "Sincronização com a API de lista (s), por tipo.")
+METRICS.describe("idso_sync_items_total", "counter", "Itens recebidos da API de lista, por tipo.")
+
+def cache_samples() -> list:
+    """Uso, orçamento e contadores de cada cache de idso_cache."""
+    amostras = []
+    for cache in all_caches():
+        s = cache.stats()
+        r = {"cache": s["cache"]}
+        amostras += [
+            ("idso_cache_hits_total", "counter", "Acertos por cache.", r, s["hits"]),
+            ("idso_cache_misses_total", "counter", "Faltas por cache.", r, s["misses"]),
+            ("idso_cache_hit_ratio", "gauge", "Acertos / consultas desde o início do processo.", r,
+             s["taxa_acerto"] if s["taxa_acerto"] is not None else float("nan")),
+            ("idso_cache_entries", "gauge", "Entradas em cada cache.", r, s["entradas"]),
+            ("idso_cache_bytes", "gauge", "Bytes estimados em cada cache.", r, s["bytes"]),
+            ("idso_cache_compute_seconds_total", "counter", "Tempo gasto calculando entradas.", r,
+             s["segundos_calculo"]),
+        ]
+        if s["max_bytes"]:
+            amostras.append(("idso_cache_max_bytes", "gauge", "Orçamento de bytes do cache.", r, s["max_bytes"]))
+        for motivo, n in s["descartes"].items():
+            amostras.append(("idso_cache_evictions_total", "counter", "Descartes por cache e motivo.",
+                             dict(r, motivo=motivo), n))
+    return amostras
+
+def dataset_samples() -> list:
+    """Memória de cada base preparada em cache e RSS do processo."""
+    amostras = [("idso_process_rss_bytes", "gauge", "RSS do processo.", {}, int(process_rss_mb() * 1024 * 1024))]
+    for cache in all_caches():
+        if cache.nome == "preparado":
+            for e in cache.entries():
+                amostras.append(("idso_dataset_bytes", "gauge", "Memória da base preparada, por arquivo (sha).",
+                                 {"sha": str(e["chave"])[:12]}, e["bytes"]))
+    return amostras
+
+METRICS.add_collector(cache_samples)
+METRICS.add_collector(dataset_samples)
+
+# ======================================================
+# SAÍDAS
+# ======================================================
+def start_http_server(porta: int, host: str = "127.0.0.1", registry: MetricsRegistry = METRICS):
+    """Serve GET /metrics em host:porta numa thread daemon; devolve o servidor."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            corpo = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass                    # sem uma linha no log do Streamlit a cada coleta
+
+    servidor = ThreadingHTTPServer((host, porta), _Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="idso-metrics-http", daemon=True).start()
+    return servidor
+
+def write_metrics_file(caminho: str, registry: MetricsRegistry = METRICS):
+    # grava ao lado e troca de uma vez: quem lê nunca vê o arquivo pela metade
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(registry.render())
+    os.replace(tmp, caminho)
+
+def start_file_writer(caminho: str, intervalo: float = 15.0, registry: MetricsRegistry = METRICS):
+    """Reescreve `caminho` a cada `intervalo` s numa thread daemon; devolve o Event que a interrompe."""
+    parar = threading.Event()
+
+    def _loop():
+        while True:
+            try:
+                write_metrics_file(caminho, registry)
+            except OSError:
+                pass                # disco cheio/permissão: tenta de novo no próximo ciclo
+            if parar.wait(intervalo):
+                return
+
+    threading.Thread(target=_loop, name="idso-metrics-file", daemon=True).start()
+    return parar
+
+def timed(nome: str, registry: MetricsRegistry = METRICS, **rotulos):
+    """Context manager que observa a duração do bloco no histograma `nome`."""
+    return _Timer(registry, nome, rotulos)
+
+class _Timer:
+    def __init__(self, registry, nome, rotulos):
+        self.registry, self.nome, self.rotulos = registry, nome, rotulos
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self.t0
+        self.registry.observe(self.nome, self.segundos, **self.rotulos)
+        return False
@@ -0,0 +1,342 @@
+# ======================================================
+# IDSO — RELATÓRIO PDF POR AEROPORTO (SEM STREAMLIT)
+# Gráficos em matplotlib (Agg) renderizados em paralelo e guardados em
+# disco pelo hash dos dados; montagem do documento com fpdf2.
+# ======================================================
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from idso_core import (
+    ANO_COLORS, ORDEM_MESES_ABREV, fmt_int,
+    apply_filters, agg_eventos_mes, kpi_values, metas_tabela,
+)
+
+# pasta do cache de imagens (IDSO_CHART_CACHE muda o local); limitada por tamanho
+# (IDSO_CHART_CACHE_MB) e idade sem uso (IDSO_CHART_CACHE_DAYS)
+CHART_CACHE_DIR = os.environ.get("IDSO_CHART_CACHE") or os.path.join(tempfile.gettempdir(), "idso_charts")
+CHART_CACHE_MAX_BYTES = int(float(os.environ.get("IDSO_CHART_CACHE_MB", "200")) * 1024 * 1024)
+CHART_CACHE_MAX_AGE = float(os.environ.get("IDSO_CHART_CACHE_DAYS", "7")) * 86400
+CHART_VERSION = "2"       # mudar quando o desenho dos gráficos mudar
+CHART_DPI = 150
+
+FAIXA_CORES = {"ok": "#96CE00", "atencao": "#ffb703", "fora": "#ff5a5f"}
+FAIXA_TEXTO = {"ok": "Dentro da meta", "atencao": "Atenção", "fora": "Fora da meta"}
+
+# fontes padrão do PDF são latin-1: troca o que não existe nelas
+_LATIN1 = str.maketrans({
+    "–": "-", "—": "-", "•": "-", "→": "->", "←": "<-", "≥": ">=", "≤": "<=",
+    "…": "...", "“": '"', "”": '"', "‘": "'", "’": "'", "✓": "OK", "✔": "OK",
+})
+
+def latin1(texto) -> str:
+    return str(texto).translate(_LATIN1).encode("latin-1", "replace").decode("latin-1")
+
+# ======================================================
+# 🧮 DADOS DO RELATÓRIO
+# ======================================================
+def report_data(df: pd.DataFrame, aeroporto: str, ano_meta: int, pend_df: pd.DataFrame) -> dict:
+    """Tudo que o PDF de um aeroporto mostra (sem desenhar nada)."""
+    df_f = apply_filters(df, [aeroporto], None, None, None)
+    ser = agg_eventos_mes(df_f)
+    metas = metas_tabela(df_f, aeroporto, ano_meta)
+    return {
+        "aeroporto": aeroporto,
+        "ano_meta": ano_meta,
+        "kpis": kpi_values(df_f),
+        "eventos_mes": {
+            int(ano): [(int(r.ordem_mes), int(r.eventos)) for r in g.itertuples()]
+            for ano, g in ser.groupby("ano", observed=True)
+        },
+        "metas": metas.to_dict("records"),
+        "pendencias": pend_df[pend_df["aeroporto"] == aeroporto].to_dict("records"),
+    }
+
+# ======================================================
+# 🖼️ GRÁFICOS (MATPLOTLIB) + CACHE POR HASH DOS DADOS
+# ======================================================
+def chart_key(tipo: str, dados) -> str:
+    h = hashlib.sha256(f"{CHART_VERSION}|{tipo}|{dados!r}".encode("utf-8"))
+    return h.hexdigest()[:32]
+
+def chart_path(tipo: str, dados) -> str:
+    return os.path.join(CHART_CACHE_DIR, f"{tipo}_{chart_key(tipo, dados)}.png")
+
+def _plot_eventos_mes(ax, dados):
+    # eixo numérico (1..12): a ordem dos meses não depende de qual ano aparece primeiro
+    topo = 0
+    for i, (ano, pontos) in enumerate(dados):
+        meses = [m for m, _ in pontos]
+        valores = [v for _, v in pontos]
+        topo = max([topo, *valores])
+        cor = ANO_COLORS[i % len(ANO_COLORS)]
+        ax.plot(meses, valores, marker="o", linewidth=2.5, markersize=6, color=cor, label=str(ano))
+        for m, v in pontos:
+            ax.annotate(fmt_int(v), (m, v), textcoords="offset points", xytext=(0, 6),
+                        ha="center", fontsize=8, fontweight="bold", color="#1A1A1A")
+    ax.set_xticks(range(1, 13), ORDEM_MESES_ABREV)
+    ax.set_xlim(0.5, 12.5)
+    ax.set_ylim(0, topo * 1.18 + 1)
+    ax.legend(frameon=False, fontsize=9, loc="lower right", bbox_to_anchor=(1, 1), ncol=max(1, len(dados)))
+    ax.set_title("Eventos por mês", fontsize=12, fontweight="bold", loc="left")
+
+def _plot_metas(ax, dados):
+    nomes = [ind for ind, _, _, _ in dados][::-1]
+    pct = [min(p, 150) for _, p, _, _ in dados][::-1]
+    cores = [FAIXA_CORES[f] for _, _, f, _ in dados][::-1]
+    ax.barh(nomes, pct, color=cores, height=0.6)
+    ax.axvline(100, color="#3b4552", linewidth=1, linestyle="--")
+    for y, (p, (_, _, _, rotulo)) in enumerate(zip(pct, dados[::-1])):
+        ax.text(p + 2, y, rotulo, va="center", fontsize=8)
+    ax.set_xlim(0, 175)
+    ax.set_xlabel("% da meta", fontsize=9)
+    ax.set_title("Realizado × meta", fontsize=12, fontweight="bold", loc="left")
+
+_PLOTS = {
+    "eventos_mes": (_plot_eventos_mes, (9, 3.6)),
+    "metas": (_plot_metas, (9, 3.4)),
+}
+
+def render_chart(tipo: str, dados, destino: str) -> str:
+    """Desenha o gráfico em PNG (gravação atômica: vários processos podem disputar o mesmo arquivo)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plot, tamanho = _PLOTS[tipo]
+    fig, ax = plt.subplots(figsize=tamanho)
+    try:
+        plot(ax, dados)
+        for lado in ("top", "right"):
+            ax.spines[lado].set_visible(False)
+        ax.tick_params(labelsize=8)
+        fig.tight_layout()
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        fig.savefig(tmp, dpi=CHART_DPI, format="png")
+        os.replace(tmp, destino)
+    finally:
+        plt.close(fig)
+    return destino
+
+def chart_jobs(dados: dict) -> dict:
+    """Gráficos de um relatório: {tipo: (dados serializáveis, caminho no cache)}."""
+    jobs = {}
+    if dados["eventos_mes"]:
+        serie = tuple((ano, tuple(p)) for ano, p in sorted(dados["eventos_mes"].items()))
+        jobs["eventos_mes"] = (serie, chart_path("eventos_mes", serie))
+    if dados["metas"]:
+        barras = tuple(
+            (m["indicador"], (m["valor"] / m["meta"] * 100) if m["meta"] else 0, m["status"],
+             f"{fmt_int(m['valor'])} / {fmt_int(m['meta'])}")
+            for m in dados["metas"]
+        )
+        jobs["metas"] = (barras, chart_path("metas", barras))
+    return jobs
+
+def _pool_context():
+    # forkserver: chamado de dentro do Streamlit (várias threads), fork herdaria
+    # travas presas; o servidor fica vivo com matplotlib e este módulo já importados
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    contexto = multiprocessing.get_context("forkserver")
+    contexto.set_forkserver_preload(["idso_pdf", "matplotlib.pyplot"])
+    return contexto
+
+def render_missing(jobs: list, workers: int = 1) -> int:
+    """
+    Renderiza só o que ainda não está no cache. Com workers > 1 usa um
+    pool de processos (matplotlib não é thread-safe). Devolve quantos desenhou.
+    """
+    pendentes = {}
+    for tipo, (dados, caminho) in jobs:
+        try:
+            os.utime(caminho)       # reaproveitada: conta como uso recente para o descarte
+        except FileNotFoundError:
+            pendentes[caminho] = (tipo, dados)
+    if not pendentes:
+        return 0
+    if workers <= 1 or len(pendentes) == 1:
+        for caminho, (tipo, dados) in pendentes.items():
+            render_chart(tipo, dados, caminho)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pendentes)), mp_context=_pool_context()) as pool:
+            list(pool.map(render_chart, *zip(*((t, d, c) for c, (t, d) in pendentes.items()))))
+    return len(pendentes)
+
+def prune_chart_cache(diretorio: str = CHART_CACHE_DIR, max_bytes: int = CHART_CACHE_MAX_BYTES,
+                      max_age: float = CHART_CACHE_MAX_AGE, manter=()) -> int:
+    """
+    Apaga imagens sem uso há mais de max_age s e, acima de max_bytes, as
+    usadas há mais tempo (exceto `manter`). Devolve quantas apagou.
+    """
+    try:
+        nomes = os.listdir(diretorio)
+    except FileNotFoundError:
+        return 0
+    agora, arquivos = time.time(), []
+    for nome in nomes:
+        caminho = os.path.join(diretorio, nome)
+        try:
+            st = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        arquivos.append((st.st_mtime, st.st_size, caminho))
+    arquivos.sort()                 # mais antigas primeiro
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    manter = set(manter)
+    apagadas = 0
+    for mtime, tamanho, caminho in arquivos:
+        # .tmp de gravação interrompida também sai pela idade
+        if caminho in manter or (agora - mtime <= max_age and total <= max_bytes):
+            continue
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+        apagadas += 1
+    return apagadas
+
+# ======================================================
+# 📄 MONTAGEM DO PDF (FPDF2)
+# ======================================================
+def _hex_rgb(cor: str):
+    cor = cor.lstrip("#")
+    return tuple(int(cor[i:i + 2], 16) for i in (0, 2, 4))
+
+def _titulo_secao(pdf, texto):
+    pdf.ln(3)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_text_color(59, 69, 82)
+    pdf.cell(0, 7, latin1(texto), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0)
+
+def _kpi_cards(pdf, kpis):
+    cards = [
+        ("Aeroportos", fmt_int(kpis["aeroportos"]), "#333333"),
+        ("Indicadores", fmt_int(kpis["indicadores"]), "#333333"),
+        ("Eventos", fmt_int(kpis["eventos"]), "#333333"),
+        ("Movimentações", fmt_int(kpis["mov"]), "#96CE00"),
+    ]
+    gap = 4
+    w = (pdf.epw - gap * (len(cards) - 1)) / len(cards)
+    x0, y0 = pdf.l_margin, pdf.get_y()
+    for i, (titulo, valor, cor) in enumerate(cards):
+        x = x0 + i * (w + gap)
+        pdf.set_draw_color(220, 224, 230)
+        pdf.set_fill_color(250, 251, 252)
+        pdf.rect(x, y0, w, 20, style="DF")
+        pdf.set_xy(x, y0 + 2.5)
+        pdf.set_font("Helvetica", "", 9)
+        pdf.set_text_color(90, 100, 112)
+        pdf.cell(w, 5, latin1(titulo), align="C")
+        pdf.set_xy(x, y0 + 8.5)
+        pdf.set_font("Helvetica", "B", 15)
+        pdf.set_text_color(*_hex_rgb(cor))
+        pdf.cell(w, 8, latin1(valor), align="C")
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_y(y0 + 24)
+
+def _tabela(pdf, cabecalho, linhas, larguras, cores=None):
+    pdf.set_font("Helvetica", "B", 9)
+    pdf.set_fill_color(240, 242, 245)
+    for texto, w in zip(cabecalho, larguras):
+        pdf.cell(w, 6, latin1(texto), border=1, fill=True)
+    pdf.ln()
+    pdf.set_font("Helvetica", "", 9)
+    for i, linha in enumerate(linhas):
+        cor = cores[i] if cores else None
+        for j, (texto, w) in enumerate(zip(linha, larguras)):
+            if cor and j == len(linha) - 1:
+                pdf.set_text_color(*_hex_rgb(cor))
+            pdf.cell(w, 6, latin1(texto), border=1)
+            pdf.set_text_color(0, 0, 0)
+        pdf.ln()
+
+def build_pdf(dados: dict, imagens: dict, meta: dict) -> bytes:
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation="P", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=12)
+    pdf.set_title(latin1(f"IDSO - {dados['aeroporto']}"))
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 9, latin1(f"IDSO – Relatório {dados['aeroporto']}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", "", 9)
+    pdf.set_text_color(90, 100, 112)
+    pdf.cell(
+        0, 5,
+        latin1(f"Referência: {meta.get('today_local', '')} • Base: {meta.get('source_name', '')}"),
+        new_x="LMARGIN", new_y="NEXT",
+    )
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(2)
+
+    _kpi_cards(pdf, dados["kpis"])
+
+    if "eventos_mes" in imagens:
+        _titulo_secao(pdf, "Eventos por mês")
+        pdf.image(imagens["eventos_mes"], w=pdf.epw)
+
+    _titulo_secao(pdf, f"Acompanhamento de metas • Ano {dados['ano_meta']}")
+    if dados["metas"]:
+        if "metas" in imagens:
+            pdf.image(imagens["metas"], w=pdf.epw)
+        _tabela(
+            pdf,
+            ["Indicador", "Realizado", "Meta", "% da meta", "Status"],
+            [
+                [m["indicador"], fmt_int(m["valor"]), fmt_int(m["meta"]),
+                 f"{(m['valor'] / m['meta'] * 100) if m['meta'] else 0:.1f}%", FAIXA_TEXTO[m["status"]]]
+                for m in dados["metas"]
+            ],
+            [88, 22, 18, 24, pdf.epw - 152],
+            cores=[FAIXA_CORES[m["status"]] for m in dados["metas"]],
+        )
+    else:
+        pdf.set_font("Helvetica", "", 9)
+        pdf.cell(0, 6, latin1("Sem metas cadastradas para este aeroporto."), new_x="LMARGIN", new_y="NEXT")
+
+    _titulo_secao(pdf, "Pendências de lançamento (prazo: dia 10)")
+    if dados["pendencias"]:
+        _tabela(
+            pdf,
+            ["Período exigido", "Último lançado", "Meses faltantes", "Prazo", "Status"],
+            [
+                [f"{p['required_mes_abrev']}/{p['required_ano']}",
+                 f"{p['last_period'] % 100:02d}/{p['last_period'] // 100}",
+                 fmt_int(p["missing_months"]), p["due_date"],
+                 "Em dia" if p["is_ok"] else "Pendente"]
+                for p in dados["pendencias"]
+            ],
+            [38, 34, 34, 30, pdf.epw - 136],
+            cores=["#96CE00" if p["is_ok"] else "#ff5a5f" for p in dados["pendencias"]],
+        )
+    else:
+        pdf.set_font("Helvetica", "", 9)
+        pdf.cell(0, 6, latin1("Sem lançamentos para avaliar."), new_x="LMARGIN", new_y="NEXT")
+
+    return bytes(pdf.output())
+
+def generate_reports(df: pd.DataFrame, aeroportos, ano_meta: int, pend_df: pd.DataFrame,
+                     meta: dict, workers: int = 1) -> dict:
+    """
+    PDF de cada aeroporto: dados → gráficos que faltam no cache (em
+    paralelo) → montagem. Devolve {aeroporto: bytes do PDF}.
+    """
+    dados = {aero: report_data(df, aero, ano_meta, pend_df) for aero in aeroportos}
+    jobs = {aero: chart_jobs(d) for aero, d in dados.items()}
+    render_missing([(tipo, job) for j in jobs.values() for tipo, job in j.items()], workers=workers)
+    pdfs = {
+        aero: build_pdf(d, {tipo: caminho for tipo, (_, caminho) in jobs[aero].items()}, meta)
+        for aero, d in dados.items()
+    }
+    prune_chart_cache(manter=[caminho for j in jobs.values() for _, caminho in j.values()])
+    return pdfs
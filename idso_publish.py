@@ -0,0 +1,193 @@
+# ======================================================
+# IDSO — CONJUNTO PUBLICADO (SEM STREAMLIT)
+# Um administrador publica a planilha uma vez; a base preparada e os
+# agregados da visão padrão ficam em disco e toda sessão nova abre direto
+# no painel, sem novo upload nem nova leitura do XLSX — inclusive depois
+# de reiniciar o servidor.
+#
+# Estrutura de IDSO_PUBLISH_DIR:
+#   atual.json             ponteiro para o conjunto publicado (sha, nome, data…)
+#   <sha>/preparado.arrow  base preparada (prepare_idso), aberta com memory_map (idso_arrow)
+#   <sha>/agregados.pkl    passos de warm_default_view que não dependem da data
+# A pasta do sha é gravada ao lado e renomeada; o ponteiro, trocado por
+# último — quem lê nunca vê uma publicação pela metade.
+#
+#   python idso_publish.py base.xlsx --dir /srv/idso/publicado
+#   python idso_publish.py --dir /srv/idso/publicado --status
+# ======================================================
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+from datetime import datetime, date
+
+import pandas as pd
+
+from idso_core import fmt_int, read_workbook, prepare_idso
+from idso_warm import warm_default_view
+from idso_arrow import write_frame, read_frame
+
+PONTEIRO = "atual.json"
+ARQ_BASE = "preparado.arrow"
+ARQ_AGREGADOS = "agregados.pkl"
+
+# passos que dependem da data de referência (recalculados a cada dia)
+PASSOS_DATADOS = {"xlsx_pendencias"}
+
+class PublishedUnavailable(Exception):
+    """A publicação apontada não pôde ser lida (removida ou corrompida)."""
+
+def _dump(obj, caminho):
+    with open(caminho, "wb") as fh:
+        pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _load(caminho):
+    with open(caminho, "rb") as fh:
+        return pickle.load(fh)
+
+# ======================================================
+# PUBLICAR
+# ======================================================
+def publish(diretorio: str, file_bytes: bytes, nome: str, df: pd.DataFrame = None,
+            publicado_por: str = None, manter: int = 2, today: date = None, sha: str = None) -> dict:
+    """
+    Publica a planilha: grava base preparada + agregados e aponta atual.json
+    para ela. df: base já preparada (evita preparar de novo). Base sem
+    planilha (sincronizada com a lista, idso_sync): file_bytes None, df e sha
+    informados. Mantém as `manter` publicações mais recentes em disco;
+    devolve os metadados.
+    """
+    t0 = time.perf_counter()
+    sha = sha or hashlib.sha256(file_bytes).hexdigest()
+    if df is None:
+        df = prepare_idso(read_workbook(file_bytes)[0])
+
+    agregados = {
+        passo: (assinatura, valor)
+        for passo, assinatura, valor in warm_default_view(df, today or date.today())
+        if passo not in PASSOS_DATADOS
+    }
+
+    os.makedirs(diretorio, exist_ok=True)
+    destino = os.path.join(diretorio, sha)
+    tmp = f"{destino}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    write_frame(os.path.join(tmp, ARQ_BASE), df)
+    _dump(agregados, os.path.join(tmp, ARQ_AGREGADOS))
+
+    meta = {
+        "sha": sha,
+        "nome": nome,
+        "linhas": int(len(df)),
+        "bytes_planilha": len(file_bytes) if file_bytes is not None else None,
+        "publicado_em": datetime.now().isoformat(timespec="seconds"),
+        "publicado_por": publicado_por,
+        "passos": [str(p) for p in agregados],
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+
+    # mesmo arquivo publicado de novo: substitui a pasta
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    os.replace(tmp, destino)
+    _write_pointer(diretorio, meta)
+    _prune(diretorio, manter, sha)
+
+    meta["segundos"] = round(time.perf_counter() - t0, 2)
+    return meta
+
+def _write_pointer(diretorio, meta):
+    tmp = os.path.join(diretorio, f"{PONTEIRO}.tmp-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(diretorio, PONTEIRO))
+
+def _prune(diretorio, manter, atual):
+    # publicações antigas: ficam as `manter` mais recentes (a atual sempre)
+    pastas = [
+        os.path.join(diretorio, d) for d in os.listdir(diretorio)
+        if len(d) == 64 and os.path.isdir(os.path.join(diretorio, d))
+    ]
+    pastas.sort(key=os.path.getmtime, reverse=True)
+    for pasta in [p for p in pastas if os.path.basename(p) != atual][max(manter - 1, 0):]:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+def unpublish(diretorio: str) -> bool:
+    """Tira o conjunto do ar (as sessões novas voltam a pedir upload); os arquivos ficam."""
+    try:
+        os.remove(os.path.join(diretorio, PONTEIRO))
+        return True
+    except FileNotFoundError:
+        return False
+
+# ======================================================
+# LER
+# ======================================================
+def published_meta(diretorio: str):
+    """Metadados do conjunto publicado, ou None (nada publicado / ponteiro ilegível)."""
+    if not diretorio:
+        return None
+    try:
+        with open(os.path.join(diretorio, PONTEIRO), encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return meta if os.path.isdir(os.path.join(diretorio, str(meta.get("sha")))) else None
+
+def load_published(diretorio: str, sha: str):
+    """(base preparada, {passo: (assinatura, valor)}) da publicação `sha`."""
+    pasta = os.path.join(diretorio, sha)
+    try:
+        # mapeada: processos do mesmo host compartilham as páginas do arquivo
+        df = read_frame(os.path.join(pasta, ARQ_BASE))
+    except (OSError, ValueError) as e:
+        raise PublishedUnavailable(f"{sha[:12]}: {e}") from e
+    try:
+        agregados = _load(os.path.join(pasta, ARQ_AGREGADOS))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        agregados = {}              # sem agregados o painel só recalcula a visão padrão
+    return df, agregados
+
+# ======================================================
+# LINHA DE COMANDO
+# ======================================================
+def _parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Publica uma planilha IDSO para todas as sessões do painel.")
+    ap.add_argument("planilha", nargs="?", help="planilha base do IDSO (.xlsx)")
+    ap.add_argument("--dir", default=os.environ.get("IDSO_PUBLISH_DIR"), help="pasta de publicação (padrão: IDSO_PUBLISH_DIR)")
+    ap.add_argument("--manter", type=int, default=2, help="publicações mantidas em disco (padrão: 2)")
+    ap.add_argument("--status", action="store_true", help="mostra o conjunto publicado e sai")
+    ap.add_argument("--despublicar", action="store_true", help="tira o conjunto do ar e sai")
+    return ap.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if not args.dir:
+        print("❌ informe --dir ou IDSO_PUBLISH_DIR")
+        return 2
+    if args.despublicar:
+        print("✅ despublicado" if unpublish(args.dir) else "ℹ️ nada publicado")
+        return 0
+    if args.status or not args.planilha:
+        meta = published_meta(args.dir)
+        if meta is None:
+            print("ℹ️ nada publicado")
+        else:
+            print(f"📌 {meta['nome']} • {fmt_int(meta['linhas'])} linhas • {meta['sha'][:12]} • {meta['publicado_em']}")
+        return 0
+
+    with open(args.planilha, "rb") as fh:
+        dados = fh.read()
+    meta = publish(args.dir, dados, os.path.basename(args.planilha), manter=args.manter,
+                   publicado_por=os.environ.get("USER"))
+    print(f"✅ publicado {meta['nome']} • {fmt_int(meta['linhas'])} linhas • {meta['sha'][:12]} • {meta['segundos']} s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
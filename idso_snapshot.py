@@ -0,0 +1,184 @@
+# ======================================================
+# IDSO — SNAPSHOT HTML OFFLINE (ARQUIVO ÚNICO)
+# Cards, banners, gráficos, ranking e metas em um .html que abre sem
+# internet e sem acesso ao painel. O plotly.js entra uma única vez e o
+# JSON das figuras é compartilhado: partes do template e figuras
+# repetidas são gravadas uma vez só e referenciadas por índice.
+# ======================================================
+import hashlib
+import html
+import json
+from functools import lru_cache
+
+import pandas as pd
+import plotly.io as pio
+
+from idso_core import (
+    ANO_COLORS, ORDEM_INDICADORES,
+    apply_filters, agg_eventos_mes, kpi_values, fmt_int,
+    agg_indicador, agg_ano, agg_rank,
+    metas_vigentes, metas_grid, status_metas,
+)
+from idso_views import (
+    ACCENT, card_html, stat_banner_mov_years, stat_banner_years,
+    compact_figure, default_color_map,
+    build_fig1, build_fig2, build_fig3,
+    rank_cards_html, metas_grid_html, status_html,
+)
+
+# ajustes para a página fora do Streamlit (o CSS do painel vem junto)
+SNAPSHOT_CSS = """
+body{margin:0;background:#f6f7f9;color:#1f2933;font-family:"Source Sans Pro",Arial,sans-serif;}
+.snap{max-width:1280px;margin:0 auto;padding:24px 28px 40px;}
+.snap h1{margin:0 0 4px;font-size:26px;}
+.snap .snap-sub{color:#5a6470;font-size:13px;margin-bottom:18px;}
+.snap h3{margin:26px 0 10px;font-size:18px;color:#3b4552;}
+.snap-cards{display:grid;grid-template-columns:repeat(4,1fr);gap:14px;margin-bottom:12px;}
+.snap-fig{background:#fff;border-radius:10px;margin:10px 0;min-height:420px;}
+"""
+
+@lru_cache(maxsize=1)
+def plotly_js() -> str:
+    # bundle do pacote plotly instalado (mesma versão usada nas figuras)
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs()
+
+def _digest(obj) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def shared_figures(figs) -> tuple:
+    """
+    Serializa as figuras com as partes repetidas em um pool único:
+    o template é quebrado em layout + defaults de cada tipo de trace
+    (a compactação deixa em cada figura só os tipos usados), e figuras
+    idênticas viram uma só. Devolve (pool, figuras, índice de cada
+    figura de entrada em figuras).
+    """
+    pool, pool_pos = [], {}
+    figuras, fig_pos = [], {}
+    refs = []
+
+    def guarda(obj) -> int:
+        chave = _digest(obj)
+        if chave not in pool_pos:
+            pool_pos[chave] = len(pool)
+            pool.append(obj)
+        return pool_pos[chave]
+
+    for fig in figs:
+        spec = json.loads(pio.to_json(fig, validate=False))
+        layout = spec.get("layout", {})
+        tpl = layout.pop("template", None)
+        t = None
+        if tpl is not None:
+            t = {
+                "l": guarda(tpl.get("layout", {})),
+                "d": {tipo: guarda(v) for tipo, v in tpl.get("data", {}).items()},
+            }
+        item = {"d": spec.get("data", []), "l": layout, "t": t}
+        chave = _digest(item)
+        if chave not in fig_pos:
+            fig_pos[chave] = len(figuras)
+            figuras.append(item)
+        refs.append(fig_pos[chave])
+    return pool, figuras, refs
+
+def _json_script(obj) -> str:
+    # JSON seguro dentro de <script>
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).replace("</", "<\\/")
+
+_RENDER_JS = """
+(function(){
+  var P=JSON.parse(document.getElementById("idso-pool").textContent);
+  var F=JSON.parse(document.getElementById("idso-figs").textContent);
+  document.querySelectorAll("[data-fig]").forEach(function(el){
+    var f=F[+el.dataset.fig];
+    var layout=Object.assign({},f.l);
+    if(f.t){
+      var data={};
+      Object.keys(f.t.d).forEach(function(k){data[k]=P[f.t.d[k]];});
+      layout.template={layout:P[f.t.l],data:data};
+    }
+    Plotly.newPlot(el,f.d,layout,{displaylogo:false,responsive:true});
+  });
+})();
+"""
+
+def build_snapshot_html(titulo: str, blocos, css: str = "", subtitulo: str = "") -> str:
+    """
+    blocos: sequência de ("titulo", texto) | ("html", fragmento) | ("fig", figura Plotly).
+    """
+    figs = [valor for tipo, valor in blocos if tipo == "fig"]
+    pool, figuras, refs = shared_figures(figs)
+
+    corpo = []
+    n_fig = 0
+    for tipo, valor in blocos:
+        if tipo == "titulo":
+            corpo.append(f"<h3>{html.escape(valor)}</h3>")
+        elif tipo == "html":
+            corpo.append(valor)
+        elif tipo == "fig":
+            corpo.append(f'<div class="snap-fig" data-fig="{refs[n_fig]}"></div>')
+            n_fig += 1
+
+    return "".join([
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        f"<title>{html.escape(titulo)}</title>",
+        f"<style>{css}{SNAPSHOT_CSS}</style>",
+        f"<script>{plotly_js()}</script>",
+        '</head><body><div class="snap">',
+        f"<h1>{html.escape(titulo)}</h1>",
+        f'<div class="snap-sub">{html.escape(subtitulo)}</div>' if subtitulo else "",
+        *corpo,
+        "</div>",
+        f'<script type="application/json" id="idso-pool">{_json_script(pool)}</script>',
+        f'<script type="application/json" id="idso-figs">{_json_script(figuras)}</script>',
+        f"<script>{_RENDER_JS}</script>",
+        "</body></html>",
+    ])
+
+def kpi_cards_html(kpis: dict) -> str:
+    return '<div class="snap-cards">' + "".join([
+        card_html("Aeroportos", fmt_int(kpis["aeroportos"]), icon="🛫"),
+        card_html("Indicadores", fmt_int(kpis["indicadores"]), icon="📌"),
+        card_html("Eventos", fmt_int(kpis["eventos"]), icon="🚩"),
+        card_html("Movimentações", fmt_int(kpis["mov"]), icon="🧮", cor_valor=ACCENT, subtitulo="(soma mensal por aeroporto)"),
+    ]) + "</div>"
+
+def airport_blocos(df: pd.DataFrame, aeroporto: str, ano_meta: int) -> list:
+    """Blocos do snapshot de um aeroporto (todos os anos, metas do ano_meta) — uso no lote."""
+    df_f = apply_filters(df, [aeroporto], None, None, None)
+    blocos = [
+        ("html", kpi_cards_html(kpi_values(df_f))),
+        ("html", stat_banner_mov_years(df_f)),
+        ("html", stat_banner_years(df_f)),
+    ]
+    if df_f.empty:
+        return blocos
+
+    ser = agg_eventos_mes(df_f)
+    anos = sorted(ser["ano"].unique().tolist())
+    ind_sum = agg_indicador(df_f)
+    byy = agg_ano(df_f)
+    blocos += [
+        ("titulo", "1) Eventos por mês"),
+        ("fig", compact_figure(build_fig1(ser, default_color_map(anos, ANO_COLORS), "Todos os Indicadores"))),
+        ("titulo", "2) Eventos por indicador"),
+        ("fig", compact_figure(build_fig2(ind_sum, default_color_map(ind_sum["indicador"].tolist())))),
+        ("titulo", "3) Eventos por ano"),
+        ("fig", compact_figure(build_fig3(byy, default_color_map(byy["ano"].tolist())))),
+    ]
+
+    rank_df = agg_rank(df_f, "Indicador por Eventos")
+    for indicador in [i for i in ORDEM_INDICADORES if i in set(rank_df["indicador"])]:
+        blocos += [("titulo", f"📌 {indicador}"), ("html", rank_cards_html(rank_df, indicador, "Indicador por Eventos"))]
+
+    metas = metas_vigentes(ano_meta)
+    blocos += [
+        ("titulo", f"🎯 Acompanhamento de Metas • Ano {ano_meta}"),
+        ("html", metas_grid_html(metas_grid(df_f[df_f["ano"] == ano_meta], aeroporto, ORDEM_INDICADORES, [ano_meta], metas))),
+        ("html", status_html(*status_metas(df, ano_meta, metas, aeroportos=[aeroporto]))),
+    ]
+    return blocos
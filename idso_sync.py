@@ -0,0 +1,153 @@
+# ======================================================
+# IDSO — SINCRONIZAÇÃO INCREMENTAL COM A LISTA (SEM STREAMLIT)
+# A planilha é uma exportação de uma lista (colunas Criado / Criado por).
+# Em vez de reexportar o histórico todo a cada mês, busca na API de
+# listagem só os itens criados a partir da marca d'água (maior criado_em
+# da base) e junta na base preparada pela chave.
+#
+# Contrato da API (estilo OData, como o das listas de onde vem a planilha):
+#   GET <url>?$filter=Criado ge '<ISO>'&$orderby=Criado&$top=<n>
+#   → {"value": [{"AEROPORTO": ..., "ANO": ..., ..., "Criado": "<ISO>"}, ...],
+#      "@odata.nextLink": "<url da próxima página>" (ausente na última)}
+# Os itens usam os nomes de coluna da planilha (RENAME), então passam
+# pelo mesmo prepare_idso. bench/list_server.py é um servidor local
+# com esse contrato, para testes.
+#
+# Datas: Criado é tratado em UTC (sem fuso na base); a marca vai como '…Z'.
+#
+# Limites: só itens CRIADOS depois da marca entram; edição ou exclusão de
+# itens antigos exige recarga completa (sync_dataset(..., completo=True)).
+# ======================================================
+import hashlib
+import json
+import time
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from idso_core import RENAME, prepare_idso
+
+ITENS = "value"
+PROXIMA = ("@odata.nextLink", "odata.nextLink")
+CAMPO_CRIADO = "Criado"
+
+# ======================================================
+# SESSÃO HTTP
+# ======================================================
+def make_session(token: str = None, pool: int = 4, tentativas: int = 3) -> requests.Session:
+    """
+    Session com pool de conexões (keep-alive entre páginas e entre
+    sincronizações) e novas tentativas com espera em 429/5xx.
+    """
+    sessao = requests.Session()
+    retry = Retry(
+        total=tentativas, backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adaptador = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=retry)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    sessao.headers["Accept"] = "application/json"
+    if token:
+        sessao.headers["Authorization"] = f"Bearer {token}"
+    return sessao
+
+# ======================================================
+# BUSCA
+# ======================================================
+def watermark(df: pd.DataFrame):
+    """Maior criado_em da base (None sem a coluna ou sem datas)."""
+    if df is None or "criado_em" not in df.columns:
+        return None
+    marca = df["criado_em"].max()
+    return None if pd.isna(marca) else pd.Timestamp(marca)
+
+def _utc(valor) -> pd.Timestamp:
+    # a base guarda criado_em sem fuso, em UTC; com fuso, converte e tira o fuso
+    ts = pd.Timestamp(valor)
+    return ts if ts.tz is None else ts.tz_convert("UTC").tz_localize(None)
+
+def _iso_utc(valor) -> str:
+    return _utc(valor).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def fetch_since(sessao: requests.Session, url: str, desde=None, pagina: int = 500,
+                timeout: float = 30, progress=None):
+    """
+    Itens criados em/depois de `desde` (todos, se None), página a página.
+    Devolve (DataFrame cru com as colunas da planilha, nº de páginas).
+    """
+    params = {"$orderby": CAMPO_CRIADO, "$top": pagina}
+    if desde is not None:
+        params["$filter"] = f"{CAMPO_CRIADO} ge '{_iso_utc(desde)}'"
+
+    itens, paginas, proxima = [], 0, url
+    while proxima:
+        resp = sessao.get(proxima, params=params, timeout=timeout)
+        resp.raise_for_status()
+        corpo = resp.json()
+        itens.extend(corpo.get(ITENS, []))
+        paginas += 1
+        if progress:
+            progress(paginas, len(itens))
+        # o link da próxima página já traz os parâmetros
+        proxima, params = next((corpo[k] for k in PROXIMA if corpo.get(k)), None), None
+
+    raw = pd.DataFrame(itens)
+    if raw.empty:
+        return raw, paginas
+    raw = raw[[c for c in RENAME if c in raw.columns]]
+    if CAMPO_CRIADO in raw.columns:
+        # "…Z"/"…+03:00" viriam com fuso e não juntariam com a base (sem fuso): UTC sem fuso
+        raw[CAMPO_CRIADO] = pd.to_datetime(raw[CAMPO_CRIADO], errors="coerce", utc=True).dt.tz_convert(None)
+    return raw, paginas
+
+# ======================================================
+# JUNÇÃO
+# ======================================================
+def merge_by_chave(df: pd.DataFrame, novos: pd.DataFrame, desde=None) -> tuple:
+    """
+    Junta os itens novos (já preparados) na base, pela chave. Linhas da base
+    com chave presente em `novos` e criado_em >= desde foram buscadas antes
+    na mesma fronteira e são substituídas; as demais ficam. Sem `desde`
+    (recarga completa), `novos` é a base inteira. Devolve (base, estatísticas).
+    """
+    if desde is None or df is None:
+        return novos.reset_index(drop=True), {"novas": len(novos), "substituidas": 0, "chaves_novas": novos["chave"].nunique()}
+
+    novos = novos.astype({c: t for c, t in df.dtypes.items() if c in novos.columns})
+    mesma_fronteira = df["chave"].isin(novos["chave"]) & (df["criado_em"] >= desde)
+    base = pd.concat([df[~mesma_fronteira], novos], ignore_index=True)
+    return base, {
+        "novas": int(len(novos) - mesma_fronteira.sum()),
+        "substituidas": int(mesma_fronteira.sum()),
+        "chaves_novas": int((~novos["chave"].isin(df["chave"])).sum()),
+    }
+
+def sync_id(sha_base, raw_novos: pd.DataFrame) -> str:
+    """Identidade da base sincronizada: sha da base de origem + conteúdo dos itens novos."""
+    h = hashlib.sha256((sha_base or "").encode())
+    h.update(json.dumps(raw_novos.astype(str).to_numpy().tolist(), ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+def sync_dataset(sessao, url, df=None, sha_base=None, completo=False, pagina=500, timeout=30, progress=None) -> dict:
+    """
+    Sincroniza a base com a lista: incremental a partir da marca d'água de df
+    (ou completa, sem df / completo=True). Devolve um dict com df, sha,
+    estatísticas, marca usada e tempos; df None quando não veio nada novo.
+    """
+    t0 = time.perf_counter()
+    desde = None if completo else watermark(df)
+    raw, paginas = fetch_since(sessao, url, desde, pagina=pagina, timeout=timeout, progress=progress)
+    resultado = {"desde": desde, "paginas": paginas, "itens": len(raw), "df": None, "sha": sha_base}
+    if not raw.empty:
+        novos = prepare_idso(raw)
+        base, stats = merge_by_chave(None if completo else df, novos, desde)
+        resultado.update(stats)
+        # só a fronteira voltou (itens já conhecidos): a base não muda
+        if completo or stats["novas"] > 0:
+            resultado.update(df=base, sha=sync_id(None if completo else sha_base, raw), linhas=len(base))
+    resultado["segundos"] = round(time.perf_counter() - t0, 2)
+    return resultado
@@ -0,0 +1,1147 @@
+# ======================================================
+# IDSO — VISUALIZAÇÃO SEM STREAMLIT
+# CSS, cards, banners, figuras Plotly e blocos HTML (ranking, metas,
+# status). Usado pelo painel e pelos arquivos gerados fora dele
+# (snapshot HTML, lote por aeroporto).
+# ======================================================
+import base64
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from idso_core import fmt_int, meta_faixa
+
+# plotly.express (e a árvore de ciência de dados que ele puxa) só é
+# importado dentro das build_fig*: a tela inicial, só com o upload, não
+# precisa dele. graph_objects/io o próprio Streamlit já carrega.
+
+# ======================================================
+# FONTE + CSS
+# ======================================================
+ACCENT = "#96CE00"  # cor institucional
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_PATH = os.path.join(APP_DIR, "static", "fonts", "Brighter-Regular.otf")
+
+# gráficos de linha acima disso viram Scattergl (IDSO_WEBGL_THRESHOLD)
+WEBGL_POINT_THRESHOLD = int(os.environ.get("IDSO_WEBGL_THRESHOLD", "1500"))
+
+def load_font_base64(path):
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+def font_data_url(path=FONT_PATH) -> str:
+    # fonte embutida no próprio CSS (arquivos offline)
+    return f"url(data:font/opentype;base64,{load_font_base64(path)}) format('opentype')"
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};])\s*", r"\1", css)
+    return css.strip()
+
+def build_css(font_src: str) -> str:
+    return minify_css(f"""
+
+    /* ======================================================
+       FONTE BRIGHTER (AJUSTE ÚNICO)
+       ====================================================== */
+    @font-face {{
+        font-family: 'Brighter';
+        src: {font_src};
+        font-weight: normal;
+        font-style: normal;
+    }}
+
+    html, body, [class*="css"] {{
+        font-family: 'Brighter', Arial, sans-serif !important;
+    }}
+
+    /* ======================================================
+       AJUSTE DA FONTE DO FILE UPLOADER (REMOVE CURSIVA)
+       ====================================================== */
+    [data-testid="stFileUploader"] *,   
+    [data-testid="stFileUploader"] * {{
+        font-family: system-ui, -apple-system, BlinkMacSystemFont,
+                    "Segoe UI", Roboto, Helvetica, Arial, sans-serif !important;
+        font-style: normal !important;
+        font-weight: normal !important;
+    }}
+
+    /* Remove qualquer “sobra” da sidebar */
+    [data-testid="stSidebar"] {{
+        display: none !important;
+        width: 0 !important;
+        min-width: 0 !important;
+        max-width: 0 !important;
+    }}
+    section[data-testid="stSidebarContent"] {{
+        display: none !important;
+    }}
+
+    /* Remove header/footer do Streamlit */
+    header, footer {{ visibility: hidden; height: 0px; }}
+
+    /* Ajusta container principal */
+    div.block-container {{
+        padding-top: 1.0rem;
+        padding-left: 2.0rem;
+        padding-right: 2.0rem;
+        max-width: 1500px;
+    }}
+
+    /* Chips (multiselect) */
+    [data-baseweb="tag"] {{
+        background-color: {ACCENT} !important;
+        color: #ffffff !important;
+        border-radius: 999px !important;
+        font-weight: 900 !important;
+        border: 1px solid rgba(0,0,0,0.12) !important;
+    }}
+    [data-baseweb="tag"] svg {{ color: #ffffff !important; }}
+
+    /* Cards KPI */
+    .kpi-card {{
+        background-color:#f2f3f5;
+        padding:16px;
+        border-radius:16px;
+        text-align:center;
+        border: 1px solid rgba(0,0,0,0.07);
+        box-shadow: 0 6px 16px rgba(0,0,0,0.06);
+    }}
+    .kpi-title {{
+        font-size:16px;
+        font-weight:900;
+        margin-bottom:6px;
+        color:#1a2732;
+    }}
+    .kpi-value {{
+        font-size:34px;
+        font-weight:1000;
+        line-height:1.1;
+    }}
+    .kpi-sub {{
+        font-size:13px;
+        margin-top:6px;
+        font-weight:800;
+        color:#5b6b7b;
+    }}
+
+    /* Banner estatístico */
+    .stat-banner {{
+        background: linear-gradient(90deg, #233243 0%, #2c3e50 55%, #233243 100%);
+        color: white;
+        padding: 14px 18px;
+        border-radius: 16px;
+        border: 1px solid rgba(255,255,255,0.10);
+        margin-top: 8px;
+        margin-bottom: 14px;
+        box-shadow: 0 8px 18px rgba(0,0,0,0.12);
+    }}
+    .stat-title {{
+        text-align:center;
+        font-weight:1000;
+        letter-spacing: 0.5px;
+        margin-bottom: 10px;
+        font-size: 18px;
+    }}
+    .stat-line {{
+        text-align:center;
+        font-weight:900;
+        font-size: 16px;
+        line-height: 1.6;
+        white-space: pre-wrap;
+    }}
+    .up {{ color: {ACCENT}; font-weight: 1000; }}
+    .down {{ color: #ff5a5f; font-weight: 1000; }}
+    .flat {{ color: #d0d7de; font-weight: 1000; }}
+
+    /* Pendências com pisca */
+    @keyframes blinkRed {{
+        0%   {{ box-shadow: 0 0 0 rgba(255,0,0,0.0); background:#ffe9ea; }}
+        50%  {{ box-shadow: 0 0 18px rgba(255,0,0,0.35); background:#ffd6d9; }}
+        100% {{ box-shadow: 0 0 0 rgba(255,0,0,0.0); background:#ffe9ea; }}
+    }}
+    .pending-card {{
+        border-radius:16px;
+        border: 1px solid rgba(155,28,28,0.20);
+        padding: 12px 14px;
+        animation: blinkRed 1.2s infinite;
+        margin-bottom: 10px;
+        box-shadow: 0 8px 18px rgba(0,0,0,0.08);
+    }}
+
+    .pending-title {{
+    text-align: center;
+    font-weight: 1000;
+    font-size: 18px;
+    color: #ff5a5f;
+    margin-bottom: 6px;
+    }}
+
+    /* ======================================================
+       RANKING – TOP EVENTOS POR INDICADOR (MINI CARDS)
+       ====================================================== */
+    .rank-grid {{
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(140px, 1fr));
+        gap: 14px;
+        margin-top: 12px;
+        margin-bottom: 20px;
+    }}
+
+    .rank-card-mini {{
+        background: #f8f9fb;
+        border: 2px solid {ACCENT};
+        border-radius: 14px;
+        padding: 12px 10px;
+        text-align: center;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.06);
+    }}
+
+    .rank-pos {{
+        font-size: 11px;
+        font-weight: 900;
+        color: #6b7c93;
+    }}
+
+    .rank-aero {{
+        font-size: 17px;
+        font-weight: 1000;
+        margin-top: 4px;
+        color: #1a2732;
+        letter-spacing: 0.4px;
+    }}
+
+    .rank-value {{
+        font-size: 22px;
+        font-weight: 1000;
+        margin-top: 6px;
+        color: #1a2732;
+        line-height: 1.1;
+    }}
+
+    .rank-label {{
+        font-size: 11px;
+        font-weight: 900;
+        color: #6b7c93;
+    }}
+
+    /* ======================================================
+       🔥 INCLUSÕES — DESTAQUES DE RANKING
+       ====================================================== */
+
+    .rank-top-1 {{
+        background: linear-gradient(135deg, #fff4cc, #ffe08a);
+        border: 3px solid #d4af37 !important;
+        box-shadow: 0 6px 20px rgba(212,175,55,0.45);
+    }}
+
+    .rank-top-3 {{
+        border-width: 3px !important;
+    }}
+
+    .rank-ind-RI {{ border-color: #ff6b6b !important; }}
+    .rank-ind-FOD {{ border-color: #ff9f43 !important; }}
+    .rank-ind-COLISAO {{ border-color: #1dd1a1 !important; }}
+    .rank-ind-FAUNA {{ border-color: #54a0ff !important; }}
+    .rank-ind-OUTROS {{ border-color: #8395a7 !important; }}
+
+    /* ======================================================
+       🔰 TÍTULO PRINCIPAL DO APP (INCLUSÃO)
+       ====================================================== */
+    .app-title {{
+        text-align: center;
+        color: #96CE00;
+        font-size: 40px;
+        font-weight: 1000;
+        margin-bottom: 6px;
+    }}
+
+    .app-subtitle {{
+        text-align: center;
+        color: #96CE00;
+        font-size: 60px;
+        font-weight: 400;
+        letter-spacing: 0.6px;
+        margin-top: 0px;
+        margin-bottom: 24px;
+        font-family: "Brighter", "Brighter Regular", Arial, sans-serif;
+    }}
+
+    /* ======================================================
+   🔽 AJUSTE REAL DO TEXTO DOS EXPANDERS (FUNCIONA)
+   ====================================================== */
+    div[data-testid="stExpander"] div[data-testid="stMarkdownContainer"] p {{
+        font-size: 18px !important;   /* 🔥 AGORA FUNCIONA */
+        font-weight: 1000 !important;
+        color: #1a2732 !important;
+        margin: 0 !important;
+    }}
+
+    /* ======================================================
+    🎯 METAS — GRID ELEGANTE (IGUAL AO RANKING)
+    ====================================================== */
+
+    .metas-grid {{
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+        gap: 18px;
+        margin-top: 16px;
+        margin-bottom: 28px;
+    }}
+
+    .meta-card {{
+        background: #f8f9fb;
+        border: 2px solid rgba(0,0,0,0.08);
+        border-radius: 16px;
+        padding: 16px 14px;
+        text-align: center;
+        box-shadow: 0 6px 16px rgba(0,0,0,0.06);
+        display: flex;
+        flex-direction: column;
+        gap: 6px;
+        position: relative;
+    }}
+
+    .meta-title {{
+        font-size: 16px;
+        font-weight: 1000;
+        color: #1a2732;
+        min-height: 56px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        text-align: center;
+    }}
+
+    .meta-aero {{
+        font-size: 11px;
+        font-weight: 900;
+        color: #6b7c93;
+        text-transform: uppercase;
+        letter-spacing: 0.4px;
+    }}
+
+    .meta-value {{
+        font-size: 42px;
+        font-weight: 1000;
+        line-height: 1.1;
+        min-height: 48px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+    }}
+
+    .meta-sub {{
+        font-size: 16px;
+        font-weight: 1000;
+        color: #5b6b7b;
+    }}
+
+    .meta-bar {{
+        background: #e5e7eb;
+        border-radius: 999px;
+        height: 10px;
+        overflow: hidden;
+    }}
+
+    .meta-bar-fill {{
+        height: 100%;
+        border-radius: 999px;
+        transition: width 0.6s ease;
+    }}
+
+    .meta-pct {{
+        font-size: 14px;
+        font-weight: 1000;
+        color: #1a2732;
+    }}
+
+    /* Selo de status */
+    .meta-badge {{
+        position: absolute;
+        top: 12px;
+        right: 14px;
+        font-size: 11px;
+        font-weight: 1000;
+        padding: 4px 10px;
+        border-radius: 999px;
+    }}
+
+    .meta-ok {{
+        background: #e8f6d8;
+        color: #5ca000;
+    }}
+
+    .meta-warn {{
+        background: #fff3cd;
+        color: #b78103;
+    }}
+
+    .meta-bad {{
+        background: #ffe2e5;
+        color: #c62828;
+    }}
+
+    /* ======================================================
+    🎯 STATUS DAS METAS POR AEROPORTO
+    ====================================================== */
+
+    .status-group {{
+        margin-top: 18px;
+        margin-bottom: 28px;
+    }}
+
+    .status-title {{
+        font-size: 18px;
+        font-weight: 1000;
+        color: #1a2732;
+        margin-bottom: 10px;
+    }}
+
+    .status-grid {{
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(120px, 1fr));
+        gap: 12px;
+    }}
+
+    .status-card {{
+        border-radius: 14px;
+        padding: 14px 10px;
+        text-align: center;
+        font-weight: 1000;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.06);
+    }}
+
+    .status-aero {{
+        font-size: 16px;
+        letter-spacing: 0.5px;
+    }}
+
+    .status-detail {{
+        font-size: 12px;
+    }}
+    """)
+
+# ======================================================
+# CARDS + BANNERS
+# ======================================================
+def card_html(titulo, valor, cor_valor="#333", subtitulo=None, icon=None):
+    ic = f"{icon} " if icon else ""
+    sub = f'<div class="kpi-sub">{subtitulo}</div>' if subtitulo else ""
+    return f"""
+    <div class="kpi-card">
+        <div class="kpi-title">{ic}{titulo}</div>
+        <div class="kpi-value" style="color:{cor_valor};">{valor}</div>
+        {sub}
+    </div>
+    """
+
+def stat_banner_mov_years(df_f: pd.DataFrame):
+    if df_f.empty:
+        return ""
+
+    # 🔹 remove duplicidade de movimentação por indicador
+    base = (
+        df_f
+        .drop_duplicates(subset=["aeroporto", "ano", "ordem_mes"])
+        .copy()
+    )
+
+    byy = (
+        base
+        .groupby("ano", as_index=False)["mov"]
+        .sum()
+        .sort_values("ano", ascending=False)
+    )
+
+    byy["prev"] = byy["mov"].shift(-1)
+
+    parts = []
+    for _, r in byy.iterrows():
+        ano = int(r["ano"])
+        mov = int(r["mov"])
+
+        if pd.notna(r["prev"]) and int(r["prev"]) != 0:
+            pct = (mov / int(r["prev"])) - 1
+            if pct > 0:
+                arrow = f'<span class="up">(+{abs(pct)*100:.0f}% ↑)</span>'
+            elif pct < 0:
+                arrow = f'<span class="down">(-{abs(pct)*100:.0f}% ↓)</span>'
+            else:
+                arrow = f'<span class="flat">(0% •)</span>'
+        else:
+            arrow = ""
+
+        parts.append(f"{ano}: {fmt_int(mov)} {arrow}")
+
+    line = " | ".join(parts)
+
+    return f"""
+    <div class="stat-banner">
+        <div class="stat-title">COMPARATIVO ESTATÍSTICO – MOVIMENTAÇÕES</div>
+        <div class="stat-line">{line}</div>
+    </div>
+    """
+
+def stat_banner_years(df_f: pd.DataFrame):
+    if df_f.empty:
+        return ""
+    byy = df_f.groupby("ano", as_index=False)["eventos"].sum().sort_values("ano", ascending=False)
+    byy["prev"] = byy["eventos"].shift(-1)
+    parts = []
+    for _, r in byy.iterrows():
+        ano = int(r["ano"]); ev = int(r["eventos"])
+        if pd.notna(r["prev"]) and int(r["prev"]) != 0:
+            pct = (ev / int(r["prev"])) - 1
+            if pct > 0:
+                arrow = f'<span class="up">(+{abs(pct)*100:.0f}% ↑)</span>'
+            elif pct < 0:
+                arrow = f'<span class="down">(-{abs(pct)*100:.0f}% ↓)</span>'
+            else:
+                arrow = f'<span class="flat">(0% •)</span>'
+        else:
+            arrow = ""
+        parts.append(f"{ano}: {fmt_int(ev)} {arrow}")
+    line = " | ".join(parts)
+    return f"""
+    <div class="stat-banner">
+        <div class="stat-title">COMPARATIVO ESTATÍSTICO – EVENTOS IDSO</div>
+        <div class="stat-line">{line}</div>
+    </div>
+    """
+
+# ======================================================
+# PLOTLY – PAYLOAD COMPACTO
+# ======================================================
+def _int_only(fmt):
+    return lambda v: fmt(v) if float(v).is_integer() else None
+
+# rótulo gerado no Python → texttemplate que o navegador desenha igual com os
+# separadores padrão do Plotly. Rótulos com milhar (fmt_int ≥ 1.000) ou com
+# vírgula decimal ficam como texto: trocá-los exigiria layout.separators, que
+# mudaria também os ticks dos eixos e o hover.
+TEXT_TEMPLATES = [
+    (_int_only(lambda v: str(int(v))), "%{y:.0f}"),
+]
+
+# atributos por ponto que viram escalar quando todos os valores são iguais
+PER_POINT_ATTRS = [
+    ("textposition",),
+    ("textfont", "color"),
+    ("textfont", "size"),
+    ("marker", "color"),
+    ("marker", "size"),
+]
+
+def _round_array(values, decimals):
+    arr = np.asarray(values)
+    if arr.dtype.kind != "f" or arr.size == 0:
+        return values
+    arr = np.round(arr, decimals if decimals is not None else 6)
+    finite = np.isfinite(arr)
+    if finite.all() and (arr == np.round(arr)).all():
+        return arr.astype(np.int64)
+    return arr
+
+def _text_template(text, y):
+    if text is None or y is None or isinstance(text, str):
+        return None
+    text = list(text)
+    y = list(np.asarray(y).tolist())
+    if not text or len(text) != len(y):
+        return None
+    for fmt, template in TEXT_TEMPLATES:
+        try:
+            if all(t == fmt(v) for t, v in zip(text, y)):
+                return template
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def compact_figure(fig, decimals=None):
+    """
+    Reduz o JSON enviado ao navegador sem mudar o que é exibido:
+    - arredonda floats para a precisão de exibição (inteiros viram int)
+    - troca arrays de rótulo inteiro sem milhar por texttemplate
+    - colapsa arrays por ponto que repetem o mesmo valor
+    - acima de WEBGL_POINT_THRESHOLD pontos, linhas viram Scattergl
+    """
+    fig = go.Figure(fig)   # cópia: a figura original pode ser compartilhada (pré-computação)
+    traces = []
+
+    for trace in fig.data:
+        for eixo in ("x", "y"):
+            valores = getattr(trace, eixo, None)
+            if valores is not None and not isinstance(valores, str):
+                trace[eixo] = _round_array(valores, decimals)
+
+        template = _text_template(getattr(trace, "text", None), getattr(trace, "y", None))
+        if template:
+            trace.text = None
+            trace.texttemplate = template
+            if trace.hovertemplate:
+                trace.hovertemplate = trace.hovertemplate.replace("%{text}", template)
+
+        for path in PER_POINT_ATTRS:
+            obj = trace
+            for attr in path[:-1]:
+                obj = getattr(obj, attr, None)
+                if obj is None:
+                    break
+            if obj is None:
+                continue
+            valores = getattr(obj, path[-1], None)
+            if isinstance(valores, (list, tuple, np.ndarray)) and len(valores) > 0:
+                valores = list(valores)
+                if all(v == valores[0] for v in valores):
+                    obj[path[-1]] = valores[0]
+
+        n_pontos = len(trace.x) if getattr(trace, "x", None) is not None else 0
+        if trace.type == "scatter" and n_pontos > WEBGL_POINT_THRESHOLD:
+            spec = trace.to_plotly_json()
+            spec.pop("type", None)
+            trace = go.Scattergl(spec, skip_invalid=True)
+
+        traces.append(trace)
+
+    out = go.Figure(data=traces, layout=fig.layout)
+
+    # template: mantém só os defaults dos tipos de trace usados na figura
+    tipos = {t.type for t in traces}
+    tpl_data = out.layout.template.data.to_plotly_json()
+    out.layout.template.data = {k: v for k, v in tpl_data.items() if k in tipos}
+    return out
+
+def figure_payload_bytes(fig) -> int:
+    # mesmo serializador usado pelo st.plotly_chart
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+# ======================================================
+# CORES + FIGURAS (reaproveitadas pela pré-computação)
+# ======================================================
+BASE_COLORS = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728",
+    "#9467bd", "#17becf", "#e377c2", "#7f7f7f",
+    "#bcbd22", "#8c564b"
+]
+
+def default_color_map(items, base_colors=BASE_COLORS):
+    return {it: base_colors[i % len(base_colors)] for i, it in enumerate(items)}
+
+def color_signature(cmap: dict, items) -> tuple:
+    # figura pré-computada só serve se as cores dos itens exibidos forem as mesmas
+    return tuple((it, cmap.get(it)) for it in items)
+
+def label_filtro(ano_sel, mes_sel):
+    # ANO
+    if ano_sel == ["Todos"]:
+        ano_txt = "ANO TODOS"
+    else:
+        ano_txt = "Ano " + ", ".join(map(str, ano_sel))
+
+    # MÊS
+    if mes_sel == ["Todos"]:
+        mes_txt = "MÊS TODOS"
+    else:
+        mes_txt = "Mês " + ", ".join(mes_sel)
+
+    return f"{ano_txt} – {mes_txt}"
+
+def build_fig1(ser: pd.DataFrame, color_map: dict, titulo: str):
+    import plotly.express as px
+
+    fig1 = px.line(
+        ser,
+        x="mes_abrev",
+        y="eventos",
+        color="ano",
+        markers=True,
+        text=ser["eventos"].map(fmt_int),
+        color_discrete_map=color_map
+    )
+
+    fig1.update_traces(
+        textposition="top center",
+        marker=dict(size=10),
+        line=dict(width=3),
+        textfont=dict(
+            color="#1A1A1A",
+            size=14,
+            family="Arial Black"
+        )
+    )
+
+    fig1.update_layout(
+        title=titulo,
+        xaxis_title=None,
+        yaxis_title=None,
+        legend_title_text=None,
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=False, zeroline=False),
+        margin=dict(l=10, r=10, t=55, b=10),
+    )
+    return fig1
+
+def build_fig2(ind_sum: pd.DataFrame, cmap: dict):
+    import plotly.express as px
+
+    # controle de largura dinâmica
+    n_barras = len(ind_sum)
+    bar_width = 0.6 if n_barras > 1 else 0.35  # ← ocupa mais espaço quando só 1
+
+    fig2 = px.bar(
+        ind_sum,
+        x="indicador_fmt",
+        y="eventos",
+        text=ind_sum["eventos"].map(fmt_int),
+    )
+
+    fig2.update_traces(
+        width=bar_width,
+        textfont=dict(size=14, family="Arial Black")
+    )
+
+    # aplica cor por barra (por indicador)
+    fig2.data[0].marker.color = [cmap[ind] for ind in ind_sum["indicador"].tolist()]
+
+    # aplica posição e cor manualmente (100% confiável)
+    fig2.data[0].textposition = ind_sum["label_pos"].tolist()
+    fig2.data[0].textfont.color = ind_sum["label_color"].tolist()
+
+    fig2.update_layout(
+        xaxis_title=None,
+        yaxis_title=None,
+        showlegend=False,
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            tickangle=0,
+            tickfont=dict(size=12)
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False
+        ),
+        margin=dict(l=10, r=10, t=20, b=40)
+    )
+    return fig2
+
+def build_fig3(byy: pd.DataFrame, cmap: dict):
+    import plotly.express as px
+
+    fig3 = px.bar(
+        byy,
+        x="ano",
+        y="eventos",
+        text=byy["eventos"].map(fmt_int)
+    )
+
+    fig3.update_traces(
+        textposition="inside",
+        textfont=dict(color="white", size=18, family="Arial Black"),
+    )
+
+    # cor por barra (por ano)
+    fig3.data[0].marker.color = [
+        cmap[int(a)] for a in byy["ano"].astype(int).tolist()
+    ]
+
+    fig3.update_layout(
+        xaxis_title=None,
+        yaxis_title=None,
+        showlegend=False,
+        xaxis=dict(
+            type="category",
+            categoryorder="array",                # ← força ordem manual
+            categoryarray=byy["ano"].tolist(),    # ← exatamente como o dataframe
+            showgrid=False,
+            zeroline=False,
+        ),
+        yaxis=dict(showgrid=False, zeroline=False),
+        margin=dict(l=10, r=10, t=15, b=10),
+    )
+    return fig3
+
+def build_fig_evt(sub_evt: pd.DataFrame, cor: str):
+    """Item 5 (modo Eventos): barras por aeroporto de um indicador."""
+    import plotly.express as px
+
+    # 🔤 eixo X com aeroporto + movimentação
+    sub_evt = sub_evt.assign(
+        label_x=sub_evt["aeroporto"]
+        + "<br><span style='font-size:11px'>"
+        + sub_evt["mov"].map(fmt_int)
+        + "</span>"
+    )
+
+    fig_evt = px.bar(
+        sub_evt,
+        x="label_x",
+        y="eventos",
+        text=sub_evt["eventos"].map(fmt_int),
+    )
+
+    # 🔧 limite superior com folga (EVITA CORTE)
+    y_max = sub_evt["eventos"].max()
+    y_lim = y_max * 1.25 if y_max > 0 else 1
+
+    fig_evt.update_traces(
+        marker_color=cor,
+        textposition="outside",
+        cliponaxis=False,
+        textfont=dict(color="#000000", size=13, family="Arial Black"),
+    )
+
+    fig_evt.update_layout(
+        showlegend=False,
+        xaxis_title="MOVIMENTAÇÃO",
+        yaxis_title=None,
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            tickfont=dict(color="#000000", size=13, family="Arial Black"),
+        ),
+        xaxis_title_font=dict(size=14, family="Arial Black", color="#1a2732"),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            range=[0, y_lim],
+            tickfont=dict(color="#000000", size=13, family="Arial Black"),
+        ),
+        uniformtext_minsize=12,
+        uniformtext_mode="show",
+        margin=dict(l=40, r=30, t=80, b=100),
+        height=420,
+    )
+    return fig_evt
+
+def build_fig_idx(sub: pd.DataFrame, cor: str):
+    """Item 5 (modo Índice): linha por aeroporto de um indicador."""
+    import plotly.express as px
+
+    # 🔥 se todos os valores são zero, o eixo mostra só o 0
+    todos_zero = (sub["valor_rank"].abs().sum() == 0)
+
+    fig_idx = px.line(
+        sub,
+        x="aeroporto",
+        y="valor_rank",
+        markers=True,
+        text=sub["valor_rank"].apply(lambda x: f"{x:.3f}".replace(".", ",")),
+    )
+
+    fig_idx.update_traces(
+        textposition="top center",
+        marker=dict(size=10),
+        line=dict(width=3, color=cor),
+        textfont=dict(color="#000000", size=13, family="Arial Black"),
+    )
+
+    fig_idx.update_layout(
+        xaxis_title=None,
+        yaxis_title=None,
+        showlegend=False,
+        xaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            tickfont=dict(color="#000000", size=13, family="Arial Black"),
+        ),
+        yaxis=dict(
+            showgrid=False,
+            zeroline=False,
+            tickmode="array" if todos_zero else "auto",
+            tickvals=[0] if todos_zero else None,
+            range=[-0.05, 0.05] if todos_zero else None,
+            tickfont=dict(color="#000000", size=13, family="Arial Black"),
+        ),
+        margin=dict(l=40, r=30, t=30, b=60),
+        height=420,
+    )
+    return fig_idx
+
+def build_fig_cmp(cmp: pd.DataFrame, por_indice: bool, color_map: dict):
+    """Item 6: comparativo mensal A × B (saída de compare_airports)."""
+    import plotly.express as px
+
+    tickformat_y = ".3f" if por_indice else "d"
+    hover_fmt = "%{y:.3f}" if por_indice else "%{y:d}"
+
+    fig_cmp = px.bar(
+        cmp,
+        x="mes_abrev",
+        y="valor_plot",
+        color="aeroporto",
+        text="texto_plot",          # 🔥 texto certo para cada modo
+        color_discrete_map=color_map,
+    )
+
+    # 🔥 hover sempre coerente com o modo
+    fig_cmp.update_traces(
+        hovertemplate=(
+            "aeroporto=%{legendgroup}"
+            "<br>mês=%{x}"
+            f"<br>valor={hover_fmt}"
+            "<extra></extra>"
+        )
+    )
+    fig_cmp.update_yaxes(tickformat=tickformat_y)
+
+    # 🔹 lógica inside / outside
+    for trace in fig_cmp.data:
+        valores = list(trace.y)
+        max_val = max(valores) if valores else 0
+
+        pos, cor = [], []
+        for v in valores:
+            if v >= max_val * 0.25:
+                pos.append("inside")
+                cor.append("white")
+            else:
+                pos.append("outside")
+                cor.append("#333")
+
+        trace.textposition = pos
+        trace.textangle = 0
+        trace.textfont = dict(color=cor, size=11, family="Arial Black")
+
+    fig_cmp.update_layout(
+        barmode="group",
+        xaxis_title=None,
+        yaxis_title=None,
+        legend_title_text=None,
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=False, zeroline=False),
+        margin=dict(l=10, r=10, t=15, b=10),
+    )
+    return fig_cmp
+
+def build_fig_profile(stages: list):
+    """Cascata do rerun: uma barra por etapa (nome, início_s, duração_s), na ordem de execução."""
+    nomes = [nome for nome, _, _ in stages]
+    inicio_ms = [ini * 1000 for _, ini, _ in stages]
+    dur_ms = [dur * 1000 for _, _, dur in stages]
+    maior = max(dur_ms) if dur_ms else 0
+
+    fig = go.Figure(go.Bar(
+        y=nomes,
+        x=dur_ms,
+        base=inicio_ms,
+        orientation="h",
+        marker_color=[ACCENT if d < maior else "#d62728" for d in dur_ms],
+        text=[f"{d:,.0f} ms".replace(",", ".") for d in dur_ms],
+        textposition="outside",
+        cliponaxis=False,
+        hovertemplate="%{y}<br>início: %{base:.0f} ms<br>duração: %{x:.0f} ms<extra></extra>",
+    ))
+    fig.update_layout(
+        showlegend=False,
+        xaxis_title="ms desde o início do rerun",
+        yaxis=dict(autorange="reversed", showgrid=False),
+        xaxis=dict(showgrid=True, zeroline=False),
+        margin=dict(l=10, r=60, t=10, b=40),
+        height=max(220, 28 * len(nomes) + 60),
+    )
+    return fig
+
+# ======================================================
+# BLOCOS HTML — PENDÊNCIAS, COMPARATIVO, RANKING, METAS E STATUS
+# ======================================================
+
+def pending_card_html(r) -> str:
+    """Card de um aeroporto pendente (linha de pending_only)."""
+    req_txt = f"{r['required_mes_abrev']}/{r['required_ano']}"
+    missing = int(r["missing_months"]) if int(r["missing_months"]) else 1
+
+    if r["is_overdue"]:
+        atraso = int(r["days_from_due"])
+        days_txt = f"⏱️ Atraso: <b>{atraso} dia(s)</b>"
+        badge = '<span class="badge red">PENDENTE</span>'
+    else:
+        faltam = abs(int(r["days_from_due"]))
+        days_txt = f"⏱️ Vence em: <b>{faltam} dia(s)</b>"
+        badge = '<span class="badge red">PRAZO ABERTO</span>'
+
+    more = f"• Meses em atraso: <b>{missing}</b>" if missing > 1 else "• Aguardando registro do período exigido"
+    return f"""
+    <div class="pending-card">
+      <div class="pending-title">{r["aeroporto"]}</div>
+      <div style="text-align:center;">{badge}</div>
+      <div class="pending-sub">Período exigido: <b>{req_txt}</b></div>
+      <div class="pending-days">{days_txt}<br/>{more}</div>
+    </div>
+    """
+
+def compare_cards_html(aero_a, aero_b, total_a, total_b, pct_var, por_indice: bool, color_map: dict) -> list:
+    """Os três cards do comparativo: A, variação A × B e B."""
+    label_y = "índice" if por_indice else "eventos"
+
+    def fmt_val(v):
+        return f"{v:.3f}".replace(".", ",") if por_indice else fmt_int(v)
+
+    cor_a = color_map.get(aero_a, "#1a2732")
+    cor_b = color_map.get(aero_b, "#1a2732")
+    cor_var = "up" if pct_var > 0 else "down" if pct_var < 0 else "flat"
+    var_txt = f"{pct_var*100:+.2f}%".replace(".", ",")
+    return [
+        f"""
+        <div class="kpi-card">
+            <div class="kpi-title" style="color:{cor_a};">{aero_a}</div>
+            <div class="kpi-value" style="color:{cor_a};">{fmt_val(total_a)}</div>
+            <div class="kpi-sub">{label_y}</div>
+        </div>
+        """,
+        f"""
+        <div class="kpi-card">
+            <div class="kpi-title">Variação A × B</div>
+            <div class="kpi-value {cor_var}">{var_txt}</div>
+            <div class="kpi-sub">{aero_a} vs {aero_b}</div>
+        </div>
+        """,
+        f"""
+        <div class="kpi-card">
+            <div class="kpi-title" style="color:{cor_b};">{aero_b}</div>
+            <div class="kpi-value" style="color:{cor_b};">{fmt_val(total_b)}</div>
+            <div class="kpi-sub">{label_y}</div>
+        </div>
+        """,
+    ]
+
+RANK_TOP = 17
+
+def classe_indicador(nome):
+    # classe CSS por indicador
+    nome = nome.upper()
+    if "RI" in nome:
+        return "rank-ind-RI"
+    if "FOD" in nome:
+        return "rank-ind-FOD"
+    if "COL" in nome:
+        return "rank-ind-COLISAO"
+    if "FAUNA" in nome:
+        return "rank-ind-FAUNA"
+    return "rank-ind-OUTROS"
+
+def rank_cards_html(rank_df: pd.DataFrame, indicador: str, modo_rank: str) -> str:
+    sub = (
+        rank_df[rank_df["indicador"] == indicador]
+        .sort_values("valor_rank", ascending=False)
+        .head(RANK_TOP)
+        .reset_index(drop=True)
+    )
+    classe_ind = classe_indicador(indicador)
+
+    html_cards = '<div class="rank-grid">'
+
+    for pos, row in sub.iterrows():
+
+        classes = ["rank-card-mini", classe_ind]
+
+        if pos == 0:
+            classes.append("rank-top-1")
+        elif pos in [1, 2]:
+            classes.append("rank-top-3")
+
+        if modo_rank == "Indicador por Eventos":
+            valor_html = (
+                f'<div class="rank-value">{fmt_int(row["eventos"])}</div>'
+                '<div class="rank-label">eventos</div>'
+            )
+        else:
+            valor_fmt = f"{row['valor_rank']:.4f}".replace(".", ",")
+            valor_html = (
+                f'<div class="rank-value">{valor_fmt}</div>'
+                '<div class="rank-label">índice</div>'
+            )
+
+        html_cards += (
+            f'<div class="{" ".join(classes)}">'
+            f'<div class="rank-pos">#{pos + 1}</div>'
+            f'<div class="rank-aero">{row["aeroporto"]}</div>'
+            f'{valor_html}'
+            '</div>'
+        )
+
+    return html_cards + "</div>"
+
+META_CORES = {"ok": "#96CE00", "atencao": "#ffb703", "fora": "#ff5a5f"}
+
+def meta_card_html(indicador, aeroporto_label, valor, meta):
+
+    pct = (valor / meta) if meta > 0 else 0
+    pct_pct = pct * 100
+    pct_bar = min(pct_pct, 150)
+
+    # 🟢 confortável / 🟡 atenção / 🔴 fora da meta (RELPREV: quanto MAIOR, melhor)
+    bar_color = META_CORES[meta_faixa(indicador, valor, meta)]
+
+    return (
+        '<div class="meta-card">'
+        f'<div class="meta-title">{indicador}</div>'
+        f'<div class="meta-aero">{aeroporto_label}</div>'
+        f'<div class="meta-value" style="color:{bar_color};">{fmt_int(valor)}</div>'
+        f'<div class="meta-sub">Meta: {fmt_int(meta)}</div>'
+        '<div class="meta-bar">'
+        f'<div class="meta-bar-fill" style="width:{pct_bar:.1f}%; background:{bar_color};"></div>'
+        '</div>'
+        f'<div class="meta-pct">{pct_pct:.1f}% da meta</div>'
+        '</div>'
+    )
+
+def metas_grid_html(linhas: list) -> str:
+    # linhas: saída de idso_core.metas_grid
+    return '<div class="metas-grid">' + "".join(
+        meta_card_html(
+            indicador=linha["indicador"],
+            aeroporto_label=linha["aeroporto"],
+            valor=linha["valor"],
+            meta=linha["meta"],
+        )
+        for linha in linhas
+    ) + "</div>"
+
+def status_block_html(lista, titulo, cor_borda, cor_fundo, detalhado=False):
+
+    if not lista:
+        return ""
+
+    cards = ""
+
+    for item in lista:
+
+        if not detalhado:
+            aero = item
+            extra = ""
+        else:
+            aero = item["aeroporto"]
+            extra = (
+                '<div class="status-detail" style="margin-top:6px;">'
+                f'Meta: <b>{fmt_int(item["meta"])}</b></div>'
+                '<div class="status-detail">'
+                f'Realizado: <b>{fmt_int(item["valor"])}</b></div>'
+            )
+
+        cards += (
+            f'<div class="status-card" style="border: 2px solid {cor_borda}; background: {cor_fundo};">'
+            f'<div class="status-aero">{aero}</div>'
+            f'{extra}'
+            '</div>'
+        )
+
+    return (
+        '<div class="status-group">'
+        f'<div class="status-title">{titulo}</div>'
+        f'<div class="status-grid">{cards}</div>'
+        '</div>'
+    )
+
+def status_html(atingiram, nao_atingiram) -> str:
+    return (
+        status_block_html(atingiram, "🟢 Aeroportos que ficaram dentro das metas", "#96CE00", "#f1f8e9")
+        + status_block_html(nao_atingiram, "🔴 Aeroportos que extrapolaram as metas", "#ff5a5f", "#fdecea", detalhado=True)
+    )
@@ -0,0 +1,193 @@
+# ======================================================
+# IDSO — PRÉ-COMPUTAÇÃO DA VISÃO PADRÃO (SEM STREAMLIT)
+# Logo após o upload, gera em segundo plano o que a visão "Todos" usa
+# (recortes, figuras, ranking, XLSX). Um job por arquivo (sha256),
+# compartilhado entre sessões; os passos prontos ficam nos caches de
+# agregados, figuras e exportações (idso_cache).
+# ======================================================
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from idso_core import (
+    ANO_COLORS,
+    df_to_excel_bytes,
+    default_view_frame, calc_pending_by_airport,
+    filter_options, agg_monthly, agg_eventos_mes,
+    agg_indicador, agg_ano, agg_rank,
+    export_sheets, pend_export_frame,
+)
+from idso_views import default_color_map, color_signature, build_fig1, build_fig2, build_fig3
+from idso_cache import get_cache
+
+def warm_default_view(df: pd.DataFrame, today: date, prontos: dict = None):
+    """
+    Gera, passo a passo, o que a visão padrão ("Todos" em todos os filtros)
+    usa nas abas 2 e 3. Cada passo devolve (nome, assinatura, valor); a
+    assinatura identifica as entradas que não vêm do df (cores, título, data).
+    prontos: {nome: valor} de agregados já calculados (ex.: lidos do Arrow),
+    usados no lugar de recalcular.
+    """
+    prontos = prontos or {}
+
+    def passo(nome, fn):
+        return prontos[nome] if nome in prontos else fn()
+
+    # o recorte "Todos" é a própria base (ou quase): não vai para o cache, só os agregados
+    df_f = default_view_frame(df, filter_options(df)[3])
+
+    monthly = passo("monthly", lambda: agg_monthly(df_f))
+    yield "monthly", None, monthly
+
+    if not df_f.empty:
+        ser = passo("ser", lambda: agg_eventos_mes(df_f))
+        yield "ser", None, ser
+        anos_disp = sorted(ser["ano"].unique().tolist())
+        cmap1 = default_color_map(anos_disp, ANO_COLORS)
+        titulo = "Todos os Indicadores"
+        yield "fig1", (color_signature(cmap1, anos_disp), titulo), build_fig1(ser, cmap1, titulo)
+
+        ind_sum = passo("ind_sum", lambda: agg_indicador(df_f))
+        yield "ind_sum", None, ind_sum
+        inds = ind_sum["indicador"].tolist()
+        cmap2 = default_color_map(inds)
+        yield "fig2", color_signature(cmap2, inds), build_fig2(ind_sum, cmap2)
+
+        byy = passo("byy", lambda: agg_ano(df_f))
+        yield "byy", None, byy
+        anos_3 = byy["ano"].tolist()
+        cmap3 = default_color_map(anos_3)
+        yield "fig3", color_signature(cmap3, anos_3), build_fig3(byy, cmap3)
+
+        for modo in ("Indicador por Eventos", "Indicador por Índice"):
+            yield ("rank", modo), None, passo(("rank", modo), lambda: agg_rank(df_f, modo))
+
+    yield "xlsx_relatorio", None, df_to_excel_bytes(export_sheets(df_f, monthly))
+
+    pend_df, _, _ = calc_pending_by_airport(df, today)
+    yield "xlsx_pendencias", today, df_to_excel_bytes({"PENDENCIAS": pend_export_frame(pend_df)})
+
+def warm_cache_for(nome):
+    """Cache de cada passo: figuras, bytes de exportação ou agregados (idso_cache)."""
+    rotulo = nome[0] if isinstance(nome, tuple) else nome
+    if rotulo.startswith("fig"):
+        return get_cache("figuras")
+    if rotulo.startswith("xlsx"):
+        return get_cache("exportacoes")
+    return get_cache("agregados")
+
+class WarmStore:
+    """
+    Pool de threads que aquece a visão padrão por arquivo (sha256).
+    - um job por sha, compartilhado entre sessões
+    - resultados ficam disponíveis passo a passo, em caches limitados
+      (cache_for(nome) → BoundedCache, chave (sha, nome))
+    - cancelado quando a sessão troca/remove o arquivo; os mais antigos saem
+      além de max_files, exceto os fixados com pin()
+    - on_finished(sha, {nome: valor}), se informado, recebe os passos ao fim
+      de um job completo (ex.: gravar os agregados em Arrow)
+    """
+
+    def __init__(self, max_workers=2, max_files=4, cache_for=warm_cache_for, on_finished=None):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="idso-warm")
+        self.cond = threading.Condition()
+        self.jobs = {}      # sha -> (future, cancel_event)
+        self.produced = {}  # sha -> {nome: cache} dos passos já gravados
+        self.finished = set()
+        self.pinned = frozenset()   # shas fora do descarte por max_files (conjunto publicado)
+        self.max_files = max_files
+        self.cache_for = cache_for
+        self.on_finished = on_finished
+
+    def start(self, sha, df, today, prontos=None):
+        with self.cond:
+            if sha in self.jobs:
+                return
+            cancel = threading.Event()
+            self.produced[sha] = {}
+            fut = self.pool.submit(self._run, sha, df, today, cancel, prontos)
+            self.jobs[sha] = (fut, cancel)
+            livres = [s for s in self.jobs if s not in self.pinned]
+            antigos = livres[:-self.max_files]
+        for old in antigos:
+            self.cancel(old)
+
+    def pin(self, *shas):
+        """Fixa os shas (ex.: conjunto publicado, que toda sessão nova abre): não saem por max_files."""
+        with self.cond:
+            self.pinned = frozenset(s for s in shas if s)
+
+    def seed(self, sha, passos: dict):
+        """Registra passos já prontos ({nome: (assinatura, valor)}, ex.: conjunto publicado) como um job concluído."""
+        with self.cond:
+            if sha in self.jobs:
+                return
+            self.produced[sha] = {}
+            for nome, (assinatura, valor) in passos.items():
+                cache = self.cache_for(nome)
+                cache.put((sha, nome), (valor, assinatura))
+                self.produced[sha][nome] = cache
+            self.jobs[sha] = (None, threading.Event())
+            self.finished.add(sha)
+            self.cond.notify_all()
+
+    def cancel(self, sha):
+        with self.cond:
+            job = self.jobs.pop(sha, None)
+            passos = self.produced.pop(sha, {})
+            self.finished.discard(sha)
+            self.cond.notify_all()
+        for nome, cache in passos.items():
+            cache.discard((sha, nome))
+        if job:
+            fut, cancel = job
+            cancel.set()
+            if fut is not None:
+                fut.cancel()
+
+    def _done(self, sha):
+        return sha not in self.jobs or sha in self.finished
+
+    def get(self, sha, nome, assinatura=None, timeout=0.0):
+        """Valor aquecido ou None; com timeout, espera o passo se o job ainda roda."""
+        limite = time.monotonic() + timeout
+        with self.cond:
+            while nome not in self.produced.get(sha, {}):
+                restante = limite - time.monotonic()
+                if restante <= 0 or self._done(sha):
+                    break
+                self.cond.wait(restante)
+        # o passo pode ter saído do cache (LRU/TTL): aí quem chamou recalcula
+        item = self.cache_for(nome).get((sha, nome))
+        if item is None:
+            return None
+        valor, ass = item
+        return valor if ass == assinatura else None
+
+    def _run(self, sha, df, today, cancel, prontos=None):
+        valores = {}
+        try:
+            for nome, assinatura, valor in warm_default_view(df, today, prontos):
+                if cancel.is_set():
+                    return
+                valores[nome] = valor
+                cache = self.cache_for(nome)
+                with self.cond:
+                    if sha not in self.produced:
+                        return
+                    cache.put((sha, nome), (valor, assinatura))
+                    self.produced[sha][nome] = cache
+                    self.cond.notify_all()
+            if self.on_finished is not None:
+                try:
+                    self.on_finished(sha, valores)
+                except Exception:
+                    pass            # falha ao persistir não afeta o que já está em cache
+        finally:
+            with self.cond:
+                if sha in self.jobs:
+                    self.finished.add(sha)
+                self.cond.notify_all()
@@ -0,0 +1,54 @@
+# ======================================================
+# IDSO — bench/golden.py: marcadores de erro e referência monolítica
+#   python -m pytest -q tests
+# ======================================================
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "bench"))
+
+import golden  # noqa: E402
+from golden import compare_tables, diff_value  # noqa: E402
+
+ERRO = {"__erro__": "AttributeError: module 'idso_core' has no attribute 'agg_rank'"}
+
+def test_marcador_contra_dataframe_nao_quebra():
+    df = pd.DataFrame({"aeroporto": ["SBSP"], "eventos": [3]})
+    assert diff_value(ERRO, df, False, 1e-9) == f"erro: ref={ERRO['__erro__']} • cand=ok"
+    assert diff_value(df, ERRO, False, 1e-9) == f"erro: ref=ok • cand={ERRO['__erro__']}"
+
+def test_marcador_contra_series():
+    assert diff_value(ERRO, pd.Series({"eventos": 3}), False, 1e-9).startswith("erro: ref=AttributeError")
+
+def test_marcadores_iguais_e_diferentes():
+    assert diff_value(ERRO, dict(ERRO), False, 1e-9) is None
+    assert diff_value(ERRO, {"__erro__": "KeyError: 'mov'"}, False, 1e-9).startswith("erro:")
+
+def test_compare_tables_segue_depois_do_marcador():
+    df = pd.DataFrame({"a": [1]})
+    resultado = compare_tables({"x": ERRO, "y": df}, {"x": df, "y": df.copy()}, False, 1e-9)
+    assert [r["ok"] for r in resultado] == [False, True]
+
+def _revisao_inicial():
+    r = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=RAIZ, capture_output=True, text=True)
+    return r.stdout.split()[0] if r.returncode == 0 and r.stdout.strip() else None
+
+def test_referencia_monolitica_monta_a_api_do_core(tmp_path):
+    ref = _revisao_inicial()
+    if ref is None or golden._git_show(ref, "idso_core.py") is not None:
+        pytest.skip("sem revisão monolítica no histórico")
+    destino = golden.checkout_ref(ref, str(tmp_path))
+    codigo = open(os.path.join(destino, "idso_core.py"), encoding="utf-8").read()
+    ns = {}
+    exec(compile(codigo, "idso_core.py", "exec"), ns)      # não pode depender do streamlit
+    for api in golden.BLOCOS_MONOLITO:
+        assert callable(ns[api]), api
+    df_f = pd.DataFrame({"aeroporto": ["SBSP", "SBSP", "SBRJ"], "ano": [2025, 2025, 2025],
+                         "ordem_mes": [1, 1, 2], "indicador": ["A", "B", "A"],
+                         "eventos": [2, 3, 4], "mov": [100, 100, 50]})
+    assert ns["kpi_values"](df_f) == {"aeroportos": 2, "indicadores": 2, "eventos": 9, "mov": 150}
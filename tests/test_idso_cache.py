@@ -0,0 +1,77 @@
+# ======================================================
+# IDSO — BoundedCache: cálculo único por chave sob concorrência
+#   python -m pytest -q tests
+# ======================================================
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idso_cache import BoundedCache  # noqa: E402
+
+def test_get_or_compute_calcula_uma_vez_sob_concorrencia():
+    cache = BoundedCache("teste", max_entries=8)
+    chamadas = []
+    largada = threading.Barrier(16)
+
+    def calcular():
+        chamadas.append(threading.get_ident())
+        time.sleep(0.05)            # mantém a trava ocupada enquanto os outros chegam
+        return "valor"
+
+    resultados = []
+
+    def sessao():
+        largada.wait()
+        resultados.append(cache.get_or_compute("sha", calcular))
+
+    threads = [threading.Thread(target=sessao) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(chamadas) == 1
+    assert resultados == ["valor"] * 16
+    assert cache.hits + cache.misses == 16
+
+def test_quem_espera_encontra_o_valor_ja_gravado():
+    # medir o tamanho (sizer) acontece dentro do put: com um sizer lento, quem
+    # acordasse entre liberar a trava e gravar o valor calcularia de novo
+    def sizer_lento(valor):
+        time.sleep(0.1)
+        return 1
+
+    cache = BoundedCache("teste", max_entries=8, sizer=sizer_lento)
+    chamadas = []
+    largada = threading.Barrier(8)
+
+    def calcular():
+        chamadas.append(1)
+        return "valor"
+
+    def sessao():
+        largada.wait()
+        cache.get_or_compute("sha", calcular)
+
+    threads = [threading.Thread(target=sessao) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(chamadas) == 1
+
+def test_erro_no_calculo_libera_a_chave():
+    cache = BoundedCache("teste", max_entries=8)
+
+    def falha():
+        raise RuntimeError("planilha inválida")
+
+    try:
+        cache.get_or_compute("sha", falha)
+    except RuntimeError:
+        pass
+    assert "sha" not in cache
+    assert cache.get_or_compute("sha", lambda: 42) == 42
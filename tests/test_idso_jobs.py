@@ -0,0 +1,33 @@
+# ======================================================
+# IDSO — ExportQueue.stats: cada job contado uma vez só
+#   python -m pytest -q tests
+# ======================================================
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from idso_jobs import ExportQueue  # noqa: E402
+
+def test_stats_conta_cada_job_uma_vez_enquanto_terminam():
+    fila = ExportQueue(max_workers=4, max_queued=500, max_results=500)
+    n = 300
+    for i in range(n):
+        fila.submit(i, lambda progress: time.sleep(0.001))
+    inconsistentes = []
+    while True:
+        s = fila.stats()
+        if s["fila"] + s["rodando"] + s["prontos"] + s["erros"] != n or s["pedidos_reaproveitados"]:
+            inconsistentes.append(s)
+        if s["prontos"] == n:
+            break
+    assert inconsistentes == []
+
+def test_pedido_repetido_conta_como_reaproveitado():
+    fila = ExportQueue(max_workers=1)
+    job = fila.submit("xlsx", lambda progress: "ok")
+    job.wait(5)
+    assert fila.submit("xlsx", lambda progress: "de novo") is job
+    assert fila.stats()["pedidos_reaproveitados"] == 1
+    assert fila.snapshot() == [job]